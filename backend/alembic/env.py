@@ -0,0 +1,60 @@
+"""
+Ambiente do Alembic
+
+Usa a mesma DATABASE_URL e os mesmos modelos da aplicação, para que
+`alembic revision --autogenerate` compare o banco com `app/models`.
+"""
+from logging.config import fileConfig
+
+from alembic import context
+from sqlalchemy import create_engine, pool
+
+from app.database import DATABASE_URL, Base
+from app.models import models  # noqa: F401 - registra as tabelas em Base.metadata
+
+config = context.config
+
+if config.config_file_name is not None:
+    fileConfig(config.config_file_name)
+
+target_metadata = Base.metadata
+
+
+def include_object(obj, name, type_, reflected, compare_to):
+    """
+    Ignora as partições de change_history (criadas pela migração 0005 e por
+    scripts/history_partitions.py), que não têm modelo próprio
+    """
+    if type_ == "table" and reflected and compare_to is None and name.startswith("change_history_"):
+        return False
+    if type_ == "index" and reflected and compare_to is None and obj.table.name.startswith("change_history_"):
+        return False
+    return True
+
+
+def run_migrations_offline() -> None:
+    """Gera o SQL das migrações sem conectar ao banco (`alembic upgrade --sql`)"""
+    context.configure(
+        url=DATABASE_URL,
+        target_metadata=target_metadata,
+        include_object=include_object,
+        literal_binds=True,
+        dialect_opts={"paramstyle": "named"},
+    )
+    with context.begin_transaction():
+        context.run_migrations()
+
+
+def run_migrations_online() -> None:
+    # NullPool: o processo de migração não precisa do pool da aplicação
+    connectable = create_engine(DATABASE_URL, poolclass=pool.NullPool)
+    with connectable.connect() as connection:
+        context.configure(connection=connection, target_metadata=target_metadata, include_object=include_object)
+        with context.begin_transaction():
+            context.run_migrations()
+
+
+if context.is_offline_mode():
+    run_migrations_offline()
+else:
+    run_migrations_online()
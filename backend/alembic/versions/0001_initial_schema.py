@@ -0,0 +1,99 @@
+"""initial schema
+
+Esquema original (pessoas e imobiliárias), idêntico ao criado pelo
+create_all antes das migrações. Bancos criados assim devem ser marcados com
+`alembic stamp 0001`; as revisões seguintes aplicam o que veio depois.
+
+Revision ID: 0001
+Revises:
+Create Date: 2026-10-19 12:22:48.968493
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0001'
+down_revision: Union[str, None] = None
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table('companies',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('company_name', sa.String(length=255), nullable=False),
+    sa.Column('trade_name', sa.String(length=255), nullable=False),
+    sa.Column('cnpj', sa.String(length=18), nullable=False),
+    sa.Column('email', sa.String(length=255), nullable=False),
+    sa.Column('phone', sa.String(length=20), nullable=True),
+    sa.Column('website', sa.String(length=255), nullable=True),
+    sa.Column('address_street', sa.String(length=255), nullable=True),
+    sa.Column('address_number', sa.String(length=20), nullable=True),
+    sa.Column('address_complement', sa.String(length=100), nullable=True),
+    sa.Column('address_neighborhood', sa.String(length=100), nullable=True),
+    sa.Column('address_city', sa.String(length=100), nullable=True),
+    sa.Column('address_state', sa.String(length=2), nullable=True),
+    sa.Column('address_zipcode', sa.String(length=10), nullable=True),
+    sa.Column('logo_url', sa.String(length=500), nullable=True),
+    sa.Column('creci', sa.String(length=20), nullable=True),
+    sa.Column('plan_type', sa.String(length=50), nullable=True),
+    sa.Column('notes', sa.Text(), nullable=True),
+    sa.Column('is_active', sa.Boolean(), nullable=True),
+    sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=True),
+    sa.Column('updated_at', sa.DateTime(timezone=True), nullable=True),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_companies_cnpj'), 'companies', ['cnpj'], unique=True)
+    op.create_index(op.f('ix_companies_id'), 'companies', ['id'], unique=False)
+    op.create_index(op.f('ix_companies_trade_name'), 'companies', ['trade_name'], unique=False)
+    op.create_table('persons',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('person_type', sa.Enum('PF', 'PJ', name='persontype'), nullable=False),
+    sa.Column('name', sa.String(length=255), nullable=False),
+    sa.Column('email', sa.String(length=255), nullable=False),
+    sa.Column('phone', sa.String(length=20), nullable=True),
+    sa.Column('mobile', sa.String(length=20), nullable=True),
+    sa.Column('cpf', sa.String(length=14), nullable=True),
+    sa.Column('cnpj', sa.String(length=18), nullable=True),
+    sa.Column('rg', sa.String(length=20), nullable=True),
+    sa.Column('address_street', sa.String(length=255), nullable=True),
+    sa.Column('address_number', sa.String(length=20), nullable=True),
+    sa.Column('address_complement', sa.String(length=100), nullable=True),
+    sa.Column('address_neighborhood', sa.String(length=100), nullable=True),
+    sa.Column('address_city', sa.String(length=100), nullable=True),
+    sa.Column('address_state', sa.String(length=2), nullable=True),
+    sa.Column('address_zipcode', sa.String(length=10), nullable=True),
+    sa.Column('role', sa.Enum('ADMIN', 'CORRETOR', 'VENDEDOR', 'CLIENTE', 'GESTOR', name='userrole'), nullable=False),
+    sa.Column('company_id', sa.Integer(), nullable=True),
+    sa.Column('notes', sa.Text(), nullable=True),
+    sa.Column('is_active', sa.Boolean(), nullable=True),
+    sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=True),
+    sa.Column('updated_at', sa.DateTime(timezone=True), nullable=True),
+    sa.ForeignKeyConstraint(['company_id'], ['companies.id'], ),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_persons_cnpj'), 'persons', ['cnpj'], unique=True)
+    op.create_index(op.f('ix_persons_cpf'), 'persons', ['cpf'], unique=True)
+    op.create_index(op.f('ix_persons_email'), 'persons', ['email'], unique=True)
+    op.create_index(op.f('ix_persons_id'), 'persons', ['id'], unique=False)
+    op.create_index(op.f('ix_persons_name'), 'persons', ['name'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index(op.f('ix_persons_name'), table_name='persons')
+    op.drop_index(op.f('ix_persons_id'), table_name='persons')
+    op.drop_index(op.f('ix_persons_email'), table_name='persons')
+    op.drop_index(op.f('ix_persons_cpf'), table_name='persons')
+    op.drop_index(op.f('ix_persons_cnpj'), table_name='persons')
+    op.drop_table('persons')
+    op.drop_index(op.f('ix_companies_trade_name'), table_name='companies')
+    op.drop_index(op.f('ix_companies_id'), table_name='companies')
+    op.drop_index(op.f('ix_companies_cnpj'), table_name='companies')
+    op.drop_table('companies')
+    bind = op.get_bind()
+    sa.Enum(name='userrole').drop(bind, checkfirst=True)
+    sa.Enum(name='persontype').drop(bind, checkfirst=True)
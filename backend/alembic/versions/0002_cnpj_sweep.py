@@ -0,0 +1,45 @@
+"""cnpj sweep
+
+Situação cadastral (Receita Federal) em pessoas e imobiliárias e o estado
+da varredura periódica de CNPJs (scripts/cnpj_sweep.py).
+
+Revision ID: 0002
+Revises: 0001
+Create Date: 2026-10-19 12:23:10.117342
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0002'
+down_revision: Union[str, None] = '0001'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table('cnpj_sweep_state',
+    sa.Column('entity', sa.String(length=50), nullable=False),
+    sa.Column('last_id', sa.Integer(), nullable=False),
+    sa.Column('sweep_started_at', sa.DateTime(timezone=True), nullable=True),
+    sa.Column('sweep_finished_at', sa.DateTime(timezone=True), nullable=True),
+    sa.Column('rows_checked', sa.Integer(), nullable=False),
+    sa.Column('rows_changed', sa.Integer(), nullable=False),
+    sa.Column('updated_at', sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=True),
+    sa.PrimaryKeyConstraint('entity')
+    )
+    for table in ('companies', 'persons'):
+        op.add_column(table, sa.Column('situacao_cadastral', sa.String(length=50), nullable=True))
+        op.add_column(table, sa.Column('situacao_changed_at', sa.DateTime(timezone=True), nullable=True))
+
+
+def downgrade() -> None:
+    for table in ('persons', 'companies'):
+        with op.batch_alter_table(table) as batch_op:
+            batch_op.drop_column('situacao_changed_at')
+            batch_op.drop_column('situacao_cadastral')
+    op.drop_table('cnpj_sweep_state')
@@ -0,0 +1,28 @@
+"""tenant index
+
+Índice (company_id, created_at) para as listagens no escopo de uma
+imobiliária (X-Company-Id).
+
+Revision ID: 0003
+Revises: 0002
+Create Date: 2026-10-19 12:23:31.804417
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0003'
+down_revision: Union[str, None] = '0002'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_index('ix_persons_company_id_created_at', 'persons', ['company_id', 'created_at'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index('ix_persons_company_id_created_at', table_name='persons')
@@ -0,0 +1,104 @@
+"""partial indexes and archive
+
+Índices parciais (is_active = true) das listagens e contagens, e as tabelas
+de arquivo (persons_archive, companies_archive) para registros inativos
+antigos (scripts/archive_inactive.py).
+
+Revision ID: 0004
+Revises: 0003
+Create Date: 2026-10-19 12:23:52.402918
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0004'
+down_revision: Union[str, None] = '0003'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# Tipos enum já criados em 0001 pela tabela quente
+person_type = postgresql.ENUM('PF', 'PJ', name='persontype', create_type=False)
+user_role = postgresql.ENUM('ADMIN', 'CORRETOR', 'VENDEDOR', 'CLIENTE', 'GESTOR', name='userrole', create_type=False)
+
+ACTIVE = sa.text('is_active = true')
+
+
+def upgrade() -> None:
+    op.create_index('ix_companies_active_created_at', 'companies', ['created_at'], unique=False, postgresql_where=ACTIVE, sqlite_where=ACTIVE)
+    op.create_index('ix_companies_active_plan_type', 'companies', ['plan_type'], unique=False, postgresql_where=ACTIVE, sqlite_where=ACTIVE)
+    op.create_index('ix_persons_active_company_id_created_at', 'persons', ['company_id', 'created_at'], unique=False, postgresql_where=ACTIVE, sqlite_where=ACTIVE)
+    op.create_index('ix_persons_active_created_at', 'persons', ['created_at'], unique=False, postgresql_where=ACTIVE, sqlite_where=ACTIVE)
+    op.create_index('ix_persons_active_role', 'persons', ['role'], unique=False, postgresql_where=ACTIVE, sqlite_where=ACTIVE)
+    op.create_table('companies_archive',
+    sa.Column('id', sa.Integer(), autoincrement=False, nullable=False),
+    sa.Column('company_name', sa.String(length=255), autoincrement=False, nullable=False),
+    sa.Column('trade_name', sa.String(length=255), autoincrement=False, nullable=False),
+    sa.Column('cnpj', sa.String(length=18), autoincrement=False, nullable=False),
+    sa.Column('situacao_cadastral', sa.String(length=50), autoincrement=False, nullable=True),
+    sa.Column('situacao_changed_at', sa.DateTime(timezone=True), autoincrement=False, nullable=True),
+    sa.Column('email', sa.String(length=255), autoincrement=False, nullable=False),
+    sa.Column('phone', sa.String(length=20), autoincrement=False, nullable=True),
+    sa.Column('website', sa.String(length=255), autoincrement=False, nullable=True),
+    sa.Column('address_street', sa.String(length=255), autoincrement=False, nullable=True),
+    sa.Column('address_number', sa.String(length=20), autoincrement=False, nullable=True),
+    sa.Column('address_complement', sa.String(length=100), autoincrement=False, nullable=True),
+    sa.Column('address_neighborhood', sa.String(length=100), autoincrement=False, nullable=True),
+    sa.Column('address_city', sa.String(length=100), autoincrement=False, nullable=True),
+    sa.Column('address_state', sa.String(length=2), autoincrement=False, nullable=True),
+    sa.Column('address_zipcode', sa.String(length=10), autoincrement=False, nullable=True),
+    sa.Column('logo_url', sa.String(length=500), autoincrement=False, nullable=True),
+    sa.Column('creci', sa.String(length=20), autoincrement=False, nullable=True),
+    sa.Column('plan_type', sa.String(length=50), autoincrement=False, nullable=True),
+    sa.Column('notes', sa.Text(), autoincrement=False, nullable=True),
+    sa.Column('is_active', sa.Boolean(), autoincrement=False, nullable=True),
+    sa.Column('created_at', sa.DateTime(timezone=True), autoincrement=False, nullable=True),
+    sa.Column('updated_at', sa.DateTime(timezone=True), autoincrement=False, nullable=True),
+    sa.Column('archived_at', sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=False),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_table('persons_archive',
+    sa.Column('id', sa.Integer(), autoincrement=False, nullable=False),
+    sa.Column('person_type', person_type, autoincrement=False, nullable=False),
+    sa.Column('name', sa.String(length=255), autoincrement=False, nullable=False),
+    sa.Column('email', sa.String(length=255), autoincrement=False, nullable=False),
+    sa.Column('phone', sa.String(length=20), autoincrement=False, nullable=True),
+    sa.Column('mobile', sa.String(length=20), autoincrement=False, nullable=True),
+    sa.Column('cpf', sa.String(length=14), autoincrement=False, nullable=True),
+    sa.Column('cnpj', sa.String(length=18), autoincrement=False, nullable=True),
+    sa.Column('rg', sa.String(length=20), autoincrement=False, nullable=True),
+    sa.Column('address_street', sa.String(length=255), autoincrement=False, nullable=True),
+    sa.Column('address_number', sa.String(length=20), autoincrement=False, nullable=True),
+    sa.Column('address_complement', sa.String(length=100), autoincrement=False, nullable=True),
+    sa.Column('address_neighborhood', sa.String(length=100), autoincrement=False, nullable=True),
+    sa.Column('address_city', sa.String(length=100), autoincrement=False, nullable=True),
+    sa.Column('address_state', sa.String(length=2), autoincrement=False, nullable=True),
+    sa.Column('address_zipcode', sa.String(length=10), autoincrement=False, nullable=True),
+    sa.Column('role', user_role, autoincrement=False, nullable=False),
+    sa.Column('situacao_cadastral', sa.String(length=50), autoincrement=False, nullable=True),
+    sa.Column('situacao_changed_at', sa.DateTime(timezone=True), autoincrement=False, nullable=True),
+    sa.Column('company_id', sa.Integer(), autoincrement=False, nullable=True),
+    sa.Column('notes', sa.Text(), autoincrement=False, nullable=True),
+    sa.Column('is_active', sa.Boolean(), autoincrement=False, nullable=True),
+    sa.Column('created_at', sa.DateTime(timezone=True), autoincrement=False, nullable=True),
+    sa.Column('updated_at', sa.DateTime(timezone=True), autoincrement=False, nullable=True),
+    sa.Column('archived_at', sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=False),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index('ix_persons_archive_company_id', 'persons_archive', ['company_id'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index('ix_persons_archive_company_id', table_name='persons_archive')
+    op.drop_table('persons_archive')
+    op.drop_table('companies_archive')
+    op.drop_index('ix_persons_active_role', table_name='persons')
+    op.drop_index('ix_persons_active_created_at', table_name='persons')
+    op.drop_index('ix_persons_active_company_id_created_at', table_name='persons')
+    op.drop_index('ix_companies_active_plan_type', table_name='companies')
+    op.drop_index('ix_companies_active_created_at', table_name='companies')
@@ -0,0 +1,55 @@
+"""change history
+
+Tabela append-only de alterações. No PostgreSQL é particionada por
+intervalo de changed_at, com uma partição DEFAULT; as partições mensais
+são criadas por scripts/history_partitions.py. A chave primária inclui
+changed_at, exigência do PostgreSQL para tabelas particionadas.
+
+Revision ID: 0005
+Revises: 0004
+Create Date: 2026-10-19 13:05:12.418204
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0005'
+down_revision: Union[str, None] = '0004'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    is_postgresql = op.get_context().dialect.name == 'postgresql'
+
+    columns = [
+        sa.Column('id', sa.BigInteger().with_variant(sa.Integer(), 'sqlite'), autoincrement=True, nullable=False),
+        sa.Column('entity_type', sa.String(length=20), nullable=False),
+        sa.Column('entity_id', sa.Integer(), nullable=False),
+        sa.Column('operation', sa.String(length=10), nullable=False),
+        sa.Column('changes', sa.JSON().with_variant(postgresql.JSONB(), 'postgresql'), nullable=False),
+        sa.Column('changed_at', sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=False),
+    ]
+    if is_postgresql:
+        op.create_table(
+            'change_history',
+            *columns,
+            sa.PrimaryKeyConstraint('id', 'changed_at'),
+            postgresql_partition_by='RANGE (changed_at)'
+        )
+        op.execute('CREATE TABLE change_history_default PARTITION OF change_history DEFAULT')
+    else:
+        op.create_table('change_history', *columns, sa.PrimaryKeyConstraint('id'))
+
+    op.create_index('ix_change_history_entity', 'change_history', ['entity_type', 'entity_id', 'changed_at'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index('ix_change_history_entity', table_name='change_history')
+    # Remove também as partições
+    op.drop_table('change_history')
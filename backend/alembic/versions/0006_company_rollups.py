@@ -0,0 +1,61 @@
+"""company rollups
+
+Contadores de funcionários em companies (e em companies_archive, que
+espelha as colunas), preenchidos a partir de persons.
+
+Revision ID: 0006
+Revises: 0005
+Create Date: 2026-10-19 14:02:37.551920
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0006'
+down_revision: Union[str, None] = '0005'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# coluna -> condição extra sobre persons (papéis com o nome do enum no banco)
+ROLLUPS = {
+    'employee_count': None,
+    'active_employee_count': 'p.is_active = true',
+    'admin_count': "p.is_active = true AND p.role = 'ADMIN'",
+    'corretor_count': "p.is_active = true AND p.role = 'CORRETOR'",
+    'vendedor_count': "p.is_active = true AND p.role = 'VENDEDOR'",
+    'cliente_count': "p.is_active = true AND p.role = 'CLIENTE'",
+    'gestor_count': "p.is_active = true AND p.role = 'GESTOR'",
+}
+
+
+def upgrade() -> None:
+    for column in ROLLUPS:
+        op.add_column('companies', sa.Column(column, sa.Integer(), server_default='0', nullable=False))
+        op.add_column('companies_archive', sa.Column(column, sa.Integer(), server_default='0', nullable=False))
+
+    active = sa.text('is_active = true')
+    op.create_index(
+        'ix_companies_active_employee_count', 'companies', ['active_employee_count'], unique=False,
+        postgresql_where=active, sqlite_where=active
+    )
+
+    assignments = ', '.join(
+        f"{column} = (SELECT COUNT(*) FROM persons p WHERE p.company_id = companies.id"
+        f"{' AND ' + condition if condition else ''})"
+        for column, condition in ROLLUPS.items()
+    )
+    op.execute(f'UPDATE companies SET {assignments}')
+
+
+def downgrade() -> None:
+    op.drop_index('ix_companies_active_employee_count', table_name='companies')
+    with op.batch_alter_table('companies_archive') as batch_op:
+        for column in ROLLUPS:
+            batch_op.drop_column(column)
+    with op.batch_alter_table('companies') as batch_op:
+        for column in ROLLUPS:
+            batch_op.drop_column(column)
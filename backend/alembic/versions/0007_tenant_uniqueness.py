@@ -0,0 +1,58 @@
+"""tenant uniqueness
+
+Email, CPF e CNPJ de pessoas passam a ser únicos por imobiliária
+(coluna, company_id), a mesma regra das verificações da API e da tabela
+particionada por company_id. Dados que já eram únicos globalmente
+continuam válidos.
+
+NULLS NOT DISTINCT (pessoas sem imobiliária competem entre si) requer
+PostgreSQL 15+; em versões anteriores os índices são criados sem ele.
+
+Revision ID: 0007
+Revises: 0006
+Create Date: 2026-10-20 09:14:05.271903
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0007'
+down_revision: Union[str, None] = '0006'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def _nulls_not_distinct() -> bool:
+    bind = op.get_bind()
+    return bind.dialect.name == 'postgresql' and bind.dialect.server_version_info >= (15,)
+
+
+def upgrade() -> None:
+    nulls_not_distinct = _nulls_not_distinct()
+    op.create_index(
+        'ix_persons_email_company_id', 'persons', ['email', 'company_id'], unique=True,
+        postgresql_nulls_not_distinct=nulls_not_distinct
+    )
+    for column in ('cpf', 'cnpj'):
+        not_null = sa.text(f'{column} IS NOT NULL')
+        op.create_index(
+            f'ix_persons_{column}_company_id', 'persons', [column, 'company_id'], unique=True,
+            postgresql_nulls_not_distinct=nulls_not_distinct,
+            postgresql_where=not_null, sqlite_where=not_null
+        )
+    op.drop_index('ix_persons_email', table_name='persons')
+    op.drop_index('ix_persons_cpf', table_name='persons')
+    op.drop_index('ix_persons_cnpj', table_name='persons')
+
+
+def downgrade() -> None:
+    op.create_index('ix_persons_cnpj', 'persons', ['cnpj'], unique=True)
+    op.create_index('ix_persons_cpf', 'persons', ['cpf'], unique=True)
+    op.create_index('ix_persons_email', 'persons', ['email'], unique=True)
+    op.drop_index('ix_persons_cnpj_company_id', table_name='persons')
+    op.drop_index('ix_persons_cpf_company_id', table_name='persons')
+    op.drop_index('ix_persons_email_company_id', table_name='persons')
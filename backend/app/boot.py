@@ -0,0 +1,62 @@
+"""
+Medição do tempo de inicialização
+
+O lifespan registra cada etapa (criação de tabelas, índice de autocomplete...)
+e avisa quando o total passa de STARTUP_BUDGET_SECONDS. `scripts/profile_boot.py`
+usa os mesmos registros junto com `python -X importtime` para detalhar o boot.
+"""
+import logging
+import os
+import time
+from contextlib import contextmanager
+from typing import List, Tuple
+
+logger = logging.getLogger(__name__)
+
+STARTUP_BUDGET_SECONDS = float(os.getenv("STARTUP_BUDGET_SECONDS", "10"))
+
+
+class BootProfiler:
+    """
+    Duração de cada etapa da inicialização
+    """
+
+    def __init__(self, budget: float = STARTUP_BUDGET_SECONDS):
+        self.budget = budget
+        self.phases: List[Tuple[str, float]] = []
+
+    def record(self, name: str, elapsed: float):
+        self.phases.append((name, elapsed))
+
+    @contextmanager
+    def phase(self, name: str):
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(name, time.perf_counter() - started)
+
+    @property
+    def total(self) -> float:
+        return sum(elapsed for _, elapsed in self.phases)
+
+    def within_budget(self) -> bool:
+        return self.total <= self.budget
+
+    def report(self) -> str:
+        lines = [f"  {name:<28} {elapsed * 1000:9.1f} ms" for name, elapsed in self.phases]
+        lines.append(f"  {'total':<28} {self.total * 1000:9.1f} ms (orçamento {self.budget * 1000:.0f} ms)")
+        return "\n".join(lines)
+
+    def check(self) -> bool:
+        """Avisa (com o detalhamento das etapas) quando o boot passa do orçamento"""
+        if self.within_budget():
+            return True
+        logger.warning(
+            "Inicialização em %.2fs, acima do orçamento de %.2fs:\n%s",
+            self.total, self.budget, self.report()
+        )
+        return False
+
+
+boot_profiler = BootProfiler()
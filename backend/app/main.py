@@ -1,19 +1,57 @@
-from fastapi import FastAPI
+import asyncio
+import os
+import time
+
+_import_started = time.perf_counter()
+
+from fastapi import FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse
 from contextlib import asynccontextmanager
+from sqlalchemy.exc import OperationalError
 
-from .database import engine, Base
-from .routes import persons, companies, brasilapi
+from .boot import boot_profiler
+from .database import engine, Base, SessionLocal
+from .middleware.compression import CompressionMiddleware
+from .middleware.consistency import read_your_writes_middleware
+from .middleware.deadline import deadline_middleware
+from .middleware.encoding import NegotiatedResponse, content_negotiation_middleware
+from .middleware.rate_limit import rate_limit_middleware, rate_limiter
+from .middleware.tenant import tenant_middleware
+from .routes import persons, companies, brasilapi, autocomplete
+from .services.autocomplete import autocomplete_index, rebuild_periodically
+from .services.brasilapi import BrasilAPIService
+from .services.changes import change_bus
+
+# Em produção o esquema é gerenciado pelo Alembic (`alembic upgrade head`);
+# create_all fica apenas para desenvolvimento
+DB_AUTO_CREATE = os.getenv("DB_AUTO_CREATE", "false").lower() in ("1", "true", "yes")
 
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
-    # Startup: Criar tabelas
-    print("🚀 Criando tabelas do banco de dados...")
-    Base.metadata.create_all(bind=engine)
-    print("✅ Tabelas criadas com sucesso!")
+    # Startup: Criar tabelas (apenas desenvolvimento)
+    if DB_AUTO_CREATE:
+        print("🚀 Criando tabelas do banco de dados...")
+        with boot_profiler.phase("create_all"):
+            Base.metadata.create_all(bind=engine)
+        print("✅ Tabelas criadas com sucesso!")
+    # Alterações dos demais workers (invalidação dos caches por processo);
+    # assinado antes de montar o índice para não perder escritas nesse meio-tempo
+    with boot_profiler.phase("change_bus"):
+        await change_bus.start()
+    # Índice de autocomplete em memória
+    with boot_profiler.phase("autocomplete_index"):
+        with SessionLocal() as db:
+            autocomplete_index.build(db)
+    print(f"🔎 Índice de autocomplete com {len(autocomplete_index)} registros")
+    rebuild_task = asyncio.create_task(rebuild_periodically())
+    boot_profiler.check()
+    print(f"⏱️  Inicialização em {boot_profiler.total:.2f}s")
     yield
     # Shutdown
+    rebuild_task.cancel()
+    await change_bus.stop()
     print("👋 Encerrando aplicação...")
 
 
@@ -22,22 +60,63 @@ app = FastAPI(
     title="CRM Imobiliário API",
     description="API REST para sistema de CRM imobiliário com cadastro de pessoas e imobiliárias",
     version="1.0.0",
-    lifespan=lifespan
+    lifespan=lifespan,
+    default_response_class=NegotiatedResponse
 )
 
-# Configurar CORS para Flutter Web
+# Prazo por requisição (propagado para BrasilAPI e statement_timeout)
+app.middleware("http")(deadline_middleware)
+
+# Escopo de tenant (X-Company-Id) aplicado às consultas de pessoas
+app.middleware("http")(tenant_middleware)
+
+# Leituras logo após uma escrita do mesmo cliente vão para o primário
+app.middleware("http")(read_your_writes_middleware)
+
+# JSON ou MessagePack (Accept: application/msgpack)
+app.middleware("http")(content_negotiation_middleware)
+
+# Limite de requisições por cliente (429). O descarte de carga quando a fila
+# do pool do banco cresce (503) fica nas dependências de sessão (database.py)
+app.middleware("http")(rate_limit_middleware)
+
+# Configurar CORS para Flutter Web. Registrado depois dos demais (mais externo):
+# respostas 429/400 geradas pelos middlewares acima também recebem os
+# headers CORS, e o preflight (OPTIONS) é respondido antes deles
 app.add_middleware(
     CORSMiddleware,
     allow_origins=["*"],  # Em produção, especificar domínios
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["Retry-After", "X-RateLimit-Limit", "X-RateLimit-Remaining", "X-Last-Write"],
 )
 
+# gzip/brotli negociado por Accept-Encoding; o mais externo, comprime a resposta final
+app.add_middleware(CompressionMiddleware)
+
+
+@app.exception_handler(OperationalError)
+async def database_error_handler(request: Request, exc: OperationalError):
+    # 57014 = query_canceled (statement_timeout atingido)
+    if getattr(exc.orig, "pgcode", None) == "57014":
+        return JSONResponse(
+            status_code=504,
+            content={"detail": "Tempo limite da consulta ao banco de dados excedido."}
+        )
+    return JSONResponse(
+        status_code=503,
+        content={"detail": "Banco de dados indisponível. Tente novamente."}
+    )
+
+
 # Incluir rotas
 app.include_router(persons.router)
 app.include_router(companies.router)
 app.include_router(brasilapi.router)
+app.include_router(autocomplete.router)
+
+boot_profiler.record("import", time.perf_counter() - _import_started)
 
 
 @app.get("/")
@@ -61,5 +140,8 @@ def health_check():
     """
     return {
         "status": "healthy",
-        "database": "connected"
+        "database": "connected",
+        "brasilapi": BrasilAPIService.breaker.state.value,
+        "rate_limit": rate_limiter.backend,
+        "change_bus": change_bus.state
     }
@@ -0,0 +1,163 @@
+"""
+Compressão das respostas negociada por Accept-Encoding
+
+Brotli (quando o pacote `brotli` está instalado) ou gzip, apenas para
+tipos de conteúdo compressíveis e corpos a partir de COMPRESSION_MIN_SIZE
+bytes. Respostas em streaming são comprimidas pedaço a pedaço, com flush a
+cada pedaço, para que o cliente receba os dados conforme são gerados.
+"""
+import os
+import zlib
+from typing import Optional
+
+from starlette.datastructures import Headers, MutableHeaders
+
+try:
+    import brotli
+except ImportError:  # opcional: sem brotli, apenas gzip
+    brotli = None
+
+COMPRESSION_MIN_SIZE = int(os.getenv("COMPRESSION_MIN_SIZE", "1024"))
+GZIP_LEVEL = int(os.getenv("COMPRESSION_GZIP_LEVEL", "6"))
+BROTLI_QUALITY = int(os.getenv("COMPRESSION_BROTLI_QUALITY", "4"))
+
+_COMPRESSIBLE = ("text/", "application/json", "application/msgpack", "application/javascript", "application/xml")
+
+
+def negotiate(accept_encoding: str) -> Optional[str]:
+    """Codificação preferida entre as suportadas: "br", "gzip" ou None"""
+    accepted = {}
+    for part in accept_encoding.split(","):
+        name, _, params = part.strip().partition(";")
+        quality = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                quality = float(params[2:])
+            except ValueError:
+                quality = 0.0
+        if name:
+            accepted[name.strip().lower()] = quality
+
+    supported = ["br", "gzip"] if brotli is not None else ["gzip"]
+    candidates = [
+        (accepted.get(name, accepted.get("*", 0.0)), -i, name)
+        for i, name in enumerate(supported)
+    ]
+    quality, _, name = max(candidates)
+    return name if quality > 0 else None
+
+
+class _Encoder:
+    def __init__(self, encoding: str, gzip_level: int, brotli_quality: int):
+        self.encoding = encoding
+        if encoding == "br":
+            self._compressor = brotli.Compressor(quality=brotli_quality)
+        else:
+            # wbits 16 + MAX_WBITS = formato gzip
+            self._compressor = zlib.compressobj(gzip_level, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+
+    def chunk(self, data: bytes) -> bytes:
+        """Comprime e descarrega um pedaço de um corpo em streaming"""
+        if self.encoding == "br":
+            return self._compressor.process(data) + self._compressor.flush()
+        return self._compressor.compress(data) + self._compressor.flush(zlib.Z_SYNC_FLUSH)
+
+    def finish(self, data: bytes = b"") -> bytes:
+        if self.encoding == "br":
+            return self._compressor.process(data) + self._compressor.finish()
+        return self._compressor.compress(data) + self._compressor.flush()
+
+
+class CompressionMiddleware:
+    """
+    Middleware ASGI de compressão (gzip/brotli)
+    """
+
+    def __init__(
+        self,
+        app,
+        minimum_size: int = COMPRESSION_MIN_SIZE,
+        gzip_level: int = GZIP_LEVEL,
+        brotli_quality: int = BROTLI_QUALITY
+    ):
+        self.app = app
+        self.minimum_size = minimum_size
+        self.gzip_level = gzip_level
+        self.brotli_quality = brotli_quality
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        encoding = negotiate(Headers(scope=scope).get("accept-encoding", ""))
+        if encoding is None:
+            await self.app(scope, receive, send)
+            return
+
+        start_message = None
+        encoder = None
+        passthrough = False
+        # Pedaços iniciais retidos até saber se o corpo atinge o tamanho mínimo
+        # (respostas que passam por middlewares "http" chegam sempre em pedaços)
+        pending = []
+        pending_size = 0
+
+        async def send_compressed(message):
+            nonlocal start_message, encoder, passthrough, pending_size
+
+            if message["type"] == "http.response.start":
+                # Os headers só são enviados após o primeiro pedaço do corpo
+                start_message = message
+                headers = Headers(raw=message["headers"])
+                content_type = headers.get("content-type", "")
+                passthrough = (
+                    "content-encoding" in headers
+                    or not content_type.startswith(_COMPRESSIBLE)
+                )
+                if passthrough:
+                    await send(message)
+                return
+
+            if passthrough or message["type"] != "http.response.body":
+                await send(message)
+                return
+
+            body = message.get("body", b"")
+            more_body = message.get("more_body", False)
+
+            if encoder is None:
+                pending.append(body)
+                pending_size += len(body)
+                if more_body and pending_size < self.minimum_size:
+                    return
+                body = b"".join(pending)
+                pending.clear()
+
+                if not more_body and len(body) < self.minimum_size:
+                    passthrough = True
+                    await send(start_message)
+                    await send({"type": "http.response.body", "body": body})
+                    return
+
+                encoder = _Encoder(encoding, self.gzip_level, self.brotli_quality)
+                headers = MutableHeaders(raw=start_message["headers"])
+                headers["Content-Encoding"] = encoding
+                headers.add_vary_header("Accept-Encoding")
+                if not more_body:
+                    body = encoder.finish(body)
+                    headers["Content-Length"] = str(len(body))
+                    await send(start_message)
+                    await send({"type": "http.response.body", "body": body})
+                    return
+                # Tamanho final desconhecido: transfer-encoding chunked
+                if "content-length" in headers:
+                    del headers["Content-Length"]
+                await send(start_message)
+
+            if more_body:
+                await send({"type": "http.response.body", "body": encoder.chunk(body), "more_body": True})
+            else:
+                await send({"type": "http.response.body", "body": encoder.finish(body)})
+
+        await self.app(scope, receive, send_compressed)
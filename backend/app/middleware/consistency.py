@@ -0,0 +1,66 @@
+"""
+Leitura das próprias escritas (read-your-writes) com réplicas de leitura
+
+Após uma escrita bem-sucedida, a resposta traz o instante da escrita no
+header `X-Last-Write` e no cookie `crm_last_write`. Enquanto o valor recebido
+de volta (header, ou cookie nos navegadores) estiver dentro de
+READ_YOUR_WRITES_SECONDS, as leituras do cliente vão para o primário. Clientes
+que não guardam cookies (apps Flutter) reenviam o header `X-Last-Write` da
+última escrita. O cliente também pode pedir leitura consistente explicitamente
+com o header `X-Read-Consistency: strong`.
+
+O valor vem do cliente e não é assinado: só é aceito se for um instante
+finito que já passou, e a janela nunca passa do atraso máximo tolerado das
+réplicas (REPLICA_MAX_LAG_SECONDS) mais uma margem. Assim um valor forjado
+não prende as leituras no primário além do que uma escrita real prenderia.
+"""
+import math
+import os
+import time
+
+from fastapi import Request
+
+READ_YOUR_WRITES_SECONDS = float(os.getenv("READ_YOUR_WRITES_SECONDS", "5"))
+# Mesma variável de database.py (importá-la de lá criaria um ciclo)
+REPLICA_MAX_LAG_SECONDS = float(os.getenv("REPLICA_MAX_LAG_SECONDS", "5"))
+READ_YOUR_WRITES_MARGIN_SECONDS = float(os.getenv("READ_YOUR_WRITES_MARGIN_SECONDS", "1"))
+# Réplicas acima de REPLICA_MAX_LAG_SECONDS deixam de ser usadas, então a janela
+# não precisa ir além disso
+READ_YOUR_WRITES_WINDOW = min(READ_YOUR_WRITES_SECONDS, REPLICA_MAX_LAG_SECONDS + READ_YOUR_WRITES_MARGIN_SECONDS)
+
+LAST_WRITE_COOKIE = "crm_last_write"
+LAST_WRITE_HEADER = "x-last-write"
+CONSISTENCY_HEADER = "x-read-consistency"
+
+_WRITE_METHODS = {"POST", "PUT", "PATCH", "DELETE"}
+
+
+def requires_primary(request: Request) -> bool:
+    if request.headers.get(CONSISTENCY_HEADER, "").lower() == "strong":
+        return True
+    last_write = request.headers.get(LAST_WRITE_HEADER) or request.cookies.get(LAST_WRITE_COOKIE)
+    if not last_write:
+        return False
+    try:
+        written_at = float(last_write)
+    except ValueError:
+        return False
+    now = time.time()
+    if not math.isfinite(written_at) or written_at > now:
+        return False
+    return now - written_at < READ_YOUR_WRITES_WINDOW
+
+
+async def read_your_writes_middleware(request: Request, call_next):
+    response = await call_next(request)
+    if request.method in _WRITE_METHODS and response.status_code < 400:
+        last_write = f"{time.time():.3f}"
+        response.headers["X-Last-Write"] = last_write
+        response.set_cookie(
+            LAST_WRITE_COOKIE,
+            last_write,
+            max_age=max(1, math.ceil(READ_YOUR_WRITES_WINDOW)),
+            httponly=True,
+            samesite="lax"
+        )
+    return response
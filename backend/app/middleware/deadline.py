@@ -0,0 +1,49 @@
+"""
+Prazo (deadline) por requisição
+
+O prazo é definido na entrada da requisição e propagado via contextvar para
+as chamadas externas (timeout do httpx) e para o banco (statement_timeout).
+O cliente pode pedir um prazo menor pelo header `X-Request-Timeout` (segundos).
+"""
+import os
+import time
+from contextvars import ContextVar
+from typing import Optional
+
+from fastapi import Request
+
+REQUEST_TIMEOUT = float(os.getenv("REQUEST_TIMEOUT_SECONDS", "15"))
+
+_deadline: ContextVar[Optional[float]] = ContextVar("request_deadline", default=None)
+
+
+def remaining() -> Optional[float]:
+    """Segundos restantes até o prazo da requisição atual (None fora de requisição)"""
+    deadline = _deadline.get()
+    if deadline is None:
+        return None
+    return deadline - time.monotonic()
+
+
+def timeout_for(limit: float) -> float:
+    """Menor valor entre `limit` e o tempo restante da requisição"""
+    left = remaining()
+    if left is None:
+        return limit
+    return max(0.0, min(limit, left))
+
+
+async def deadline_middleware(request: Request, call_next):
+    timeout = REQUEST_TIMEOUT
+    header = request.headers.get("x-request-timeout")
+    if header:
+        try:
+            timeout = min(REQUEST_TIMEOUT, max(0.1, float(header)))
+        except ValueError:
+            pass
+
+    token = _deadline.set(time.monotonic() + timeout)
+    try:
+        return await call_next(request)
+    finally:
+        _deadline.reset(token)
@@ -0,0 +1,58 @@
+"""
+Respostas em MessagePack negociadas por Accept
+
+Com `Accept: application/msgpack` (e o pacote `msgpack` instalado), as
+respostas das rotas saem em MessagePack em vez de JSON. O conteúdo é o
+mesmo: o FastAPI já entrega à classe de resposta os dados convertidos
+para tipos JSON (datas como string, enums pelo valor).
+"""
+from contextvars import ContextVar
+from typing import Any
+
+from fastapi import Request
+from fastapi.responses import JSONResponse
+
+try:
+    import msgpack
+except ImportError:  # opcional: sem msgpack, sempre JSON
+    msgpack = None
+
+MSGPACK_MEDIA_TYPE = "application/msgpack"
+
+_wants_msgpack: ContextVar[bool] = ContextVar("wants_msgpack", default=False)
+
+
+def _accepts_msgpack(accept: str) -> bool:
+    for part in accept.split(","):
+        media_type, _, params = part.strip().partition(";")
+        if media_type.strip().lower() in (MSGPACK_MEDIA_TYPE, "application/x-msgpack"):
+            return params.strip() not in ("q=0", "q=0.0")
+    return False
+
+
+async def content_negotiation_middleware(request: Request, call_next):
+    if msgpack is None:
+        return await call_next(request)
+    token = _wants_msgpack.set(_accepts_msgpack(request.headers.get("accept", "")))
+    try:
+        response = await call_next(request)
+    finally:
+        _wants_msgpack.reset(token)
+    response.headers.append("Vary", "Accept")
+    return response
+
+
+class NegotiatedResponse(JSONResponse):
+    """
+    Resposta padrão da aplicação: JSON, ou MessagePack quando o cliente pede
+    """
+
+    def __init__(self, content: Any, *args, **kwargs):
+        if _wants_msgpack.get():
+            self.media_type = MSGPACK_MEDIA_TYPE
+        super().__init__(content, *args, **kwargs)
+
+    def render(self, content: Any) -> bytes:
+        if self.media_type == MSGPACK_MEDIA_TYPE:
+            return msgpack.packb(content, use_bin_type=True)
+        return super().render(content)
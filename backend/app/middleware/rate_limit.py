@@ -0,0 +1,106 @@
+"""
+Controle de admissão: limite de requisições por cliente
+
+Cada cliente (header `X-API-Key` ou, sem ele, o IP) tem um token bucket por
+regra; a primeira regra que casa com a requisição vale. Acima do limite, 429
+com `Retry-After`. O descarte de carga por fila do pool do banco (503) fica
+nas dependências de sessão (`database.py`).
+
+Limites no formato "requisições/segundos", ex.: RATE_LIMIT_DEFAULT=300/60.
+"""
+import hashlib
+import math
+import os
+from typing import Optional, Tuple
+
+from fastapi import Request
+from fastapi.responses import JSONResponse
+
+from ..services.rate_limiter import RateLimiter
+
+RATE_LIMIT_ENABLED = os.getenv("RATE_LIMIT_ENABLED", "true").lower() in ("1", "true", "yes")
+# Atrás de um proxy reverso confiável, o IP do cliente vem de X-Forwarded-For
+RATE_LIMIT_TRUST_FORWARDED = os.getenv("RATE_LIMIT_TRUST_FORWARDED", "false").lower() in ("1", "true", "yes")
+
+API_KEY_HEADER = "x-api-key"
+
+# Rotas fora do controle de admissão
+_EXEMPT_PATHS = ("/health", "/docs", "/redoc", "/openapi.json")
+
+
+def _exempt(request: Request) -> bool:
+    # Preflight CORS não consome cota nem é descartado
+    return request.method == "OPTIONS" or request.url.path.startswith(_EXEMPT_PATHS)
+
+
+def _parse_limit(value: str) -> Tuple[int, float]:
+    requests, _, seconds = value.partition("/")
+    return int(requests), float(seconds or 60)
+
+
+class RateLimitRule:
+    """
+    Limite para as requisições cujo caminho começa com `prefix`
+    (opcionalmente apenas com um parâmetro de query presente)
+    """
+
+    def __init__(self, name: str, prefix: str, limit: str, query_param: Optional[str] = None):
+        self.name = name
+        self.prefix = prefix
+        self.limit, self.window = _parse_limit(limit)
+        self.query_param = query_param
+
+    def matches(self, request: Request) -> bool:
+        if not request.url.path.startswith(self.prefix):
+            return False
+        return self.query_param is None or bool(request.query_params.get(self.query_param))
+
+
+RATE_LIMIT_RULES = [
+    # Cada chamada consome a cota da BrasilAPI
+    RateLimitRule("brasilapi", "/api/brasilapi/", os.getenv("RATE_LIMIT_BRASILAPI", "20/60")),
+    # Busca textual (ILIKE) é a listagem mais cara
+    RateLimitRule("persons-search", "/api/persons", os.getenv("RATE_LIMIT_SEARCH", "60/60"), query_param="search"),
+    RateLimitRule("companies-search", "/api/companies", os.getenv("RATE_LIMIT_SEARCH", "60/60"), query_param="search"),
+    # Uma chamada por tecla digitada
+    RateLimitRule("autocomplete", "/api/autocomplete", os.getenv("RATE_LIMIT_AUTOCOMPLETE", "600/60")),
+    RateLimitRule("default", "/", os.getenv("RATE_LIMIT_DEFAULT", "300/60")),
+]
+
+rate_limiter = RateLimiter()
+
+
+def client_key(request: Request) -> str:
+    """Identificação do cliente: hash da API key ou o IP"""
+    api_key = request.headers.get(API_KEY_HEADER)
+    if api_key:
+        return "key:" + hashlib.sha256(api_key.encode()).hexdigest()[:16]
+    if RATE_LIMIT_TRUST_FORWARDED:
+        forwarded = request.headers.get("x-forwarded-for")
+        if forwarded:
+            return "ip:" + forwarded.split(",")[0].strip()
+    return "ip:" + (request.client.host if request.client else "unknown")
+
+
+async def rate_limit_middleware(request: Request, call_next):
+    if not RATE_LIMIT_ENABLED or _exempt(request):
+        return await call_next(request)
+
+    rule = next(rule for rule in RATE_LIMIT_RULES if rule.matches(request))
+    result = await rate_limiter.hit(f"{rule.name}:{client_key(request)}", rule.limit, rule.window)
+    headers = {
+        "X-RateLimit-Limit": str(rule.limit),
+        "X-RateLimit-Remaining": str(result.remaining),
+    }
+    if not result.allowed:
+        headers["Retry-After"] = str(max(1, math.ceil(result.retry_after)))
+        return JSONResponse(
+            status_code=429,
+            content={"detail": "Limite de requisições excedido. Tente novamente em instantes."},
+            headers=headers
+        )
+
+    response = await call_next(request)
+    response.headers.update(headers)
+    return response
+
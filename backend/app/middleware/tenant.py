@@ -0,0 +1,70 @@
+"""
+Contexto de tenant (imobiliária) por requisição
+
+A imobiliária do usuário vem do header `X-Company-Id`. Quando presente, toda
+consulta ORM sobre `Person` na requisição recebe automaticamente o filtro
+`company_id = <tenant>`, o que permite ao PostgreSQL podar as partições de
+`persons` (ver `services/partitioning.py`) e usar o índice
+(company_id, created_at).
+
+Consultas que precisam enxergar todos os tenants (ex.: unicidade na
+imobiliária de destino) usam `.execution_options(skip_tenant_filter=True)`.
+
+Limite de confiança: o header não é autenticado. Qualquer cliente pode
+escolher a imobiliária e, sem o header, enxerga todas. O escopo aqui é um
+filtro de conveniência e de desempenho, não isolamento entre clientes: em
+produção a API deve ficar atrás de um gateway autenticado que remove o
+X-Company-Id recebido do cliente e o define a partir do usuário logado.
+"""
+from contextvars import ContextVar
+from typing import Optional
+
+from fastapi import Request
+from fastapi.responses import JSONResponse
+from sqlalchemy import event
+from sqlalchemy.orm import Session, with_loader_criteria
+
+from ..models.models import Person, PersonArchive
+
+TENANT_HEADER = "x-company-id"
+
+_tenant_id: ContextVar[Optional[int]] = ContextVar("tenant_id", default=None)
+
+
+def current_tenant() -> Optional[int]:
+    """ID da imobiliária da requisição atual (None = sem escopo)"""
+    return _tenant_id.get()
+
+
+async def tenant_middleware(request: Request, call_next):
+    header = request.headers.get(TENANT_HEADER)
+    tenant_id = None
+    if header:
+        try:
+            tenant_id = int(header)
+        except ValueError:
+            return JSONResponse(status_code=400, content={"detail": "X-Company-Id inválido"})
+
+    token = _tenant_id.set(tenant_id)
+    try:
+        return await call_next(request)
+    finally:
+        _tenant_id.reset(token)
+
+
+@event.listens_for(Session, "do_orm_execute")
+def _scope_to_tenant(orm_execute_state):
+    tenant_id = _tenant_id.get()
+    if tenant_id is None:
+        return
+    if orm_execute_state.is_column_load or orm_execute_state.is_relationship_load:
+        return
+    if orm_execute_state.execution_options.get("skip_tenant_filter"):
+        return
+    if not (orm_execute_state.is_select or orm_execute_state.is_update or orm_execute_state.is_delete):
+        return
+
+    orm_execute_state.statement = orm_execute_state.statement.options(
+        with_loader_criteria(Person, lambda cls: cls.company_id == tenant_id, include_aliases=True),
+        with_loader_criteria(PersonArchive, lambda cls: cls.company_id == tenant_id, include_aliases=True)
+    )
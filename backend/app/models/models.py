@@ -1,4 +1,5 @@
-from sqlalchemy import Column, Integer, String, DateTime, Boolean, ForeignKey, Enum, Text, Numeric
+from sqlalchemy import Column, Integer, BigInteger, String, DateTime, Boolean, ForeignKey, Enum, Text, Numeric, Index, Table, JSON, text
+from sqlalchemy.dialects import postgresql
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 from datetime import datetime
@@ -28,6 +29,27 @@ class Person(Base):
     Armazena clientes, corretores, vendedores, etc.
     """
     __tablename__ = "persons"
+    __table_args__ = (
+        # Listagem por imobiliária (tenant), mais recentes primeiro
+        Index("ix_persons_company_id_created_at", "company_id", "created_at"),
+        # Unicidade por imobiliária (a mesma regra de routes/persons.py e da
+        # tabela particionada, onde índices únicos incluem company_id). Sem
+        # imobiliária (company_id nulo) os registros competem entre si.
+        Index(
+            "ix_persons_email_company_id", "email", "company_id", unique=True,
+            postgresql_nulls_not_distinct=True
+        ),
+        Index(
+            "ix_persons_cpf_company_id", "cpf", "company_id", unique=True,
+            postgresql_nulls_not_distinct=True,
+            postgresql_where=text("cpf IS NOT NULL"), sqlite_where=text("cpf IS NOT NULL")
+        ),
+        Index(
+            "ix_persons_cnpj_company_id", "cnpj", "company_id", unique=True,
+            postgresql_nulls_not_distinct=True,
+            postgresql_where=text("cnpj IS NOT NULL"), sqlite_where=text("cnpj IS NOT NULL")
+        ),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     
@@ -36,13 +58,13 @@ class Person(Base):
     
     # Dados básicos
     name = Column(String(255), nullable=False, index=True)
-    email = Column(String(255), unique=True, nullable=False, index=True)
+    email = Column(String(255), nullable=False)
     phone = Column(String(20), nullable=True)
     mobile = Column(String(20), nullable=True)
     
     # Documentos
-    cpf = Column(String(14), unique=True, nullable=True, index=True)  # Para PF
-    cnpj = Column(String(18), unique=True, nullable=True, index=True)  # Para PJ
+    cpf = Column(String(14), nullable=True)  # Para PF
+    cnpj = Column(String(18), nullable=True)  # Para PJ
     rg = Column(String(20), nullable=True)
     
     # Endereço
@@ -57,6 +79,10 @@ class Person(Base):
     # Papel no sistema
     role = Column(Enum(UserRole), nullable=False, default=UserRole.CLIENTE)
     
+    # Situação cadastral na Receita Federal (apenas PJ, revalidada periodicamente)
+    situacao_cadastral = Column(String(50), nullable=True)
+    situacao_changed_at = Column(DateTime(timezone=True), nullable=True)
+    
     # Relacionamento com imobiliária (se for corretor/vendedor)
     company_id = Column(Integer, ForeignKey("companies.id"), nullable=True)
     company = relationship("Company", back_populates="employees")
@@ -75,6 +101,22 @@ class Person(Base):
         return f"<Person {self.name} ({self.person_type})>"
 
 
+# Índices parciais: as listagens e buscas atendem quase sempre registros ativos,
+# então os índices cobrem só a fração quente da tabela
+Index(
+    "ix_persons_active_created_at", Person.created_at,
+    postgresql_where=Person.is_active == True, sqlite_where=Person.is_active == True
+)
+Index(
+    "ix_persons_active_company_id_created_at", Person.company_id, Person.created_at,
+    postgresql_where=Person.is_active == True, sqlite_where=Person.is_active == True
+)
+Index(
+    "ix_persons_active_role", Person.role,
+    postgresql_where=Person.is_active == True, sqlite_where=Person.is_active == True
+)
+
+
 class Company(Base):
     """
     Modelo de Imobiliária
@@ -89,6 +131,10 @@ class Company(Base):
     trade_name = Column(String(255), nullable=False, index=True)  # Nome Fantasia
     cnpj = Column(String(18), unique=True, nullable=False, index=True)
     
+    # Situação cadastral na Receita Federal (revalidada periodicamente)
+    situacao_cadastral = Column(String(50), nullable=True)
+    situacao_changed_at = Column(DateTime(timezone=True), nullable=True)
+    
     # Contato
     email = Column(String(255), nullable=False)
     phone = Column(String(20), nullable=True)
@@ -115,6 +161,16 @@ class Company(Base):
     # Relacionamentos
     employees = relationship("Person", back_populates="company")
     
+    # Contadores de funcionários, mantidos a cada escrita em pessoas (services/rollups.py)
+    employee_count = Column(Integer, nullable=False, default=0, server_default="0")
+    active_employee_count = Column(Integer, nullable=False, default=0, server_default="0")
+    # Funcionários ativos por papel
+    admin_count = Column(Integer, nullable=False, default=0, server_default="0")
+    corretor_count = Column(Integer, nullable=False, default=0, server_default="0")
+    vendedor_count = Column(Integer, nullable=False, default=0, server_default="0")
+    cliente_count = Column(Integer, nullable=False, default=0, server_default="0")
+    gestor_count = Column(Integer, nullable=False, default=0, server_default="0")
+    
     # Observações
     notes = Column(Text, nullable=True)
     
@@ -125,5 +181,124 @@ class Company(Base):
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     updated_at = Column(DateTime(timezone=True), onupdate=func.now())
     
+    @property
+    def employees_by_role(self):
+        """Funcionários ativos por papel"""
+        return {role.value: getattr(self, f"{role.value}_count") or 0 for role in UserRole}
+    
     def __repr__(self):
         return f"<Company {self.trade_name}>"
+
+
+Index(
+    "ix_companies_active_created_at", Company.created_at,
+    postgresql_where=Company.is_active == True, sqlite_where=Company.is_active == True
+)
+Index(
+    "ix_companies_active_plan_type", Company.plan_type,
+    postgresql_where=Company.is_active == True, sqlite_where=Company.is_active == True
+)
+# Listagem ordenada/filtrada por tamanho da equipe
+Index(
+    "ix_companies_active_employee_count", Company.active_employee_count,
+    postgresql_where=Company.is_active == True, sqlite_where=Company.is_active == True
+)
+
+
+def _archive_table(source: Table, name: str) -> Table:
+    """
+    Tabela de arquivo com as mesmas colunas de `source`, sem restrições de
+    unicidade nem chaves estrangeiras, mais a data de arquivamento
+    """
+    columns = [
+        Column(
+            column.name,
+            column.type,
+            primary_key=column.primary_key,
+            autoincrement=False,
+            nullable=column.nullable
+        )
+        for column in source.columns
+    ]
+    columns.append(Column("archived_at", DateTime(timezone=True), server_default=func.now(), nullable=False))
+    return Table(name, Base.metadata, *columns)
+
+
+class PersonArchive(Base):
+    """
+    Pessoas inativas há muito tempo, movidas para fora da tabela quente
+    """
+    __table__ = _archive_table(Person.__table__, "persons_archive")
+
+    def __repr__(self):
+        return f"<PersonArchive {self.name}>"
+
+
+Index("ix_persons_archive_company_id", PersonArchive.company_id)
+
+
+class CompanyArchive(Base):
+    """
+    Imobiliárias inativas há muito tempo, movidas para fora da tabela quente
+    """
+    __table__ = _archive_table(Company.__table__, "companies_archive")
+
+    def __repr__(self):
+        return f"<CompanyArchive {self.trade_name}>"
+
+
+class CNPJSweepState(Base):
+    """
+    Progresso da revalidação periódica de CNPJs
+    Uma linha por tabela varrida, permitindo retomar a varredura após reinício
+    """
+    __tablename__ = "cnpj_sweep_state"
+
+    entity = Column(String(50), primary_key=True)  # companies, persons
+    
+    # Último ID processado na varredura corrente
+    last_id = Column(Integer, nullable=False, default=0)
+    
+    # Janela da varredura
+    sweep_started_at = Column(DateTime(timezone=True), nullable=True)
+    sweep_finished_at = Column(DateTime(timezone=True), nullable=True)
+    
+    # Contadores da varredura corrente
+    rows_checked = Column(Integer, nullable=False, default=0)
+    rows_changed = Column(Integer, nullable=False, default=0)
+    
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
+    
+    def __repr__(self):
+        return f"<CNPJSweepState {self.entity} last_id={self.last_id}>"
+
+
+class ChangeHistory(Base):
+    """
+    Histórico append-only de alterações em pessoas e imobiliárias
+    Uma linha por escrita, apenas com os campos alterados: {campo: [antes, depois]}
+    
+    Em produção a tabela é particionada por intervalo de `changed_at`
+    (migração 0005 e scripts/history_partitions.py); o create_all de
+    desenvolvimento cria uma tabela simples com as mesmas colunas.
+    """
+    __tablename__ = "change_history"
+    __table_args__ = (
+        # Linha do tempo de um registro
+        Index("ix_change_history_entity", "entity_type", "entity_id", "changed_at"),
+    )
+
+    id = Column(BigInteger().with_variant(Integer, "sqlite"), primary_key=True)
+    
+    # person, company
+    entity_type = Column(String(20), nullable=False)
+    entity_id = Column(Integer, nullable=False)
+    
+    # create, update
+    operation = Column(String(10), nullable=False)
+    changes = Column(JSON().with_variant(postgresql.JSONB(), "postgresql"), nullable=False)
+    
+    changed_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
+    
+    def __repr__(self):
+        return f"<ChangeHistory {self.entity_type}:{self.entity_id} {self.operation}>"
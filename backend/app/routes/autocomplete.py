@@ -0,0 +1,31 @@
+"""
+Rotas de autocomplete (servidas do índice em memória, sem consultar o banco)
+"""
+from fastapi import APIRouter, Query
+from typing import List, Optional
+
+from ..middleware.tenant import current_tenant
+from ..schemas.schemas import AutocompleteItem
+from ..services.autocomplete import autocomplete_index
+
+router = APIRouter(prefix="/api/autocomplete", tags=["Autocomplete"])
+
+
+@router.get("/", response_model=List[AutocompleteItem])
+def autocomplete(
+    q: str = Query(..., min_length=1, max_length=100),
+    kind: Optional[str] = Query(None, pattern="^(person|company)$"),
+    limit: int = Query(10, ge=1, le=50)
+):
+    """
+    Sugestões de pessoas e imobiliárias por prefixo
+    
+    Busca por início de palavra do nome (sem diferenciar acentos/maiúsculas)
+    ou pelos dígitos do CPF/CNPJ. Com o header X-Company-Id, sugere apenas
+    pessoas da imobiliária.
+    """
+    entries = autocomplete_index.search(q, limit=limit, kind=kind, company_id=current_tenant())
+    return [
+        AutocompleteItem(kind=entry.kind, id=entry.id, label=entry.label, document=entry.document)
+        for entry in entries
+    ]
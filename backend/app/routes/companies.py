@@ -1,13 +1,26 @@
-from fastapi import APIRouter, Depends, HTTPException, Query
+from datetime import datetime
+from fastapi import APIRouter, Depends, HTTPException, Query, Request
 from sqlalchemy.orm import Session
-from typing import List, Optional
+from typing import List, Optional, Union
 
-from ..database import get_db
-from ..models.models import Company, Person
-from ..schemas.schemas import CompanyCreate, CompanyUpdate, CompanyResponse
+from ..database import get_db, get_read_db
+from ..middleware.consistency import requires_primary
+from ..models.models import Company, CompanyArchive, Person
+from ..services.autocomplete import autocomplete_index
+from ..services.counting import CountService
+from ..services.facets import FacetService, facet_cache
+from ..services import fieldsets
+from ..services.history import HistoryService
+from ..services.identity_cache import identity_cache
+from ..schemas.schemas import (
+    CompanyCreate, CompanyUpdate, CompanyResponse, CompanyListResponse, ChangeHistoryResponse
+)
 
 router = APIRouter(prefix="/api/companies", tags=["Companies"])
 
+# Colunas com contagens na listagem (facets=true)
+FACET_FIELDS = ("plan_type", "address_state", "address_city", "is_active")
+
 
 @router.post("/", response_model=CompanyResponse, status_code=201)
 def create_company(company: CompanyCreate, db: Session = Depends(get_db)):
@@ -29,58 +42,198 @@ def create_company(company: CompanyCreate, db: Session = Depends(get_db)):
     db.add(db_company)
     db.commit()
     db.refresh(db_company)
+    autocomplete_index.sync_company(db_company)
+    facet_cache.clear()
     
     return db_company
 
 
-@router.get("/", response_model=List[CompanyResponse])
+def _filter_conditions(model, is_active=None, plan_type=None, search=None, min_employees=None, max_employees=None):
+    """
+    Condições dos filtros de listagem sobre `model` (Company ou CompanyArchive)
+    """
+    conditions = []
+    if is_active is not None:
+        conditions.append(model.is_active == is_active)
+    if plan_type:
+        conditions.append(model.plan_type == plan_type)
+    if min_employees is not None:
+        conditions.append(model.active_employee_count >= min_employees)
+    if max_employees is not None:
+        conditions.append(model.active_employee_count <= max_employees)
+    if search:
+        search_filter = f"%{search}%"
+        conditions.append(
+            (model.company_name.ilike(search_filter)) |
+            (model.trade_name.ilike(search_filter)) |
+            (model.cnpj.ilike(search_filter)) |
+            (model.email.ilike(search_filter))
+        )
+    return conditions
+
+
+def _apply_filters(query, model, **filters):
+    return query.filter(*_filter_conditions(model, **filters))
+
+
+def _columns(model, names=None):
+    names = names or [column.name for column in Company.__table__.columns]
+    return fieldsets.columns(model, names)
+
+
+@router.get("/", response_model=Union[List[CompanyResponse], CompanyListResponse])
 def list_companies(
     skip: int = Query(0, ge=0),
     limit: int = Query(100, ge=1, le=1000),
     is_active: Optional[bool] = None,
     plan_type: Optional[str] = None,
     search: Optional[str] = None,
-    db: Session = Depends(get_db)
+    min_employees: Optional[int] = Query(None, ge=0),
+    max_employees: Optional[int] = Query(None, ge=0),
+    sort_by: str = Query("created_at", pattern="^(created_at|employee_count|active_employee_count)$"),
+    order: str = Query("desc", pattern="^(asc|desc)$"),
+    include_archived: bool = False,
+    paginated: bool = False,
+    exact: bool = False,
+    facets: bool = False,
+    fields: Optional[str] = Query(None, description="Campos da resposta, separados por vírgula (ex.: trade_name,cnpj)"),
+    db: Session = Depends(get_read_db)
 ):
     """
     Listar imobiliárias com filtros e paginação
+    
+    Por padrão lista apenas as imobiliárias ativas; is_active=false lista as
+    desativadas e include_archived=true lista todas, inclusive as movidas
+    para o arquivo.
+    Com paginated=true, retorna o envelope {total, page, page_size, items,
+    total_strategy}; o total é estimado em conjuntos grandes (exact=true força
+    a contagem exata).
+    Com facets=true, o envelope inclui as contagens por plano, estado, cidade
+    e status para os filtros atuais (sem o arquivo).
+    Com fields=trade_name,cnpj, seleciona e retorna apenas esses campos (e o id).
+    min_employees/max_employees filtram e sort_by=active_employee_count ordena
+    pelo número de funcionários ativos, mantido na própria imobiliária.
     """
-    query = db.query(Company)
+    # Sem is_active, lista só os registros ativos (os índices parciais
+    # ix_*_active_* atendem a consulta); include_archived=true lista todos
+    if is_active is None and not include_archived:
+        is_active = True
+    filters = dict(
+        is_active=is_active, plan_type=plan_type, search=search,
+        min_employees=min_employees, max_employees=max_employees
+    )
+    selected = fieldsets.parse_fields(fields, CompanyResponse)
+    # A coluna de ordenação entra na consulta, mesmo fora da resposta
+    names = selected and tuple(dict.fromkeys(selected + (sort_by,)))
     
-    # Filtros
-    if is_active is not None:
-        query = query.filter(Company.is_active == is_active)
-    if plan_type:
-        query = query.filter(Company.plan_type == plan_type)
-    if search:
-        search_filter = f"%{search}%"
-        query = query.filter(
-            (Company.company_name.ilike(search_filter)) |
-            (Company.trade_name.ilike(search_filter)) |
-            (Company.cnpj.ilike(search_filter)) |
-            (Company.email.ilike(search_filter))
+    if include_archived:
+        query = _apply_filters(db.query(*_columns(Company, names)), Company, **filters).union_all(
+            _apply_filters(db.query(*_columns(CompanyArchive, names)), CompanyArchive, **filters)
         )
+    elif selected:
+        query = _apply_filters(db.query(*_columns(Company, names)), Company, **filters)
+    else:
+        query = _apply_filters(db.query(Company), Company, **filters)
     
-    # Ordenar por data de criação (mais recente primeiro)
-    query = query.order_by(Company.created_at.desc())
+    # Ordenar (padrão: data de criação, mais recente primeiro); id desempata
+    sort_column = getattr(Company, sort_by)
+    if order == "desc":
+        query = query.order_by(sort_column.desc(), Company.id.desc())
+    else:
+        query = query.order_by(sort_column.asc(), Company.id.asc())
     
     # Paginação
     companies = query.offset(skip).limit(limit).all()
+    if selected:
+        companies = [fieldsets.serialize(company, selected) for company in companies]
     
-    return companies
+    if not (paginated or facets):
+        return fieldsets.response(companies) if selected else companies
+    
+    parts = [
+        (model, _filter_conditions(model, **filters))
+        for model in ((Company, CompanyArchive) if include_archived else (Company,))
+    ]
+    total, total_strategy = CountService.count_many(db, parts, exact=exact)
+    
+    response = {
+        "total": total,
+        "page": skip // limit + 1,
+        "page_size": limit,
+        "items": companies,
+        "total_strategy": total_strategy
+    }
+    if facets:
+        response["facets"] = FacetService.cached(
+            db, "companies", Company, filters, _filter_conditions(Company, **filters), FACET_FIELDS
+        )
+    return fieldsets.response(response) if selected else response
 
 
 @router.get("/{company_id}", response_model=CompanyResponse)
-def get_company(company_id: int, db: Session = Depends(get_db)):
+def get_company(
+    request: Request,
+    company_id: int,
+    include_archived: bool = False,
+    fields: Optional[str] = Query(None, description="Campos da resposta, separados por vírgula"),
+    db: Session = Depends(get_read_db)
+):
     """
     Buscar imobiliária por ID
+    
+    A resposta vem do cache por ID quando disponível (ver
+    services/identity_cache.py), exceto em leituras que exigem o primário.
     """
+    selected = fieldsets.parse_fields(fields, CompanyResponse)
+    
+    company = identity_cache.fetch(
+        db, Company, CompanyResponse, [company_id], use_cache=not requires_primary(request)
+    ).get(company_id)
+    if company is None and include_archived:
+        archived = db.query(CompanyArchive).filter(CompanyArchive.id == company_id).first()
+        if archived:
+            company = CompanyResponse.model_validate(archived).model_dump(mode="json")
+    if company is None:
+        raise HTTPException(status_code=404, detail="Imobiliária não encontrada")
+    if selected:
+        company = fieldsets.pick(company, selected)
+    return fieldsets.response(company)
+
+
+def _get_company(db: Session, company_id: int) -> Company:
     company = db.query(Company).filter(Company.id == company_id).first()
     if not company:
         raise HTTPException(status_code=404, detail="Imobiliária não encontrada")
     return company
 
 
+@router.get("/{company_id}/history", response_model=List[ChangeHistoryResponse])
+def get_company_history(
+    company_id: int,
+    skip: int = Query(0, ge=0),
+    limit: int = Query(100, ge=1, le=1000),
+    db: Session = Depends(get_read_db)
+):
+    """
+    Histórico de alterações de uma imobiliária (mais recentes primeiro)
+    """
+    _get_company(db, company_id)
+    return HistoryService.timeline(db, Company, company_id, skip, limit)
+
+
+@router.get("/{company_id}/history/at", response_model=CompanyResponse)
+def get_company_at(company_id: int, ts: datetime, db: Session = Depends(get_read_db)):
+    """
+    Dados de uma imobiliária como estavam no instante `ts`
+    """
+    company = _get_company(db, company_id)
+    current = CompanyResponse.model_validate(company).model_dump(mode="json")
+    state = HistoryService.as_of(db, Company, current, ts)
+    if state is None:
+        raise HTTPException(status_code=404, detail="Imobiliária não existia nesse instante")
+    return state
+
+
 @router.put("/{company_id}", response_model=CompanyResponse)
 def update_company(
     company_id: int,
@@ -113,14 +266,18 @@ def update_company(
     
     db.commit()
     db.refresh(company)
+    autocomplete_index.sync_company(company)
+    facet_cache.clear()
     
     return company
 
 
 @router.delete("/{company_id}")
-def delete_company(company_id: int, db: Session = Depends(get_db)):
+def delete_company(company_id: int, cascade: bool = False, db: Session = Depends(get_db)):
     """
     Deletar imobiliária (soft delete)
+    
+    Com cascade=true, desativa também os funcionários ativos na mesma transação.
     """
     company = db.query(Company).filter(Company.id == company_id).first()
     if not company:
@@ -128,15 +285,28 @@ def delete_company(company_id: int, db: Session = Depends(get_db)):
     
     # Soft delete
     company.is_active = False
+    
+    employee_ids = []
+    if cascade:
+        employee_ids = HistoryService.bulk_update(
+            db, Person, [Person.company_id == company_id, Person.is_active == True], {"is_active": False}
+        )
+    
     db.commit()
+    autocomplete_index.remove("company", [company_id])
+    autocomplete_index.remove("person", employee_ids)
+    facet_cache.clear()
     
-    return {"message": "Imobiliária desativada com sucesso"}
+    return {
+        "message": "Imobiliária desativada com sucesso",
+        "employees_deactivated": len(employee_ids)
+    }
 
 
 @router.get("/{company_id}/employees")
 def get_company_employees(
     company_id: int,
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_read_db)
 ):
     """
     Listar funcionários de uma imobiliária
@@ -150,13 +320,15 @@ def get_company_employees(
     return {
         "company_id": company_id,
         "company_name": company.trade_name,
-        "total_employees": len(employees),
+        "total_employees": company.employee_count,
+        "active_employees": company.active_employee_count,
+        "employees_by_role": company.employees_by_role,
         "employees": employees
     }
 
 
 @router.get("/stats/summary")
-def get_companies_stats(db: Session = Depends(get_db)):
+def get_companies_stats(db: Session = Depends(get_read_db)):
     """
     Estatísticas de imobiliárias cadastradas
     """
@@ -1,96 +1,351 @@
-from fastapi import APIRouter, Depends, HTTPException, Query
+from datetime import datetime
+from fastapi import APIRouter, Depends, HTTPException, Query, Request
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.orm import Session
-from typing import List, Optional
+from typing import List, Optional, Union
 
-from ..database import get_db
-from ..models.models import Person
-from ..schemas.schemas import PersonCreate, PersonUpdate, PersonResponse, PaginatedResponse
+from ..database import get_db, get_read_db, ids_match
+from ..middleware.consistency import requires_primary
+from ..middleware.tenant import current_tenant
+from ..models.models import Company, Person, PersonArchive
+from ..services.autocomplete import autocomplete_index
+from ..services.counting import CountService
+from ..services.facets import FacetService, facet_cache
+from ..services import fieldsets
+from ..services.history import HistoryService
+from ..services.identity_cache import identity_cache
+from ..schemas.schemas import (
+    PersonCreate, PersonUpdate, PersonResponse, PersonListResponse, PaginatedResponse,
+    PersonBulkSelection, PersonBulkUpdate, BulkResult, ChangeHistoryResponse
+)
 
 router = APIRouter(prefix="/api/persons", tags=["Persons"])
 
+# Colunas com contagens na listagem (facets=true)
+FACET_FIELDS = ("person_type", "role", "address_state", "address_city", "is_active")
+
+# Campos únicos por imobiliária, com o rótulo das mensagens de erro
+UNIQUE_FIELDS = (("email", "Email"), ("cpf", "CPF"), ("cnpj", "CNPJ"))
+
+
+def _check_unique(db: Session, values: dict, company_id: Optional[int], exclude_id: Optional[int] = None):
+    """
+    Email, CPF e CNPJ são únicos por imobiliária: a mesma regra dos índices
+    ix_persons_*_company_id (pessoas sem imobiliária competem entre si)
+    """
+    query = db.query(Person.id).execution_options(skip_tenant_filter=True).filter(
+        Person.company_id.is_not_distinct_from(company_id)
+    )
+    if exclude_id is not None:
+        query = query.filter(Person.id != exclude_id)
+    for field, label in UNIQUE_FIELDS:
+        value = values.get(field)
+        if value and query.filter(getattr(Person, field) == value).first():
+            raise HTTPException(status_code=400, detail=f"{label} já cadastrado")
+
 
 @router.post("/", response_model=PersonResponse, status_code=201)
 def create_person(person: PersonCreate, db: Session = Depends(get_db)):
     """
     Criar nova pessoa (PF ou PJ)
     """
-    # Verificar se email já existe
-    existing = db.query(Person).filter(Person.email == person.email).first()
-    if existing:
-        raise HTTPException(status_code=400, detail="Email já cadastrado")
+    # Pessoas criadas no contexto de uma imobiliária pertencem a ela
+    tenant_id = current_tenant()
+    if tenant_id is not None:
+        if person.company_id is None:
+            person.company_id = tenant_id
+        elif person.company_id != tenant_id:
+            raise HTTPException(status_code=403, detail="Imobiliária diferente da requisição")
     
-    # Verificar CPF se for PF
-    if person.person_type == "PF" and person.cpf:
-        existing_cpf = db.query(Person).filter(Person.cpf == person.cpf).first()
-        if existing_cpf:
-            raise HTTPException(status_code=400, detail="CPF já cadastrado")
-    
-    # Verificar CNPJ se for PJ
-    if person.person_type == "PJ" and person.cnpj:
-        existing_cnpj = db.query(Person).filter(Person.cnpj == person.cnpj).first()
-        if existing_cnpj:
-            raise HTTPException(status_code=400, detail="CNPJ já cadastrado")
+    _check_unique(db, person.model_dump(), person.company_id)
     
     # Criar pessoa
     db_person = Person(**person.model_dump())
     db.add(db_person)
     db.commit()
     db.refresh(db_person)
+    autocomplete_index.sync_person(db_person)
+    facet_cache.clear()
     
     return db_person
 
 
-@router.get("/", response_model=List[PersonResponse])
+def _filter_conditions(model, person_type=None, role=None, is_active=None, search=None, company_id=None):
+    """
+    Condições dos filtros de listagem sobre `model` (Person ou PersonArchive)
+    """
+    conditions = []
+    if person_type:
+        conditions.append(model.person_type == person_type)
+    if role:
+        conditions.append(model.role == role)
+    if is_active is not None:
+        conditions.append(model.is_active == is_active)
+    if company_id is not None:
+        conditions.append(model.company_id == company_id)
+    if search:
+        search_filter = f"%{search}%"
+        conditions.append(
+            (model.name.ilike(search_filter)) |
+            (model.email.ilike(search_filter)) |
+            (model.cpf.ilike(search_filter)) |
+            (model.cnpj.ilike(search_filter))
+        )
+    return conditions
+
+
+def _parse_ids(ids: str, limit: int) -> List[int]:
+    """IDs distintos de `ids=1,2,3`, na ordem recebida"""
+    try:
+        parsed = list(dict.fromkeys(int(value) for value in ids.split(",") if value.strip()))
+    except ValueError:
+        raise HTTPException(status_code=400, detail="ids deve ser uma lista de inteiros separados por vírgula")
+    if len(parsed) > limit:
+        raise HTTPException(status_code=400, detail=f"Máximo de {limit} ids por requisição")
+    return parsed
+
+
+def _fetch_persons(request: Request, db: Session, ids: List[int], include_archived: bool = False) -> dict:
+    """
+    Pessoas por ID, serializadas: do cache por ID e, para as que faltarem,
+    de uma única consulta (e do arquivo, com include_archived)
+    
+    Leituras que exigem o primário (read-your-writes) não usam o cache.
+    """
+    found = identity_cache.fetch(db, Person, PersonResponse, ids, use_cache=not requires_primary(request))
+    missing = [person_id for person_id in ids if person_id not in found]
+    if missing and include_archived:
+        for person in db.query(PersonArchive).filter(ids_match(PersonArchive.id, missing)):
+            found[person.id] = PersonResponse.model_validate(person).model_dump(mode="json")
+    return found
+
+
+def _apply_filters(query, model, **filters):
+    return query.filter(*_filter_conditions(model, **filters))
+
+
+def _columns(model, names=None):
+    names = names or [column.name for column in Person.__table__.columns]
+    return fieldsets.columns(model, names)
+
+
+@router.get("/", response_model=Union[List[PersonResponse], PersonListResponse])
 def list_persons(
+    request: Request,
     skip: int = Query(0, ge=0),
     limit: int = Query(100, ge=1, le=1000),
     person_type: Optional[str] = None,
     role: Optional[str] = None,
     is_active: Optional[bool] = None,
     search: Optional[str] = None,
-    db: Session = Depends(get_db)
+    include_archived: bool = False,
+    paginated: bool = False,
+    exact: bool = False,
+    facets: bool = False,
+    fields: Optional[str] = Query(None, description="Campos da resposta, separados por vírgula (ex.: name,email,role)"),
+    ids: Optional[str] = Query(None, description="Buscar por IDs, separados por vírgula (ex.: 1,2,3)"),
+    db: Session = Depends(get_read_db)
 ):
     """
     Listar pessoas com filtros e paginação
+    
+    Por padrão lista apenas as pessoas ativas; is_active=false lista as
+    desativadas e include_archived=true lista todas, inclusive as movidas
+    para o arquivo.
+    Com o header X-Company-Id, lista apenas as pessoas da imobiliária.
+    Com paginated=true, retorna o envelope {total, page, page_size, items,
+    total_strategy}; o total é estimado em conjuntos grandes (exact=true força
+    a contagem exata).
+    Com facets=true, o envelope inclui as contagens por tipo, papel, estado,
+    cidade e status para os filtros atuais (sem o arquivo).
+    Com fields=name,email, seleciona e retorna apenas esses campos (e o id).
+    Com ids=1,2,3, retorna essas pessoas na ordem pedida, omitindo as não
+    encontradas (os demais filtros e a paginação não se aplicam).
     """
-    query = db.query(Person)
+    # Sem is_active, lista só os registros ativos (os índices parciais
+    # ix_*_active_* atendem a consulta); include_archived=true lista todos
+    if is_active is None and not include_archived:
+        is_active = True
+    filters = dict(person_type=person_type, role=role, is_active=is_active, search=search)
+    selected = fieldsets.parse_fields(fields, PersonResponse)
     
-    # Filtros
-    if person_type:
-        query = query.filter(Person.person_type == person_type)
-    if role:
-        query = query.filter(Person.role == role)
-    if is_active is not None:
-        query = query.filter(Person.is_active == is_active)
-    if search:
-        search_filter = f"%{search}%"
-        query = query.filter(
-            (Person.name.ilike(search_filter)) |
-            (Person.email.ilike(search_filter)) |
-            (Person.cpf.ilike(search_filter)) |
-            (Person.cnpj.ilike(search_filter))
+    if ids is not None:
+        person_ids = _parse_ids(ids, limit=1000)
+        found = _fetch_persons(request, db, person_ids, include_archived)
+        persons = [found[person_id] for person_id in person_ids if person_id in found]
+        if selected:
+            persons = [fieldsets.pick(person, selected) for person in persons]
+        return fieldsets.response(persons)
+    
+    # created_at entra na consulta para a ordenação, mesmo fora da resposta
+    names = selected and tuple(dict.fromkeys(selected + ("created_at",)))
+    
+    if include_archived:
+        query = _apply_filters(db.query(*_columns(Person, names)), Person, **filters).union_all(
+            _apply_filters(db.query(*_columns(PersonArchive, names)), PersonArchive, **filters)
         )
+    elif selected:
+        query = _apply_filters(db.query(*_columns(Person, names)), Person, **filters)
+    else:
+        query = _apply_filters(db.query(Person), Person, **filters)
     
     # Ordenar por data de criação (mais recente primeiro)
     query = query.order_by(Person.created_at.desc())
     
     # Paginação
     persons = query.offset(skip).limit(limit).all()
+    if selected:
+        persons = [fieldsets.serialize(person, selected) for person in persons]
+    
+    if not (paginated or facets):
+        return fieldsets.response(persons) if selected else persons
+    
+    # O escopo do tenant entra explicitamente nas condições da contagem,
+    # pois a estimativa do planner compila a consulta fora da sessão
+    tenant_id = current_tenant()
+    parts = []
+    for model in ((Person, PersonArchive) if include_archived else (Person,)):
+        conditions = _filter_conditions(model, **filters)
+        if tenant_id is not None:
+            conditions.append(model.company_id == tenant_id)
+        parts.append((model, conditions))
+    total, total_strategy = CountService.count_many(db, parts, exact=exact)
     
-    return persons
+    response = {
+        "total": total,
+        "page": skip // limit + 1,
+        "page_size": limit,
+        "items": persons,
+        "total_strategy": total_strategy
+    }
+    if facets:
+        response["facets"] = FacetService.cached(
+            db, "persons", Person, filters, _filter_conditions(Person, **filters),
+            FACET_FIELDS, tenant_id=tenant_id
+        )
+    return fieldsets.response(response) if selected else response
+
+
+def _bulk_conditions(selection: PersonBulkSelection):
+    """
+    Condições da seleção em lote: lista de IDs ou filtro (exatamente um)
+    """
+    if (selection.ids is None) == (selection.filter is None):
+        raise HTTPException(status_code=400, detail="Informe ids ou filter")
+    if selection.ids is not None:
+        return [ids_match(Person.id, selection.ids)]
+    conditions = _filter_conditions(Person, **selection.filter.model_dump())
+    if not conditions:
+        raise HTTPException(status_code=400, detail="Filtro vazio: informe ao menos um critério")
+    return conditions
+
+
+def _bulk_update(db: Session, conditions, values: dict) -> BulkResult:
+    """
+    Um único UPDATE sobre as linhas selecionadas, com o histórico de cada
+    linha, em uma transação
+    """
+    try:
+        ids = HistoryService.bulk_update(db, Person, conditions, values)
+        db.commit()
+    except IntegrityError:
+        # Ex.: pessoas transferidas cujo email já existe na imobiliária de destino
+        db.rollback()
+        raise HTTPException(
+            status_code=409,
+            detail="Email, CPF ou CNPJ já cadastrado na imobiliária de destino"
+        )
+    autocomplete_index.sync_persons(db, ids)
+    facet_cache.clear()
+    return BulkResult(updated=len(ids), ids=ids)
+
+
+@router.patch("/bulk", response_model=BulkResult)
+def bulk_update_persons(body: PersonBulkUpdate, db: Session = Depends(get_db)):
+    """
+    Atualizar várias pessoas de uma vez (ex.: transferir corretores de imobiliária)
+    """
+    values = body.changes.model_dump(exclude_unset=True)
+    if not values:
+        raise HTTPException(status_code=400, detail="Nenhum campo para atualizar")
+    
+    if "company_id" in values:
+        tenant_id = current_tenant()
+        if tenant_id is not None and values["company_id"] != tenant_id:
+            raise HTTPException(status_code=403, detail="Imobiliária diferente da requisição")
+        if values["company_id"] is not None and db.get(Company, values["company_id"]) is None:
+            raise HTTPException(status_code=404, detail="Imobiliária não encontrada")
+    
+    return _bulk_update(db, _bulk_conditions(body), values)
+
+
+@router.post("/bulk/deactivate", response_model=BulkResult)
+def bulk_deactivate_persons(body: PersonBulkSelection, db: Session = Depends(get_db)):
+    """
+    Desativar várias pessoas de uma vez (soft delete)
+    """
+    conditions = _bulk_conditions(body) + [Person.is_active == True]
+    return _bulk_update(db, conditions, {"is_active": False})
 
 
 @router.get("/{person_id}", response_model=PersonResponse)
-def get_person(person_id: int, db: Session = Depends(get_db)):
+def get_person(
+    request: Request,
+    person_id: int,
+    include_archived: bool = False,
+    fields: Optional[str] = Query(None, description="Campos da resposta, separados por vírgula"),
+    db: Session = Depends(get_read_db)
+):
     """
     Buscar pessoa por ID
+    
+    A resposta vem do cache por ID quando disponível (ver
+    services/identity_cache.py), exceto em leituras que exigem o primário.
     """
+    selected = fieldsets.parse_fields(fields, PersonResponse)
+    
+    person = _fetch_persons(request, db, [person_id], include_archived).get(person_id)
+    if person is None:
+        raise HTTPException(status_code=404, detail="Pessoa não encontrada")
+    if selected:
+        person = fieldsets.pick(person, selected)
+    return fieldsets.response(person)
+
+
+def _visible_person(db: Session, person_id: int) -> Person:
     person = db.query(Person).filter(Person.id == person_id).first()
     if not person:
         raise HTTPException(status_code=404, detail="Pessoa não encontrada")
     return person
 
 
+@router.get("/{person_id}/history", response_model=List[ChangeHistoryResponse])
+def get_person_history(
+    person_id: int,
+    skip: int = Query(0, ge=0),
+    limit: int = Query(100, ge=1, le=1000),
+    db: Session = Depends(get_read_db)
+):
+    """
+    Histórico de alterações de uma pessoa (mais recentes primeiro)
+    """
+    _visible_person(db, person_id)
+    return HistoryService.timeline(db, Person, person_id, skip, limit)
+
+
+@router.get("/{person_id}/history/at", response_model=PersonResponse)
+def get_person_at(person_id: int, ts: datetime, db: Session = Depends(get_read_db)):
+    """
+    Dados de uma pessoa como estavam no instante `ts`
+    """
+    person = _visible_person(db, person_id)
+    current = PersonResponse.model_validate(person).model_dump(mode="json")
+    state = HistoryService.as_of(db, Person, current, ts)
+    if state is None:
+        raise HTTPException(status_code=404, detail="Pessoa não existia nesse instante")
+    return state
+
+
 @router.put("/{person_id}", response_model=PersonResponse)
 def update_person(
     person_id: int,
@@ -100,23 +355,30 @@ def update_person(
     """
     Atualizar dados de uma pessoa
     """
-    person = db.query(Person).filter(Person.id == person_id).first()
+    # Linha travada até o commit: os contadores da imobiliária e as
+    # verificações partem dos valores atuais
+    person = db.query(Person).filter(Person.id == person_id).with_for_update().first()
     if not person:
         raise HTTPException(status_code=404, detail="Pessoa não encontrada")
     
-    # Verificar email duplicado
-    if person_update.email and person_update.email != person.email:
-        existing = db.query(Person).filter(Person.email == person_update.email).first()
-        if existing:
-            raise HTTPException(status_code=400, detail="Email já cadastrado")
+    # Não permite mover a pessoa para outra imobiliária fora do próprio escopo
+    tenant_id = current_tenant()
+    if tenant_id is not None and "company_id" in person_update.model_fields_set \
+            and person_update.company_id != tenant_id:
+        raise HTTPException(status_code=403, detail="Imobiliária diferente da requisição")
     
     # Atualizar campos
     update_data = person_update.model_dump(exclude_unset=True)
+    if update_data.keys() & {"email", "cpf", "cnpj", "company_id"}:
+        values = {field: update_data.get(field, getattr(person, field)) for field, _ in UNIQUE_FIELDS}
+        _check_unique(db, values, update_data.get("company_id", person.company_id), exclude_id=person.id)
     for field, value in update_data.items():
         setattr(person, field, value)
     
     db.commit()
     db.refresh(person)
+    autocomplete_index.sync_person(person)
+    facet_cache.clear()
     
     return person
 
@@ -133,12 +395,14 @@ def delete_person(person_id: int, db: Session = Depends(get_db)):
     # Soft delete
     person.is_active = False
     db.commit()
+    autocomplete_index.remove("person", [person_id])
+    facet_cache.clear()
     
     return {"message": "Pessoa desativada com sucesso"}
 
 
 @router.get("/stats/summary")
-def get_persons_stats(db: Session = Depends(get_db)):
+def get_persons_stats(db: Session = Depends(get_read_db)):
     """
     Estatísticas de pessoas cadastradas
     """
@@ -1,5 +1,5 @@
 from pydantic import BaseModel, EmailStr, Field, validator
-from typing import Optional
+from typing import Any, Dict, List, Optional
 from datetime import datetime
 from enum import Enum
 
@@ -89,11 +89,45 @@ class PersonResponse(PersonBase):
     id: int
     created_at: datetime
     updated_at: Optional[datetime] = None
+    situacao_cadastral: Optional[str] = None
+    situacao_changed_at: Optional[datetime] = None
 
     class Config:
         from_attributes = True
 
 
+class PersonBulkFilter(BaseModel):
+    """Filtro para operações em lote (mesma semântica da listagem)"""
+    person_type: Optional[PersonType] = None
+    role: Optional[UserRole] = None
+    is_active: Optional[bool] = None
+    company_id: Optional[int] = None
+    search: Optional[str] = None
+
+
+class PersonBulkChanges(BaseModel):
+    """Campos alteráveis em lote (sem campos únicos como email/CPF/CNPJ)"""
+    role: Optional[UserRole] = None
+    company_id: Optional[int] = None
+    is_active: Optional[bool] = None
+    notes: Optional[str] = None
+
+
+class PersonBulkSelection(BaseModel):
+    """Seleção de pessoas por lista de IDs ou por filtro"""
+    ids: Optional[List[int]] = Field(None, min_length=1, max_length=10000)
+    filter: Optional[PersonBulkFilter] = None
+
+
+class PersonBulkUpdate(PersonBulkSelection):
+    changes: PersonBulkChanges
+
+
+class BulkResult(BaseModel):
+    updated: int
+    ids: List[int]
+
+
 # ============= COMPANY SCHEMAS =============
 
 class CompanyBase(BaseModel):
@@ -155,6 +189,16 @@ class CompanyResponse(CompanyBase):
     id: int
     created_at: datetime
     updated_at: Optional[datetime] = None
+    situacao_cadastral: Optional[str] = None
+    situacao_changed_at: Optional[datetime] = None
+    # Contadores de funcionários (ativos por papel em <papel>_count)
+    employee_count: int = 0
+    active_employee_count: int = 0
+    admin_count: int = 0
+    corretor_count: int = 0
+    vendedor_count: int = 0
+    cliente_count: int = 0
+    gestor_count: int = 0
 
     class Config:
         from_attributes = True
@@ -167,8 +211,42 @@ class MessageResponse(BaseModel):
     detail: Optional[str] = None
 
 
+class AutocompleteItem(BaseModel):
+    kind: str  # person, company
+    id: int
+    label: str
+    document: Optional[str] = None
+
+
+class ChangeHistoryResponse(BaseModel):
+    id: int
+    entity_type: str  # person, company
+    entity_id: int
+    operation: str  # create, update
+    # {campo: [antes, depois]}
+    changes: Dict[str, List[Any]]
+    changed_at: datetime
+
+    class Config:
+        from_attributes = True
+
+
 class PaginatedResponse(BaseModel):
     total: int
     page: int
     page_size: int
     items: list
+    # exact, reltuples ou planner_estimate (ver services/counting.py)
+    total_strategy: str = "exact"
+
+
+class PersonListResponse(PaginatedResponse):
+    """Listagem paginada (paginated=true), com contagens por faceta se facets=true"""
+    items: List[PersonResponse]
+    facets: Optional[Dict[str, Dict[str, int]]] = None
+
+
+class CompanyListResponse(PaginatedResponse):
+    """Listagem paginada (paginated=true), com contagens por faceta se facets=true"""
+    items: List[CompanyResponse]
+    facets: Optional[Dict[str, Dict[str, int]]] = None
@@ -0,0 +1,101 @@
+"""
+Arquivamento de registros inativos
+
+Pessoas e imobiliárias desativadas (soft delete) há mais de
+ARCHIVE_INACTIVE_DAYS são movidas em lotes para `persons_archive` e
+`companies_archive`, mantendo as tabelas e os índices quentes pequenos.
+As rotas de leitura continuam enxergando esses registros com
+`include_archived=true`.
+"""
+import logging
+import os
+import time
+from datetime import datetime, timedelta, timezone
+from typing import Optional
+
+from sqlalchemy import delete, exists, func, insert, select
+from sqlalchemy.orm import Session
+
+from ..models.models import Company, CompanyArchive, Person, PersonArchive
+from .changes import mark_changed
+from .rollups import ROLLUP_FIELDS, RollupService
+
+logger = logging.getLogger(__name__)
+
+
+class ArchivalService:
+    """
+    Move registros inativos para as tabelas de arquivo
+    """
+    INACTIVE_DAYS = int(os.getenv("ARCHIVE_INACTIVE_DAYS", "180"))
+    BATCH_SIZE = int(os.getenv("ARCHIVE_BATCH_SIZE", "1000"))
+    BATCH_PAUSE = float(os.getenv("ARCHIVE_BATCH_PAUSE_SECONDS", "0.5"))
+
+    TARGETS = {
+        "persons": (Person, PersonArchive),
+        "companies": (Company, CompanyArchive),
+    }
+
+    @classmethod
+    def cutoff(cls) -> datetime:
+        return datetime.now(timezone.utc) - timedelta(days=cls.INACTIVE_DAYS)
+
+    @classmethod
+    def archive_batch(cls, db: Session, entity: str, cutoff: Optional[datetime] = None) -> int:
+        """
+        Move um lote de registros inativos para o arquivo, em uma transação
+
+        Returns:
+            Quantidade de registros arquivados
+        """
+        model, archive = cls.TARGETS[entity]
+        table = model.__table__
+        cutoff = cutoff or cls.cutoff()
+
+        last_change = func.coalesce(table.c.updated_at, table.c.created_at)
+        query = select(table.c.id).where(
+            table.c.is_active == False,
+            last_change < cutoff
+        )
+        if model is Company:
+            # Imobiliárias ainda referenciadas por pessoas ficam na tabela quente
+            query = query.where(~exists().where(Person.__table__.c.company_id == table.c.id))
+
+        ids = db.scalars(
+            query.order_by(table.c.id).limit(cls.BATCH_SIZE).with_for_update(skip_locked=True)
+        ).all()
+        if not ids:
+            return 0
+
+        if model is Person:
+            # Pessoas saem da tabela quente: descontadas dos contadores das imobiliárias
+            removed = db.execute(
+                select(*[table.c[name] for name in ROLLUP_FIELDS]).where(table.c.id.in_(ids))
+            ).all()
+            RollupService.apply_removed(db, removed)
+
+        columns = [column.name for column in table.columns]
+        db.execute(
+            insert(archive.__table__).from_select(
+                columns,
+                select(*[table.c[name] for name in columns]).where(table.c.id.in_(ids))
+            )
+        )
+        db.execute(delete(table).where(table.c.id.in_(ids)))
+        mark_changed(db, model, ids)
+        db.commit()
+        return len(ids)
+
+    @classmethod
+    def archive_all(cls, db: Session, entity: str) -> int:
+        """Arquiva em lotes até não restar registro elegível"""
+        cutoff = cls.cutoff()
+        total = 0
+        while True:
+            moved = cls.archive_batch(db, entity, cutoff)
+            total += moved
+            if moved < cls.BATCH_SIZE:
+                break
+            logger.info("%s: %s arquivados até agora", entity, total)
+            time.sleep(cls.BATCH_PAUSE)
+        return total
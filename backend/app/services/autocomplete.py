@@ -0,0 +1,315 @@
+"""
+Índice em memória para autocomplete de pessoas e imobiliárias
+
+Mantém arrays ordenados de chaves normalizadas (sem acento, minúsculas)
+com as entradas correspondentes, um por imobiliária para pessoas e um para
+imobiliárias, consultados por busca binária. Cada palavra do nome e os
+dígitos do documento (CPF/CNPJ) viram uma chave, então "silva", "jose sil"
+e "1122" encontram "José da Silva - 112.223...".
+
+O índice é construído no startup e atualizado pelos handlers de escrita,
+sem consultar o PostgreSQL a cada tecla digitada. Cada processo (worker)
+mantém o próprio índice; as escritas feitas em outros processos (workers,
+varredura de CNPJs, scripts) chegam pelo canal de alterações
+(services/changes.py) e as linhas afetadas são relidas do banco. Ao
+reconectar ao canal, ou periodicamente enquanto ele estiver indisponível
+(mesmo com um único worker), o índice é reconstruído.
+"""
+import asyncio
+import bisect
+import heapq
+import itertools
+import logging
+import os
+import re
+import threading
+import unicodedata
+from operator import itemgetter
+from typing import Dict, Iterable, Iterator, List, NamedTuple, Optional, Tuple
+
+from sqlalchemy.orm import Session
+
+from ..database import SessionLocal
+from ..models.models import Company, Person
+from .changes import Changes, change_bus
+
+logger = logging.getLogger(__name__)
+
+# Reconstrução enquanto o canal de alterações estiver indisponível (0 = nunca)
+AUTOCOMPLETE_REBUILD_SECONDS = float(os.getenv("AUTOCOMPLETE_REBUILD_SECONDS", "300"))
+# Posições percorridas por array em cada busca: limita o custo de prefixos
+# muito comuns combinados com termos que quase não casam
+AUTOCOMPLETE_MAX_SCAN = int(os.getenv("AUTOCOMPLETE_MAX_SCAN", "2000"))
+
+_NON_ALNUM = re.compile(r"[^a-z0-9]+")
+_NON_DIGIT = re.compile(r"\D+")
+_LETTERS = re.compile(r"[a-z]")
+
+# Sentinela maior que qualquer caractere de chave, para o fim do intervalo de prefixo
+_MAX_CHAR = "\uffff"
+
+
+def normalize(text: Optional[str]) -> str:
+    """Remove acentos, converte para minúsculas e troca pontuação por espaço"""
+    if not text:
+        return ""
+    decomposed = unicodedata.normalize("NFKD", text)
+    folded = "".join(c for c in decomposed if not unicodedata.combining(c)).lower()
+    return _NON_ALNUM.sub(" ", folded).strip()
+
+
+class AutocompleteEntry:
+    __slots__ = ("kind", "id", "label", "document", "company_id", "words")
+
+    def __init__(self, kind: str, id: int, label: str, document: Optional[str], company_id: Optional[int]):
+        self.kind = kind
+        self.id = id
+        self.label = label
+        self.document = document
+        self.company_id = company_id
+        self.words = tuple(normalize(label).split())
+
+    @property
+    def shard(self) -> Tuple[str, Optional[int]]:
+        """Pessoas ficam separadas por imobiliária; imobiliárias, em um único array"""
+        return (self.kind, self.company_id if self.kind == "person" else None)
+
+
+class _Shard(NamedTuple):
+    """Array ordenado de um (tipo, imobiliária); nunca alterado depois de publicado"""
+    keys: List[str]
+    entries: List[AutocompleteEntry]
+
+
+class AutocompleteIndex:
+    """
+    Arrays ordenados (chave, entrada) por (tipo, imobiliária), com busca por
+    prefixo via bisect
+
+    As escritas montam uma cópia do array afetado e trocam a referência sob o
+    lock; a busca segura o lock só para pegar as referências e percorre os
+    arrays sem ele.
+    """
+
+    def __init__(self):
+        self._shards: Dict[Tuple[str, Optional[int]], _Shard] = {}
+        self._refs: Dict[Tuple[str, int], Tuple[AutocompleteEntry, Tuple[str, ...]]] = {}
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._refs)
+
+    @staticmethod
+    def _keys_for(entry: AutocompleteEntry) -> Tuple[str, ...]:
+        keys = set(entry.words)
+        digits = _NON_DIGIT.sub("", entry.document or "")
+        if digits:
+            keys.add(digits)
+        return tuple(sorted(keys))
+
+    # ---------- construção ----------
+
+    def build(self, db: Session):
+        """Reconstrói o índice a partir das pessoas e imobiliárias ativas"""
+        pairs: Dict[Tuple[str, Optional[int]], List[Tuple[str, AutocompleteEntry]]] = {}
+        refs = {}
+
+        def collect(entry: AutocompleteEntry):
+            keys = self._keys_for(entry)
+            refs[(entry.kind, entry.id)] = (entry, keys)
+            pairs.setdefault(entry.shard, []).extend((key, entry) for key in keys)
+
+        people = db.query(
+            Person.id, Person.name, Person.cpf, Person.cnpj, Person.company_id
+        ).execution_options(skip_tenant_filter=True).filter(Person.is_active == True)
+        for person_id, name, cpf, cnpj, company_id in people.yield_per(5000):
+            collect(AutocompleteEntry("person", person_id, name, cpf or cnpj, company_id))
+
+        companies = db.query(Company.id, Company.trade_name, Company.cnpj).filter(Company.is_active == True)
+        for company_id, trade_name, cnpj in companies.yield_per(5000):
+            collect(AutocompleteEntry("company", company_id, trade_name, cnpj, company_id))
+
+        shards = {shard: self._sorted(shard_pairs) for shard, shard_pairs in pairs.items()}
+        with self._lock:
+            self._shards = shards
+            self._refs = refs
+
+    @staticmethod
+    def _sorted(pairs: List[Tuple[str, AutocompleteEntry]]) -> _Shard:
+        pairs.sort(key=itemgetter(0))
+        return _Shard([key for key, _ in pairs], [entry for _, entry in pairs])
+
+    # ---------- atualização incremental ----------
+
+    def _apply_locked(self, removals: Iterable[Tuple[str, int]], additions: Iterable[AutocompleteEntry]):
+        """
+        Remove e adiciona entradas, recriando uma única vez cada array afetado
+        (os arrays publicados continuam válidos para buscas em andamento)
+        """
+        removed: Dict[Tuple[str, Optional[int]], set] = {}
+        added: Dict[Tuple[str, Optional[int]], List[Tuple[str, AutocompleteEntry]]] = {}
+        for ref_key in removals:
+            ref = self._refs.pop(ref_key, None)
+            if ref is not None:
+                removed.setdefault(ref[0].shard, set()).add(id(ref[0]))
+        for entry in additions:
+            keys = self._keys_for(entry)
+            self._refs[(entry.kind, entry.id)] = (entry, keys)
+            added.setdefault(entry.shard, []).extend((key, entry) for key in keys)
+
+        shards = dict(self._shards)
+        for shard_key in removed.keys() | added.keys():
+            current = shards.get(shard_key, _Shard([], []))
+            gone = removed.get(shard_key, ())
+            pairs = [pair for pair in zip(current.keys, current.entries) if id(pair[1]) not in gone]
+            # O trecho já ordenado é reaproveitado pelo sort (timsort)
+            pairs.extend(added.get(shard_key, ()))
+            if pairs:
+                shards[shard_key] = self._sorted(pairs)
+            else:
+                shards.pop(shard_key, None)
+        self._shards = shards
+
+    def remove(self, kind: str, ids: Iterable[int]):
+        with self._lock:
+            self._apply_locked([(kind, item_id) for item_id in ids], [])
+
+    @staticmethod
+    def _person_entry(person) -> AutocompleteEntry:
+        return AutocompleteEntry("person", person.id, person.name, person.cpf or person.cnpj, person.company_id)
+
+    @staticmethod
+    def _company_entry(company) -> AutocompleteEntry:
+        return AutocompleteEntry("company", company.id, company.trade_name, company.cnpj, company.id)
+
+    def sync_person(self, person):
+        """Atualiza a entrada de uma pessoa (objeto ORM ou linha com os mesmos atributos)"""
+        self._sync("person", [person], [], self._person_entry)
+
+    def sync_company(self, company):
+        """Atualiza a entrada de uma imobiliária"""
+        self._sync("company", [company], [], self._company_entry)
+
+    def _sync(self, kind: str, rows, missing: Iterable[int], make_entry):
+        removals = [(kind, row.id) for row in rows] + [(kind, item_id) for item_id in missing]
+        additions = [make_entry(row) for row in rows if row.is_active]
+        with self._lock:
+            self._apply_locked(removals, additions)
+
+    def sync_persons(self, db: Session, ids: Iterable[int]):
+        """Recarrega do banco as pessoas afetadas por uma operação em lote"""
+        ids = list(ids)
+        if not ids:
+            return
+        rows = db.query(
+            Person.id, Person.name, Person.cpf, Person.cnpj, Person.company_id, Person.is_active
+        ).execution_options(skip_tenant_filter=True).filter(Person.id.in_(ids)).all()
+        # Fora da tabela quente (arquivadas): saem do índice
+        self._sync("person", rows, set(ids) - {row.id for row in rows}, self._person_entry)
+
+    def sync_companies(self, db: Session, ids: Iterable[int]):
+        """Recarrega do banco as imobiliárias informadas"""
+        ids = list(ids)
+        if not ids:
+            return
+        rows = db.query(
+            Company.id, Company.trade_name, Company.cnpj, Company.is_active
+        ).filter(Company.id.in_(ids)).all()
+        self._sync("company", rows, set(ids) - {row.id for row in rows}, self._company_entry)
+
+    # ---------- consulta ----------
+
+    def search(
+        self,
+        query: str,
+        limit: int = 10,
+        kind: Optional[str] = None,
+        company_id: Optional[int] = None
+    ) -> List[AutocompleteEntry]:
+        """
+        Top-k entradas cujas palavras começam com os termos da consulta
+
+        Args:
+            query: Texto digitado (qualquer acentuação/caixa)
+            limit: Máximo de resultados
+            kind: "person" ou "company" (None = ambos)
+            company_id: Restringe pessoas a uma imobiliária
+        """
+        normalized = normalize(query)
+        digits = _NON_DIGIT.sub("", normalized)
+        if digits and not _LETTERS.search(normalized):
+            # Documento digitado com pontuação (ex.: "112.223") vira um único termo
+            terms = [digits]
+        else:
+            terms = normalized.split()
+        if not terms:
+            return []
+
+        # O termo mais longo costuma ser o mais seletivo
+        first = max(terms, key=len)
+        others = [term for term in terms if term is not first]
+
+        with self._lock:
+            shards = self._shards
+        selected = [
+            shard for (shard_kind, shard_company), shard in shards.items()
+            if (kind is None or shard_kind == kind)
+            and (company_id is None or shard_kind != "person" or shard_company == company_id)
+        ]
+
+        # Cada array já sai em ordem de chave: o merge só lê o necessário para o top-k
+        scans = [self._scan(shard, first, others) for shard in selected]
+        matches = heapq.merge(*scans, key=itemgetter(0)) if len(scans) > 1 else iter(scans[0] if scans else ())
+        return [entry for _, entry in itertools.islice(matches, limit)]
+
+    @staticmethod
+    def _scan(shard: _Shard, first: str, others: List[str]) -> Iterator[Tuple[str, AutocompleteEntry]]:
+        """
+        Entradas do intervalo de prefixo de `first`, em ordem de chave,
+        olhando no máximo AUTOCOMPLETE_MAX_SCAN posições
+        """
+        start = bisect.bisect_left(shard.keys, first)
+        end = bisect.bisect_right(shard.keys, first + _MAX_CHAR, lo=start)
+        seen = set()
+        for i in range(start, min(end, start + AUTOCOMPLETE_MAX_SCAN)):
+            entry = shard.entries[i]
+            if id(entry) in seen:
+                continue
+            if others and not all(any(word.startswith(term) for word in entry.words) for term in others):
+                continue
+            seen.add(id(entry))
+            yield shard.keys[i], entry
+
+
+autocomplete_index = AutocompleteIndex()
+
+
+@change_bus.on_remote
+def _sync_remote_changes(changes: Changes):
+    with SessionLocal() as db:
+        autocomplete_index.sync_persons(db, changes.get(Person.__tablename__, []))
+        autocomplete_index.sync_companies(db, changes.get(Company.__tablename__, []))
+
+
+@change_bus.on_resync
+def _rebuild_after_gap():
+    with SessionLocal() as db:
+        autocomplete_index.build(db)
+
+
+async def rebuild_periodically(interval: float = AUTOCOMPLETE_REBUILD_SECONDS):
+    """
+    Reconstrói o índice a cada `interval` segundos enquanto as escritas dos
+    demais processos (workers, varredura de CNPJs, scripts) não chegam pelo
+    canal de alterações
+    """
+    if interval <= 0:
+        return
+    while True:
+        await asyncio.sleep(interval)
+        if change_bus.state == "subscribed":
+            continue
+        try:
+            await asyncio.to_thread(_rebuild_after_gap)
+        except Exception:
+            logger.exception("Falha ao reconstruir o índice de autocomplete")
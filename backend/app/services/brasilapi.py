@@ -2,25 +2,146 @@
 Serviço de integração com BrasilAPI
 https://brasilapi.com.br/
 """
+import os
+
 import httpx
 from fastapi import HTTPException
-from typing import Dict, Any
+from typing import Dict, Any, Optional
+
+from ..middleware import deadline
+from .cache import TTLCache
+from .circuit_breaker import CircuitBreaker
 
 
 class BrasilAPIService:
     """
     Cliente para integração com BrasilAPI
+
+    As chamadas passam por um circuit breaker: enquanto a BrasilAPI estiver
+    fora, as requisições falham imediatamente (ou recebem a última resposta
+    conhecida, se houver) em vez de segurar o worker até o timeout.
     """
     BASE_URL = "https://brasilapi.com.br/api"
     TIMEOUT = 10.0
     
+    breaker = CircuitBreaker(
+        "brasilapi",
+        failure_rate_threshold=float(os.getenv("BRASILAPI_CB_FAILURE_RATE", "0.5")),
+        window_seconds=float(os.getenv("BRASILAPI_CB_WINDOW_SECONDS", "30")),
+        min_calls=int(os.getenv("BRASILAPI_CB_MIN_CALLS", "5")),
+        open_seconds=float(os.getenv("BRASILAPI_CB_OPEN_SECONDS", "30")),
+        # Maior que TIMEOUT: uma chamada de teste em andamento não é descartada
+        half_open_timeout=float(os.getenv("BRASILAPI_CB_PROBE_TIMEOUT_SECONDS", "15"))
+    )
+    
+    # Últimas respostas válidas, servidas quando a BrasilAPI está fora
+    stale_cache = TTLCache(
+        maxsize=int(os.getenv("BRASILAPI_STALE_CACHE_SIZE", "5000")),
+        ttl=float(os.getenv("BRASILAPI_STALE_MAX_AGE_SECONDS", "604800"))
+    )
+    
+    @staticmethod
+    def _fallback(cache_key: str, error: HTTPException, allow_stale: bool = True) -> Dict[str, Any]:
+        """Serve a última resposta conhecida (se permitido) ou propaga o erro"""
+        cached = BrasilAPIService.stale_cache.get(cache_key) if allow_stale else None
+        if cached is not None:
+            return cached
+        raise error
+    
+    @staticmethod
+    async def _get(
+        path: str,
+        cache_key: str,
+        recurso: str,
+        erros: Dict[int, str],
+        allow_stale: bool = True,
+        breaker: Optional[CircuitBreaker] = None
+    ) -> Dict[str, Any]:
+        """
+        GET na BrasilAPI protegido pelo circuit breaker e pelo prazo da requisição
+        
+        Args:
+            path: Caminho relativo a BASE_URL
+            cache_key: Chave da resposta no cache de fallback
+            recurso: Nome do recurso para mensagens de erro (CNPJ, CEP)
+            erros: Mensagens para status 4xx conhecidos
+            allow_stale: Se False, falhas da BrasilAPI nunca são respondidas
+                com a última resposta conhecida
+            breaker: Circuit breaker da chamada (padrão: o das consultas da API)
+        """
+        breaker = breaker or BrasilAPIService.breaker
+        
+        # O prazo é verificado antes de ocupar uma vaga de teste do circuito
+        timeout = deadline.timeout_for(BrasilAPIService.TIMEOUT)
+        if timeout <= 0:
+            raise HTTPException(
+                status_code=504,
+                detail="Prazo da requisição esgotado antes de consultar a BrasilAPI."
+            )
+        
+        if not breaker.allow_request():
+            return BrasilAPIService._fallback(cache_key, HTTPException(
+                status_code=503,
+                detail="BrasilAPI indisponível no momento. Tente novamente em instantes.",
+                headers={"Retry-After": str(breaker.retry_after())}
+            ), allow_stale)
+        
+        # None = chamada interrompida (ex.: requisição cancelada): devolve a vaga
+        success = None
+        try:
+            async with httpx.AsyncClient() as client:
+                response = await client.get(f"{BrasilAPIService.BASE_URL}{path}", timeout=timeout)
+            success = not (response.status_code >= 500 or response.status_code == 429)
+        except httpx.TimeoutException:
+            success = False
+            return BrasilAPIService._fallback(cache_key, HTTPException(
+                status_code=504,
+                detail="Timeout ao consultar BrasilAPI. Tente novamente."
+            ), allow_stale)
+        except httpx.RequestError as e:
+            success = False
+            return BrasilAPIService._fallback(cache_key, HTTPException(
+                status_code=503,
+                detail=f"Erro de conexão com BrasilAPI: {str(e)}"
+            ), allow_stale)
+        except Exception as e:
+            success = False
+            raise HTTPException(
+                status_code=500,
+                detail=f"Erro inesperado ao consultar {recurso}: {str(e)}"
+            )
+        finally:
+            breaker.finish(success)
+        
+        if not success:
+            return BrasilAPIService._fallback(cache_key, HTTPException(
+                status_code=500,
+                detail=f"Erro ao consultar {recurso} na BrasilAPI. Status: {response.status_code}"
+            ), allow_stale)
+        
+        if response.status_code == 200:
+            dados = response.json()
+            BrasilAPIService.stale_cache.set(cache_key, dados)
+            return dados
+        if response.status_code in erros:
+            raise HTTPException(status_code=response.status_code, detail=erros[response.status_code])
+        raise HTTPException(
+            status_code=500,
+            detail=f"Erro ao consultar {recurso} na BrasilAPI. Status: {response.status_code}"
+        )
+    
     @staticmethod
-    async def buscar_cnpj(cnpj: str) -> Dict[str, Any]:
+    async def buscar_cnpj(
+        cnpj: str, allow_stale: bool = True, breaker: Optional[CircuitBreaker] = None
+    ) -> Dict[str, Any]:
         """
         Busca dados de uma empresa pelo CNPJ na BrasilAPI
         
         Args:
             cnpj: CNPJ da empresa (com ou sem formatação)
+            allow_stale: Se False, não usa a última resposta conhecida quando
+                a BrasilAPI falha (a resposta é sempre uma consulta real)
+            breaker: Circuit breaker da chamada (padrão: o das consultas da API)
             
         Returns:
             Dicionário com dados da empresa
@@ -39,48 +160,17 @@ class BrasilAPIService:
             )
         
         # Faz requisição para BrasilAPI
-        async with httpx.AsyncClient() as client:
-            try:
-                response = await client.get(
-                    f"{BrasilAPIService.BASE_URL}/cnpj/v1/{cnpj_limpo}",
-                    timeout=BrasilAPIService.TIMEOUT
-                )
-                
-                if response.status_code == 200:
-                    return response.json()
-                elif response.status_code == 404:
-                    raise HTTPException(
-                        status_code=404,
-                        detail="CNPJ não encontrado na base de dados da Receita Federal."
-                    )
-                elif response.status_code == 400:
-                    raise HTTPException(
-                        status_code=400,
-                        detail="CNPJ inválido ou mal formatado."
-                    )
-                else:
-                    raise HTTPException(
-                        status_code=500,
-                        detail=f"Erro ao consultar CNPJ na BrasilAPI. Status: {response.status_code}"
-                    )
-                    
-            except httpx.TimeoutException:
-                raise HTTPException(
-                    status_code=504,
-                    detail="Timeout ao consultar BrasilAPI. Tente novamente."
-                )
-            except httpx.RequestError as e:
-                raise HTTPException(
-                    status_code=503,
-                    detail=f"Erro de conexão com BrasilAPI: {str(e)}"
-                )
-            except HTTPException:
-                raise
-            except Exception as e:
-                raise HTTPException(
-                    status_code=500,
-                    detail=f"Erro inesperado ao consultar CNPJ: {str(e)}"
-                )
+        return await BrasilAPIService._get(
+            f"/cnpj/v1/{cnpj_limpo}",
+            cache_key=f"cnpj:{cnpj_limpo}",
+            recurso="CNPJ",
+            erros={
+                404: "CNPJ não encontrado na base de dados da Receita Federal.",
+                400: "CNPJ inválido ou mal formatado."
+            },
+            allow_stale=allow_stale,
+            breaker=breaker
+        )
     
     @staticmethod
     async def buscar_cep(cep: str) -> Dict[str, Any]:
@@ -107,43 +197,12 @@ class BrasilAPIService:
             )
         
         # Faz requisição para BrasilAPI
-        async with httpx.AsyncClient() as client:
-            try:
-                response = await client.get(
-                    f"{BrasilAPIService.BASE_URL}/cep/v1/{cep_limpo}",
-                    timeout=BrasilAPIService.TIMEOUT
-                )
-                
-                if response.status_code == 200:
-                    return response.json()
-                elif response.status_code == 404:
-                    raise HTTPException(
-                        status_code=404,
-                        detail="CEP não encontrado."
-                    )
-                else:
-                    raise HTTPException(
-                        status_code=500,
-                        detail=f"Erro ao consultar CEP na BrasilAPI. Status: {response.status_code}"
-                    )
-                    
-            except httpx.TimeoutException:
-                raise HTTPException(
-                    status_code=504,
-                    detail="Timeout ao consultar BrasilAPI. Tente novamente."
-                )
-            except httpx.RequestError as e:
-                raise HTTPException(
-                    status_code=503,
-                    detail=f"Erro de conexão com BrasilAPI: {str(e)}"
-                )
-            except HTTPException:
-                raise
-            except Exception as e:
-                raise HTTPException(
-                    status_code=500,
-                    detail=f"Erro inesperado ao consultar CEP: {str(e)}"
-                )
+        return await BrasilAPIService._get(
+            f"/cep/v1/{cep_limpo}",
+            cache_key=f"cep:{cep_limpo}",
+            recurso="CEP",
+            erros={404: "CEP não encontrado."}
+        )
     
     @staticmethod
     def formatar_dados_empresa(dados: Dict[str, Any]) -> Dict[str, Any]:
@@ -0,0 +1,234 @@
+"""
+Alterações em pessoas e imobiliárias, propagadas entre os workers
+
+Os caches em memória (cache por ID, índice de autocomplete) são por
+processo. Este módulo junta os IDs alterados em cada transação e, após o
+commit:
+
+- avisa os ouvintes locais (`on_commit`)
+- publica no canal Redis CHANGES_CHANNEL; os demais processos (workers,
+  scripts de manutenção) recebem e avisam os ouvintes remotos (`on_remote`)
+
+Escritas pelo ORM são marcadas no evento `after_flush`; escritas fora do
+ORM (UPDATE/DELETE em lote) chamam `mark_changed`. Marcações de uma transação
+desfeita são descartadas.
+
+Todo processo que escreve no banco (workers da API, varredura de CNPJs,
+scripts de arquivamento e reconciliação) precisa de REDIS_URL para que suas
+alterações cheguem aos demais. Sem Redis, ou com a assinatura do canal
+caída, este processo não recebe as escritas dos outros - mesmo com um único
+worker da API -, e `change_bus.covers_all_workers()` é falso: os caches por
+processo ficam desligados ou apenas com TTL. Ao reconectar, mensagens podem
+ter sido perdidas, então os ouvintes de `on_resync` descartam ou reconstroem
+o que mantêm.
+"""
+import asyncio
+import json
+import logging
+import os
+import uuid
+from typing import Callable, Dict, Iterable, List
+
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+from ..models.models import Company, Person
+
+try:
+    import redis
+    from redis import asyncio as aioredis
+    from redis.exceptions import RedisError
+except ImportError:  # opcional: sem redis, alterações só no próprio processo
+    redis = None
+    aioredis = None
+    RedisError = OSError
+
+logger = logging.getLogger(__name__)
+
+REDIS_URL = os.getenv("REDIS_URL")
+CHANGES_CHANNEL = os.getenv("CHANGES_CHANNEL", "crm:changes")
+CHANGES_PUBLISH_TIMEOUT = float(os.getenv("CHANGES_PUBLISH_TIMEOUT_SECONDS", "0.2"))
+
+TRACKED_MODELS = (Person, Company)
+
+# {tabela: [ids]}
+Changes = Dict[str, List[int]]
+
+_PENDING_KEY = "changes_pending"
+
+
+def mark_changed(session: Session, model, ids: Iterable[int]):
+    """Registros de `model` alterados na transação de `session`"""
+    if model not in TRACKED_MODELS:
+        return
+    pending = session.info.setdefault(_PENDING_KEY, set())
+    pending.update((model.__tablename__, row_id) for row_id in ids)
+
+
+class ChangeBus:
+    """
+    Distribuição das alterações confirmadas entre os processos
+    """
+
+    def __init__(self, redis_url=REDIS_URL, channel: str = CHANGES_CHANNEL):
+        self.channel = channel
+        # Mensagens publicadas por este processo são ignoradas na assinatura
+        self.origin = uuid.uuid4().hex
+        self._redis_url = redis_url if redis is not None else None
+        self._publisher = None
+        self._local: List[Callable[[Changes], None]] = []
+        self._remote: List[Callable[[Changes], None]] = []
+        self._resync: List[Callable[[], None]] = []
+        self._task = None
+        self._subscribed = False
+
+    # ---------- ouvintes ----------
+
+    def on_commit(self, handler: Callable[[Changes], None]):
+        """Alterações confirmadas neste processo"""
+        self._local.append(handler)
+        return handler
+
+    def on_remote(self, handler: Callable[[Changes], None]):
+        """Alterações confirmadas em outro processo (chamado fora do event loop)"""
+        self._remote.append(handler)
+        return handler
+
+    def on_resync(self, handler: Callable[[], None]):
+        """Assinatura restabelecida após queda (chamado fora do event loop)"""
+        self._resync.append(handler)
+        return handler
+
+    @property
+    def state(self) -> str:
+        """disabled (sem Redis), subscribed ou disconnected"""
+        if self._redis_url is None:
+            return "disabled"
+        return "subscribed" if self._subscribed else "disconnected"
+
+    def covers_all_workers(self) -> bool:
+        """
+        Se as alterações de qualquer processo que escreve chegam a este
+
+        Só com a assinatura ativa: sem ela, nem um único worker da API vê as
+        escritas da varredura de CNPJs ou dos scripts de manutenção
+        """
+        return self._subscribed
+
+    def warn_if_disabled(self):
+        """Avisa, em processos que escrevem, que as alterações não serão publicadas"""
+        if self._redis_url is None:
+            logger.warning(
+                "REDIS_URL não definido: as alterações deste processo não chegam aos caches dos workers da API"
+            )
+
+    # ---------- publicação ----------
+
+    def committed(self, changes: Changes):
+        for handler in self._local:
+            handler(changes)
+        self._publish(changes)
+
+    def _publish(self, changes: Changes):
+        if self._redis_url is None:
+            return
+        if self._publisher is None:
+            self._publisher = redis.Redis.from_url(
+                self._redis_url,
+                socket_timeout=CHANGES_PUBLISH_TIMEOUT,
+                socket_connect_timeout=CHANGES_PUBLISH_TIMEOUT
+            )
+        try:
+            self._publisher.publish(self.channel, json.dumps({"origin": self.origin, "changes": changes}))
+        except (RedisError, OSError) as exc:
+            logger.warning("Falha ao publicar alterações para os demais workers: %s", exc)
+
+    # ---------- assinatura ----------
+
+    async def start(self, connect_timeout: float = 2.0):
+        """Assina o canal; aguarda a primeira conexão por até `connect_timeout`"""
+        if self._redis_url is None or self._task is not None:
+            return
+        connected = asyncio.Event()
+        self._task = asyncio.create_task(self._listen(connected))
+        try:
+            await asyncio.wait_for(connected.wait(), connect_timeout)
+        except asyncio.TimeoutError:
+            logger.warning("Canal de alterações indisponível; caches por processo sem invalidação entre workers")
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def _listen(self, connected: asyncio.Event):
+        client = aioredis.from_url(self._redis_url, socket_keepalive=True, health_check_interval=30)
+        delay = 1.0
+        first = True
+        while True:
+            pubsub = client.pubsub(ignore_subscribe_messages=True)
+            try:
+                await pubsub.subscribe(self.channel)
+                self._subscribed = True
+                connected.set()
+                if not first:
+                    # Alterações publicadas durante a queda foram perdidas
+                    for handler in self._resync:
+                        await asyncio.to_thread(handler)
+                first = False
+                delay = 1.0
+                async for message in pubsub.listen():
+                    await self._dispatch(message)
+            except asyncio.CancelledError:
+                raise
+            except (RedisError, OSError) as exc:
+                logger.warning("Assinatura do canal de alterações caiu: %s", exc)
+            finally:
+                self._subscribed = False
+                await pubsub.aclose()
+            await asyncio.sleep(delay)
+            delay = min(delay * 2, 30.0)
+
+    async def _dispatch(self, message: dict):
+        try:
+            payload = json.loads(message["data"])
+        except (TypeError, ValueError):
+            return
+        if payload.get("origin") == self.origin:
+            return
+        changes = payload.get("changes") or {}
+        for handler in self._remote:
+            try:
+                await asyncio.to_thread(handler, changes)
+            except Exception:
+                logger.exception("Erro ao aplicar alterações de outro worker")
+
+
+change_bus = ChangeBus()
+
+
+@event.listens_for(Session, "after_flush")
+def _mark_flushed(session, flush_context):
+    for obj in list(session.new) + list(session.dirty) + list(session.deleted):
+        if type(obj) in TRACKED_MODELS:
+            mark_changed(session, type(obj), [obj.id])
+
+
+@event.listens_for(Session, "after_commit")
+def _publish_committed(session):
+    pending = session.info.pop(_PENDING_KEY, None)
+    if not pending:
+        return
+    changes: Changes = {}
+    for table, row_id in pending:
+        changes.setdefault(table, []).append(row_id)
+    change_bus.committed(changes)
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_pending(session):
+    session.info.pop(_PENDING_KEY, None)
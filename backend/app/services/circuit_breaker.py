@@ -0,0 +1,148 @@
+"""
+Circuit breaker para dependências externas
+"""
+import threading
+import time
+from collections import deque
+from enum import Enum
+from typing import Optional
+
+
+class CircuitState(str, Enum):
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+
+class CircuitBreaker:
+    """
+    Circuit breaker com janela deslizante de taxa de falhas
+
+    - CLOSED: chamadas passam; abre quando, dentro de `window_seconds`, houver
+      pelo menos `min_calls` chamadas e a taxa de falhas atingir
+      `failure_rate_threshold`
+    - OPEN: chamadas falham imediatamente por `open_seconds`
+    - HALF_OPEN: deixa passar até `half_open_max_calls` chamadas de teste;
+      um sucesso fecha o circuito, uma falha reabre. Uma chamada de teste
+      sem resultado após `half_open_timeout` também reabre o circuito
+
+    Toda chamada liberada por `allow_request` precisa terminar em
+    `finish(sucesso)`; com `None` (chamada não feita ou cancelada), a vaga
+    de teste é devolvida sem contar como sucesso ou falha.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        failure_rate_threshold: float = 0.5,
+        window_seconds: float = 30.0,
+        min_calls: int = 5,
+        open_seconds: float = 30.0,
+        half_open_max_calls: int = 1,
+        half_open_timeout: Optional[float] = None
+    ):
+        self.name = name
+        self.failure_rate_threshold = failure_rate_threshold
+        self.window_seconds = window_seconds
+        self.min_calls = min_calls
+        self.open_seconds = open_seconds
+        self.half_open_max_calls = half_open_max_calls
+        self.half_open_timeout = open_seconds if half_open_timeout is None else half_open_timeout
+
+        self._state = CircuitState.CLOSED
+        self._opened_at = 0.0
+        self._half_open_calls = 0
+        self._probe_started_at = 0.0
+        self._calls: deque = deque()  # (timestamp, sucesso)
+        self._lock = threading.Lock()
+
+    @property
+    def state(self) -> CircuitState:
+        with self._lock:
+            return self._current_state(time.monotonic())
+
+    def _current_state(self, now: float) -> CircuitState:
+        if self._state == CircuitState.OPEN and now - self._opened_at >= self.open_seconds:
+            self._state = CircuitState.HALF_OPEN
+            self._half_open_calls = 0
+        if (self._state == CircuitState.HALF_OPEN and self._half_open_calls
+                and now - self._probe_started_at >= self.half_open_timeout):
+            # Chamada de teste perdida (sem resultado): volta a aguardar
+            self._open(now)
+        return self._state
+
+    def retry_after(self) -> int:
+        """Segundos até o circuito aceitar uma chamada de teste"""
+        with self._lock:
+            remaining = self.open_seconds - (time.monotonic() - self._opened_at)
+        return max(1, int(remaining + 0.999))
+
+    def allow_request(self) -> bool:
+        with self._lock:
+            now = time.monotonic()
+            state = self._current_state(now)
+            if state == CircuitState.CLOSED:
+                return True
+            if state == CircuitState.HALF_OPEN and self._half_open_calls < self.half_open_max_calls:
+                if not self._half_open_calls:
+                    self._probe_started_at = now
+                self._half_open_calls += 1
+                return True
+            return False
+
+    def release(self):
+        """Devolve a vaga de uma chamada liberada que terminou sem resultado"""
+        with self._lock:
+            if self._current_state(time.monotonic()) == CircuitState.HALF_OPEN and self._half_open_calls:
+                self._half_open_calls -= 1
+
+    def finish(self, success: Optional[bool]):
+        """Registra o resultado de uma chamada liberada (None = sem resultado)"""
+        if success is None:
+            self.release()
+        elif success:
+            self.record_success()
+        else:
+            self.record_failure()
+
+    def record_success(self):
+        with self._lock:
+            now = time.monotonic()
+            if self._current_state(now) == CircuitState.HALF_OPEN:
+                self._close()
+                return
+            self._record(now, True)
+
+    def record_failure(self):
+        with self._lock:
+            now = time.monotonic()
+            state = self._current_state(now)
+            if state == CircuitState.HALF_OPEN:
+                self._open(now)
+                return
+            self._record(now, False)
+            if state == CircuitState.CLOSED and self._should_open():
+                self._open(now)
+
+    def _record(self, now: float, success: bool):
+        self._calls.append((now, success))
+        while self._calls and now - self._calls[0][0] > self.window_seconds:
+            self._calls.popleft()
+
+    def _should_open(self) -> bool:
+        total = len(self._calls)
+        if total < self.min_calls:
+            return False
+        failures = sum(1 for _, success in self._calls if not success)
+        return failures / total >= self.failure_rate_threshold
+
+    def _open(self, now: float):
+        self._state = CircuitState.OPEN
+        self._opened_at = now
+        self._half_open_calls = 0
+        self._calls.clear()
+
+    def _close(self):
+        self._state = CircuitState.CLOSED
+        self._half_open_calls = 0
+        self._calls.clear()
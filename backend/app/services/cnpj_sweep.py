@@ -0,0 +1,260 @@
+"""
+Revalidação periódica da situação cadastral dos CNPJs armazenados
+
+A varredura percorre `companies` e as pessoas PJ de `persons` em lotes
+pequenos, ordenados por ID, com a taxa de consultas à BrasilAPI limitada.
+Como cada varredura anda em ordem crescente de ID, a ordem de ID coincide
+com a ordem da última verificação: a próxima varredura começa sempre pelos
+registros verificados há mais tempo.
+
+O progresso (último ID processado) fica em `cnpj_sweep_state`, então um
+reinício retoma a varredura do ponto onde parou. Só as linhas cuja situação
+realmente mudou são escritas.
+
+Cada situação gravada vem de uma consulta real: a varredura não usa a última
+resposta conhecida (cache de fallback do BrasilAPIService) e tem o próprio
+circuit breaker, para que suas falhas não abram o circuito das consultas
+interativas. Com a BrasilAPI fora, o lote para na linha que falhou e o
+progresso fica no último registro realmente verificado.
+
+Roda como processo separado (`python -m scripts.cnpj_sweep`) para não
+disputar workers nem conexões com a API.
+"""
+import asyncio
+import logging
+import os
+import time
+from datetime import datetime, timedelta, timezone
+from typing import Optional
+
+from fastapi import HTTPException
+from sqlalchemy.orm import Session
+
+from ..database import SessionLocal
+from ..models.models import CNPJSweepState, Company, Person, PersonType
+from .brasilapi import BrasilAPIService
+from .changes import mark_changed
+from .circuit_breaker import CircuitBreaker
+from .history import HistoryService
+
+logger = logging.getLogger(__name__)
+
+
+class UpstreamUnavailable(Exception):
+    """BrasilAPI indisponível - a varredura deve aguardar e tentar de novo"""
+
+
+class CNPJSweepService:
+    """
+    Varredura incremental de CNPJs com controle de taxa
+    """
+    BATCH_SIZE = int(os.getenv("CNPJ_SWEEP_BATCH_SIZE", "50"))
+    RATE_PER_MINUTE = float(os.getenv("CNPJ_SWEEP_RATE_PER_MINUTE", "60"))
+    INTERVAL = timedelta(hours=float(os.getenv("CNPJ_SWEEP_INTERVAL_HOURS", "168")))
+    IDLE_SLEEP = float(os.getenv("CNPJ_SWEEP_IDLE_SECONDS", "300"))
+    BACKOFF_SLEEP = float(os.getenv("CNPJ_SWEEP_BACKOFF_SECONDS", "60"))
+
+    # Separado de BrasilAPIService.breaker (consultas interativas da API)
+    breaker = CircuitBreaker(
+        "brasilapi_sweep",
+        open_seconds=BACKOFF_SLEEP,
+        half_open_timeout=BrasilAPIService.TIMEOUT + 5
+    )
+
+    # Tabelas varridas, na ordem de processamento
+    ENTITIES = ("companies", "persons")
+
+    # Situações registradas quando a BrasilAPI não devolve a situação
+    NAO_ENCONTRADO = "NÃO ENCONTRADO"
+    INVALIDO = "CNPJ INVÁLIDO"
+
+    def __init__(self, session_factory=SessionLocal):
+        self.session_factory = session_factory
+        self._next_call_at = 0.0
+
+    # ---------- consultas ao banco ----------
+
+    @staticmethod
+    def _model(entity: str):
+        return Company if entity == "companies" else Person
+
+    @staticmethod
+    def _load_state(db: Session, entity: str) -> CNPJSweepState:
+        state = db.get(CNPJSweepState, entity)
+        if state is None:
+            state = CNPJSweepState(entity=entity, last_id=0, rows_checked=0, rows_changed=0)
+            db.add(state)
+            db.flush()
+        return state
+
+    @classmethod
+    def _next_batch(cls, db: Session, entity: str, last_id: int):
+        model = cls._model(entity)
+        query = db.query(model.id, model.cnpj, model.situacao_cadastral).filter(
+            model.id > last_id,
+            model.cnpj.isnot(None)
+        )
+        if model is Person:
+            query = query.filter(Person.person_type == PersonType.PJ)
+        return query.order_by(model.id).limit(cls.BATCH_SIZE).all()
+
+    @staticmethod
+    def count_pending(db: Session) -> int:
+        """Total de CNPJs cobertos pela varredura"""
+        total_companies = db.query(Company).filter(Company.cnpj.isnot(None)).count()
+        total_pj = db.query(Person).filter(
+            Person.person_type == PersonType.PJ,
+            Person.cnpj.isnot(None)
+        ).count()
+        return total_companies + total_pj
+
+    # ---------- consulta à BrasilAPI ----------
+
+    async def _throttle(self):
+        """Espaça as consultas para respeitar RATE_PER_MINUTE"""
+        interval = 60.0 / self.RATE_PER_MINUTE
+        now = time.monotonic()
+        if self._next_call_at > now:
+            await asyncio.sleep(self._next_call_at - now)
+        self._next_call_at = max(now, self._next_call_at) + interval
+
+    async def consultar_situacao(self, cnpj: str) -> str:
+        """
+        Consulta a situação cadastral atual de um CNPJ
+
+        Raises:
+            UpstreamUnavailable: Se a BrasilAPI falhar (timeout, 5xx, circuito
+                aberto etc.); nunca responde com dados em cache
+        """
+        await self._throttle()
+        try:
+            dados = await BrasilAPIService.buscar_cnpj(cnpj, allow_stale=False, breaker=self.breaker)
+        except HTTPException as e:
+            if e.status_code == 404:
+                return self.NAO_ENCONTRADO
+            if e.status_code == 400:
+                return self.INVALIDO
+            raise UpstreamUnavailable(e.detail)
+        return dados.get("descricao_situacao_cadastral") or self.NAO_ENCONTRADO
+
+    # ---------- varredura ----------
+
+    async def run_batch(self, entity: str) -> Optional[int]:
+        """
+        Processa um lote da varredura de `entity`
+
+        Returns:
+            Quantidade de linhas verificadas, ou None se a varredura está
+            concluída e a próxima ainda não venceu
+        """
+        model = self._model(entity)
+        db = self.session_factory()
+        try:
+            state = self._load_state(db, entity)
+            now = datetime.now(timezone.utc)
+
+            if state.sweep_finished_at is not None:
+                started_at = state.sweep_started_at
+                if started_at.tzinfo is None:
+                    started_at = started_at.replace(tzinfo=timezone.utc)
+                if now < started_at + self.INTERVAL:
+                    db.commit()
+                    return None
+                state.sweep_started_at = None
+
+            if state.sweep_started_at is None:
+                # Nova varredura
+                state.sweep_started_at = now
+                state.sweep_finished_at = None
+                state.last_id = 0
+                state.rows_checked = 0
+                state.rows_changed = 0
+
+            rows = self._next_batch(db, entity, state.last_id)
+            if not rows:
+                state.sweep_finished_at = now
+                db.commit()
+                logger.info(
+                    "Varredura de %s concluída: %s verificados, %s alterados",
+                    entity, state.rows_checked, state.rows_changed
+                )
+                return 0
+
+            last_id = state.last_id
+            rows_checked = state.rows_checked
+            rows_changed = state.rows_changed
+
+            def save_progress():
+                state.last_id = last_id
+                state.rows_checked = rows_checked
+                state.rows_changed = rows_changed
+                db.commit()
+
+            # Não segura transação aberta enquanto aguarda a BrasilAPI
+            db.commit()
+
+            checked = 0
+            try:
+                for row_id, cnpj, situacao_atual in rows:
+                    situacao = await self.consultar_situacao(cnpj)
+                    last_id = row_id
+                    rows_checked += 1
+                    checked += 1
+                    if situacao != situacao_atual:
+                        rows_changed += 1
+                        db.query(model).filter(model.id == row_id).update(
+                            {
+                                model.situacao_cadastral: situacao,
+                                model.situacao_changed_at: datetime.now(timezone.utc)
+                            },
+                            synchronize_session=False
+                        )
+                        mark_changed(db, model, [row_id])
+                        HistoryService.record(
+                            db, model, row_id, {"situacao_cadastral": [situacao_atual, situacao]}
+                        )
+                        save_progress()
+            finally:
+                # Persiste o progresso até a última linha verificada com sucesso
+                save_progress()
+            return checked
+        finally:
+            db.close()
+
+    async def run_forever(self):
+        """
+        Loop do agendador: processa lotes enquanto houver trabalho e dorme
+        quando todas as varreduras da janela estiverem concluídas
+        """
+        self._log_quota()
+        while True:
+            try:
+                results = [await self.run_batch(entity) for entity in self.ENTITIES]
+            except UpstreamUnavailable as e:
+                logger.warning("BrasilAPI indisponível (%s), aguardando %.0fs", e, self.BACKOFF_SLEEP)
+                await asyncio.sleep(self.BACKOFF_SLEEP)
+                continue
+
+            if all(result is None for result in results):
+                await asyncio.sleep(self.IDLE_SLEEP)
+
+    def _log_quota(self):
+        """Avisa se a taxa configurada não cobre a base dentro da janela"""
+        db = self.session_factory()
+        try:
+            total = self.count_pending(db)
+        finally:
+            db.close()
+
+        sweep_hours = total / self.RATE_PER_MINUTE / 60
+        window_hours = self.INTERVAL.total_seconds() / 3600
+        logger.info(
+            "Varredura de CNPJs: %s registros, ~%.1fh por varredura (janela de %.0fh)",
+            total, sweep_hours, window_hours
+        )
+        if sweep_hours > window_hours:
+            logger.warning(
+                "CNPJ_SWEEP_RATE_PER_MINUTE=%s não cobre a base na janela; "
+                "aumente a taxa ou CNPJ_SWEEP_INTERVAL_HOURS",
+                self.RATE_PER_MINUTE
+            )
@@ -0,0 +1,112 @@
+"""
+Total de registros para listagens paginadas
+
+Um COUNT(*) exato sobre conjuntos grandes custa tanto quanto a própria
+listagem. A estratégia usada:
+
+- exact:            conta até COUNT_EXACT_THRESHOLD + 1 linhas; se couber, é o total
+- reltuples:        sem filtros, usa a estimativa de `pg_class.reltuples`
+- planner_estimate: com filtros, usa as linhas estimadas pelo planner (EXPLAIN)
+
+`exact=True` força o COUNT(*) completo.
+"""
+import os
+from typing import List, Optional, Sequence, Tuple
+
+from sqlalchemy import func, select, text
+from sqlalchemy.ext.compiler import compiles
+from sqlalchemy.orm import Session
+from sqlalchemy.sql.expression import ClauseElement, Executable
+
+EXACT = "exact"
+RELTUPLES = "reltuples"
+PLANNER_ESTIMATE = "planner_estimate"
+
+COUNT_EXACT_THRESHOLD = int(os.getenv("COUNT_EXACT_THRESHOLD", "1000"))
+
+
+class Explain(Executable, ClauseElement):
+    """
+    `EXPLAIN (FORMAT JSON) <consulta>` executável pela sessão
+
+    Executado como qualquer consulta, os parâmetros passam pelos bind
+    processors dos tipos (ex.: enums enviados pelo nome do membro).
+    """
+    inherit_cache = False
+
+    def __init__(self, statement):
+        self.statement = statement
+
+
+@compiles(Explain, "postgresql")
+def _compile_explain(element, compiler, **kw):
+    return "EXPLAIN (FORMAT JSON) " + compiler.process(element.statement, **kw)
+
+
+class CountService:
+    """
+    Totais exatos ou estimados para listagens
+    """
+
+    @staticmethod
+    def _exact(db: Session, model, conditions: List, limit: Optional[int] = None) -> int:
+        base = select(model.id).where(*conditions)
+        if limit is not None:
+            base = base.limit(limit)
+        return db.scalar(select(func.count()).select_from(base.subquery()))
+
+    @staticmethod
+    def _reltuples(db: Session, model) -> int:
+        estimate = db.scalar(
+            text("SELECT reltuples::bigint FROM pg_class WHERE oid = CAST(:table AS regclass)"),
+            {"table": model.__table__.name}
+        )
+        # -1 = tabela nunca analisada
+        return -1 if estimate is None else int(estimate)
+
+    @staticmethod
+    def _planner_rows(db: Session, model, conditions: List) -> int:
+        plan = db.execute(Explain(select(model.id).where(*conditions))).scalar()
+        return int(plan[0]["Plan"]["Plan Rows"])
+
+    @classmethod
+    def count(cls, db: Session, model, conditions: List, exact: bool = False) -> Tuple[int, str]:
+        """
+        Total de `model` que satisfaz `conditions`
+
+        Returns:
+            (total, estratégia usada)
+        """
+        if exact:
+            return cls._exact(db, model, conditions), EXACT
+
+        bounded = cls._exact(db, model, conditions, limit=COUNT_EXACT_THRESHOLD + 1)
+        if bounded <= COUNT_EXACT_THRESHOLD:
+            return bounded, EXACT
+
+        if db.get_bind().dialect.name != "postgresql":
+            return cls._exact(db, model, conditions), EXACT
+
+        if not conditions:
+            estimate = cls._reltuples(db, model)
+            if estimate >= 0:
+                return max(estimate, bounded), RELTUPLES
+
+        return max(cls._planner_rows(db, model, conditions), bounded), PLANNER_ESTIMATE
+
+    @classmethod
+    def count_many(cls, db: Session, parts: Sequence[Tuple], exact: bool = False) -> Tuple[int, str]:
+        """
+        Soma dos totais de várias tabelas (ex.: tabela quente + arquivo)
+
+        Args:
+            parts: Pares (model, conditions)
+        """
+        total = 0
+        strategy = EXACT
+        for model, conditions in parts:
+            count, part_strategy = cls.count(db, model, conditions, exact)
+            total += count
+            if part_strategy != EXACT:
+                strategy = part_strategy
+        return total, strategy
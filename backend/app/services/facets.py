@@ -0,0 +1,126 @@
+"""
+Contagens por faceta (filtros laterais) para as listagens
+
+Todas as facetas de uma listagem saem de uma única consulta com
+GROUPING SETS no PostgreSQL (um GROUP BY por faceta nos demais bancos,
+usados apenas em desenvolvimento), cacheada por chave normalizada dos filtros.
+
+O cache é por processo, com TTL curto (FACETS_CACHE_TTL_SECONDS): as escritas
+deste worker o esvaziam nas rotas, e as de outros processos pelo canal de
+alterações (services/changes.py). Sem a assinatura do canal, as contagens
+podem ficar defasadas até o TTL.
+"""
+import os
+from enum import Enum
+from typing import Dict, Iterable, List, Optional
+
+from sqlalchemy import func, select
+from sqlalchemy.orm import Session
+
+from .cache import TTLCache
+from .changes import Changes, change_bus
+
+FacetCounts = Dict[str, Dict[str, int]]
+
+facet_cache = TTLCache(
+    maxsize=int(os.getenv("FACETS_CACHE_SIZE", "1024")),
+    ttl=float(os.getenv("FACETS_CACHE_TTL_SECONDS", "30"))
+)
+
+
+def _facet_key(value) -> str:
+    if value is None:
+        return "null"
+    if isinstance(value, Enum):
+        return str(value.value)
+    if isinstance(value, bool):
+        return "true" if value else "false"
+    return str(value)
+
+
+def cache_key(entity: str, filters: dict, tenant_id: Optional[int] = None) -> tuple:
+    """Chave do cache: filtros sem valores vazios, busca normalizada, ordem fixa"""
+    normalized = []
+    for name in sorted(filters):
+        value = filters[name]
+        if value is None or value == "":
+            continue
+        if name == "search":
+            value = value.strip().lower()
+        normalized.append((name, _facet_key(value)))
+    return (entity, tenant_id, tuple(normalized))
+
+
+class FacetService:
+    """
+    Calcula contagens agrupadas para um conjunto de colunas
+    """
+
+    @staticmethod
+    def cached(
+        db: Session,
+        entity: str,
+        model,
+        filters: dict,
+        conditions: List,
+        fields: Iterable[str],
+        tenant_id: Optional[int] = None
+    ) -> FacetCounts:
+        """Facetas da listagem, servidas do cache quando os filtros se repetem"""
+        key = cache_key(entity, filters, tenant_id)
+        facets = facet_cache.get(key)
+        if facets is None:
+            facets = FacetService.compute(db, model, conditions, fields)
+            facet_cache.set(key, facets)
+        return facets
+
+    @staticmethod
+    def compute(db: Session, model, conditions: List, fields: Iterable[str]) -> FacetCounts:
+        """
+        Contagens de `model` por valor de cada coluna em `fields`
+
+        Args:
+            conditions: Condições WHERE da listagem atual
+            fields: Nomes das colunas facetadas
+        """
+        fields = list(fields)
+        columns = [getattr(model, name) for name in fields]
+        facets: FacetCounts = {name: {} for name in fields}
+
+        if db.get_bind().dialect.name == "postgresql":
+            # Uma linha por (faceta, valor); GROUPING(col) = 0 indica a faceta da linha
+            stmt = (
+                select(
+                    *columns,
+                    *[func.grouping(column) for column in columns],
+                    func.count()
+                )
+                .where(*conditions)
+                .group_by(func.grouping_sets(*columns))
+            )
+            for row in db.execute(stmt):
+                values = row[:len(fields)]
+                flags = row[len(fields):2 * len(fields)]
+                count = row[-1]
+                for name, value, flag in zip(fields, values, flags):
+                    if flag == 0:
+                        facets[name][_facet_key(value)] = count
+                        break
+            return facets
+
+        # Sem GROUPING SETS: um GROUP BY por faceta
+        for name, column in zip(fields, columns):
+            stmt = select(column, func.count()).where(*conditions).group_by(column)
+            for value, count in db.execute(stmt):
+                facets[name][_facet_key(value)] = count
+        return facets
+
+
+@change_bus.on_remote
+def _clear_on_remote_change(changes: Changes):
+    facet_cache.clear()
+
+
+@change_bus.on_resync
+def _clear_after_gap():
+    facet_cache.clear()
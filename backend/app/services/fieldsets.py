@@ -0,0 +1,48 @@
+"""
+Sparse fieldsets (`fields=`) nas rotas de leitura
+
+Com `fields=name,email,role` a consulta seleciona só essas colunas e a
+resposta traz só essas chaves (além de `id`, sempre incluído). Os nomes
+aceitos são os campos do schema de resposta da rota.
+"""
+from typing import Iterable, List, Optional, Tuple, Type
+
+from fastapi import HTTPException
+from fastapi.encoders import jsonable_encoder
+from pydantic import BaseModel
+
+from ..middleware.encoding import NegotiatedResponse
+
+
+def parse_fields(fields: Optional[str], schema: Type[BaseModel]) -> Optional[Tuple[str, ...]]:
+    """
+    Valida `fields` contra os campos de `schema`
+
+    Returns:
+        Nomes selecionados, com `id` primeiro, ou None para todos os campos
+    """
+    if not fields:
+        return None
+    requested = [name.strip() for name in fields.split(",") if name.strip()]
+    unknown = sorted(set(requested) - set(schema.model_fields))
+    if unknown:
+        raise HTTPException(status_code=400, detail=f"Campos inválidos: {', '.join(unknown)}")
+    return ("id",) + tuple(name for name in dict.fromkeys(requested) if name != "id")
+
+
+def columns(model, names: Iterable[str]) -> List:
+    return [getattr(model, name) for name in names]
+
+
+def serialize(row, names: Iterable[str]) -> dict:
+    return {name: getattr(row, name) for name in names}
+
+
+def pick(item: dict, names: Iterable[str]) -> dict:
+    """Campos selecionados de uma resposta já serializada"""
+    return {name: item[name] for name in names}
+
+
+def response(content) -> NegotiatedResponse:
+    """Resposta sem passar pelo response_model, que exigiria todos os campos"""
+    return NegotiatedResponse(content=jsonable_encoder(content))
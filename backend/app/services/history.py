@@ -0,0 +1,242 @@
+"""
+Histórico de alterações (change_history) de pessoas e imobiliárias
+
+Cada escrita grava apenas os campos alterados, {campo: [antes, depois]},
+na mesma transação da alteração:
+
+- escritas pelo ORM (create/update/delete das rotas) são capturadas no
+  evento `after_flush` da sessão, a partir do histórico dos atributos
+- operações em lote usam `HistoryService.bulk_update`, que lê os valores
+  antigos (FOR UPDATE) antes do UPDATE
+
+A linha do tempo de um registro usa o índice (entity_type, entity_id,
+changed_at); o estado em um instante é reconstruído a partir do registro
+atual desfazendo as alterações posteriores a ele.
+"""
+import logging
+from datetime import date, datetime
+from typing import List, Optional
+
+from fastapi.encoders import jsonable_encoder
+from sqlalchemy import event, inspect, insert, select, text, update
+from sqlalchemy.engine import Engine
+from sqlalchemy.orm import Session
+
+from ..database import ids_match
+from ..models.models import ChangeHistory, Company, Person
+from .changes import mark_changed
+from .rollups import ROLLUP_FIELDS, RollupService
+
+logger = logging.getLogger(__name__)
+
+TRACKED = {Person: "person", Company: "company"}
+
+# Atualizado a cada escrita; não entra no diff
+IGNORED_FIELDS = {"updated_at"}
+
+CREATE = "create"
+UPDATE = "update"
+
+
+def _diff(obj, created: bool) -> dict:
+    """Campos alterados de um objeto ORM ainda com o histórico do flush"""
+    state = inspect(obj)
+    changes = {}
+    for attr in state.mapper.column_attrs:
+        if attr.key in IGNORED_FIELDS:
+            continue
+        history = state.attrs[attr.key].history
+        if not history.added:
+            continue
+        new = history.added[0]
+        old = None if created or not history.deleted else history.deleted[0]
+        if new is None and old is None:
+            continue
+        changes[attr.key] = [old, new]
+    return jsonable_encoder(changes)
+
+
+@event.listens_for(Session, "after_flush")
+def _record_changes(session, flush_context):
+    if session.info.get("skip_history"):
+        return
+    rows = []
+    for obj, operation in [(obj, CREATE) for obj in session.new] + [(obj, UPDATE) for obj in session.dirty]:
+        entity_type = TRACKED.get(type(obj))
+        if entity_type is None:
+            continue
+        changes = _diff(obj, created=operation == CREATE)
+        if changes:
+            rows.append({
+                "entity_type": entity_type,
+                "entity_id": obj.id,
+                "operation": operation,
+                "changes": changes
+            })
+    if rows:
+        session.connection().execute(insert(ChangeHistory.__table__), rows)
+
+
+class HistoryService:
+    """
+    Gravação e consulta do histórico de alterações
+    """
+
+    @staticmethod
+    def record(db: Session, model, entity_id: int, changes: dict):
+        """Grava uma alteração feita fora do ORM (ex.: UPDATE direto)"""
+        db.execute(insert(ChangeHistory.__table__).values(
+            entity_type=TRACKED[model],
+            entity_id=entity_id,
+            operation=UPDATE,
+            changes=jsonable_encoder(changes)
+        ))
+        mark_changed(db, model, [entity_id])
+
+    @staticmethod
+    def bulk_update(db: Session, model, conditions: List, values: dict) -> List[int]:
+        """
+        UPDATE em lote com o diff de cada linha gravado no histórico
+        (e, para pessoas, os contadores das imobiliárias ajustados)
+
+        Returns:
+            IDs das linhas que satisfizeram `conditions`
+        """
+        fields = [name for name in values if name not in IGNORED_FIELDS]
+        selected = list(dict.fromkeys(fields + (list(ROLLUP_FIELDS) if model is Person else [])))
+        old_rows = db.execute(
+            select(model.id, *[getattr(model, name) for name in selected])
+            .where(*conditions)
+            .order_by(model.id)
+            .with_for_update()
+        ).all()
+        ids = [row.id for row in old_rows]
+        if not ids:
+            return []
+
+        db.execute(
+            update(model)
+            .where(ids_match(model.id, ids))
+            .values(**values)
+            .execution_options(synchronize_session=False)
+        )
+        mark_changed(db, model, ids)
+        if model is Person:
+            RollupService.apply_rows(db, old_rows, values)
+
+        new = jsonable_encoder({name: values[name] for name in fields})
+        rows = []
+        for row in old_rows:
+            old = jsonable_encoder({name: getattr(row, name) for name in fields})
+            changes = {name: [old[name], new[name]] for name in fields if old[name] != new[name]}
+            if changes:
+                rows.append({
+                    "entity_type": TRACKED[model],
+                    "entity_id": row.id,
+                    "operation": UPDATE,
+                    "changes": changes
+                })
+        if rows:
+            db.execute(insert(ChangeHistory.__table__), rows)
+        return ids
+
+    @staticmethod
+    def timeline(db: Session, model, entity_id: int, skip: int = 0, limit: int = 100) -> List[ChangeHistory]:
+        """Alterações de um registro, mais recentes primeiro"""
+        return (
+            db.query(ChangeHistory)
+            .filter(
+                ChangeHistory.entity_type == TRACKED[model],
+                ChangeHistory.entity_id == entity_id
+            )
+            .order_by(ChangeHistory.changed_at.desc(), ChangeHistory.id.desc())
+            .offset(skip)
+            .limit(limit)
+            .all()
+        )
+
+    @staticmethod
+    def as_of(db: Session, model, current: dict, at: datetime) -> Optional[dict]:
+        """
+        Estado do registro no instante `at`
+
+        Args:
+            current: Registro atual serializado (valores em tipos JSON)
+
+        Returns:
+            O registro como estava em `at`, ou None se ainda não existia
+        """
+        later = (
+            db.query(ChangeHistory.operation, ChangeHistory.changes)
+            .filter(
+                ChangeHistory.entity_type == TRACKED[model],
+                ChangeHistory.entity_id == current["id"],
+                ChangeHistory.changed_at > at
+            )
+            .order_by(ChangeHistory.changed_at.desc(), ChangeHistory.id.desc())
+        )
+        state = dict(current)
+        for operation, changes in later:
+            if operation == CREATE:
+                return None
+            for name, (old, _) in changes.items():
+                state[name] = old
+        return state
+
+
+class HistoryPartitions:
+    """
+    Partições mensais de `change_history` (PostgreSQL)
+
+    Linhas fora das partições mensais caem na partição DEFAULT. Uma partição
+    só pode ser criada se a DEFAULT não tiver linhas no seu intervalo, por
+    isso os meses são criados com antecedência (scripts/history_partitions.py).
+    """
+    TABLE = ChangeHistory.__tablename__
+
+    def __init__(self, engine: Engine):
+        self.engine = engine
+
+    @staticmethod
+    def month_start(year: int, month: int) -> date:
+        year, month = year + (month - 1) // 12, (month - 1) % 12 + 1
+        return date(year, month, 1)
+
+    def is_partitioned(self) -> bool:
+        if self.engine.dialect.name != "postgresql":
+            return False
+        with self.engine.connect() as conn:
+            return bool(conn.execute(text(
+                "SELECT 1 FROM pg_partitioned_table pt "
+                "JOIN pg_class c ON c.oid = pt.partrelid WHERE c.relname = :name"
+            ), {"name": self.TABLE}).scalar())
+
+    def ensure(self, months_ahead: int = 3, today: Optional[date] = None) -> List[str]:
+        """
+        Cria as partições do mês corrente e dos `months_ahead` seguintes
+
+        Returns:
+            Nomes das partições criadas
+        """
+        today = today or date.today()
+        created = []
+        for offset in range(months_ahead + 1):
+            start = self.month_start(today.year, today.month + offset)
+            end = self.month_start(start.year, start.month + 1)
+            name = f"{self.TABLE}_y{start.year}m{start.month:02d}"
+            with self.engine.begin() as conn:
+                if conn.execute(text("SELECT to_regclass(:name)"), {"name": name}).scalar():
+                    continue
+                in_default = conn.execute(text(
+                    f"SELECT 1 FROM {self.TABLE}_default "
+                    "WHERE changed_at >= :start AND changed_at < :end LIMIT 1"
+                ), {"start": start, "end": end}).scalar()
+                if in_default:
+                    logger.warning("%s: há linhas do intervalo na partição default; não criada", name)
+                    continue
+                conn.execute(text(
+                    f"CREATE TABLE {name} PARTITION OF {self.TABLE} "
+                    f"FOR VALUES FROM ('{start.isoformat()}') TO ('{end.isoformat()}')"
+                ))
+            created.append(name)
+        return created
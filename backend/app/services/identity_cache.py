@@ -0,0 +1,155 @@
+"""
+Cache por ID (identity cache) das leituras de pessoas e imobiliárias
+
+Guarda a resposta já serializada (`PersonResponse` / `CompanyResponse`) de
+cada registro da tabela quente, em memória por processo, com limite de
+tamanho e TTL. Leituras por ID e a busca por vários IDs consultam o cache
+e buscam as faltas no banco com um único `WHERE id IN`.
+
+Invalidação: as alterações confirmadas (ver services/changes.py) removem
+os registros do cache deste worker e, via Redis pub/sub, dos demais. Sem a
+assinatura do canal ativa o cache não é usado, mesmo com um único worker,
+pois as escritas dos outros processos (demais workers, varredura de CNPJs,
+scripts) não chegariam até ele; ao reconectar, é esvaziado. Leituras que exigem o primário (read-your-writes, ver
+middleware/consistency.py) também não usam o cache.
+
+Versão: cada invalidação avança um contador global. Quem lê do banco anota a
+versão antes da consulta e só grava no cache se o registro não foi invalidado
+depois disso, evitando que uma leitura concorrente com a escrita devolva o
+valor antigo ao cache. Com réplicas configuradas, registros invalidados há
+menos de REPLICA_MAX_LAG_SECONDS também não são gravados, pois a réplica
+pode ainda não ter a escrita.
+"""
+import itertools
+import os
+import threading
+import time
+from typing import Dict, Iterable, List, Type
+
+from pydantic import BaseModel
+from sqlalchemy.orm import Session
+
+from ..database import DATABASE_REPLICA_URLS, REPLICA_MAX_LAG_SECONDS, ids_match
+from ..middleware.tenant import current_tenant
+from ..models.models import Person
+from .cache import TTLCache
+from .changes import Changes, change_bus
+
+IDENTITY_CACHE_SIZE = int(os.getenv("IDENTITY_CACHE_SIZE", "10000"))
+IDENTITY_CACHE_TTL = float(os.getenv("IDENTITY_CACHE_TTL_SECONDS", "60"))
+
+
+class IdentityCache:
+    """
+    Respostas serializadas por (tabela, id), com guarda de versão
+    """
+
+    def __init__(self, maxsize: int = IDENTITY_CACHE_SIZE, ttl: float = IDENTITY_CACHE_TTL,
+                 settle_seconds: float = 0.0):
+        self.settle_seconds = settle_seconds
+        self._entries = TTLCache(maxsize=maxsize, ttl=ttl)
+        # (tabela, id) -> (versão, instante) da última invalidação
+        self._invalidated = TTLCache(maxsize=maxsize, ttl=max(ttl, settle_seconds))
+        self._counter = itertools.count(1)
+        self._version = 0
+        self._cleared_version = 0
+        self._lock = threading.Lock()
+
+    def version(self) -> int:
+        """Versão atual; anotar antes de ler do banco e passar para `put`"""
+        return self._version
+
+    def get_many(self, table: str, ids: Iterable[int]) -> Dict[int, dict]:
+        found = {}
+        for row_id in ids:
+            item = self._entries.get((table, row_id))
+            if item is not None:
+                found[row_id] = item
+        return found
+
+    def put(self, table: str, item: dict, version: int) -> bool:
+        """
+        Grava `item` se o registro não foi invalidado desde `version`
+
+        Returns:
+            Se o item foi gravado
+        """
+        key = (table, item["id"])
+        with self._lock:
+            if version < self._cleared_version:
+                return False
+            stamp = self._invalidated.get(key)
+            if stamp is not None:
+                invalidated_version, invalidated_at = stamp
+                if invalidated_version > version:
+                    return False
+                if time.monotonic() - invalidated_at < self.settle_seconds:
+                    return False
+            self._entries.set(key, item)
+        return True
+
+    def invalidate(self, table: str, ids: Iterable[int]):
+        now = time.monotonic()
+        with self._lock:
+            for row_id in ids:
+                self._version = next(self._counter)
+                self._invalidated.set((table, row_id), (self._version, now))
+                self._entries.delete((table, row_id))
+
+    def clear(self):
+        with self._lock:
+            self._version = self._cleared_version = next(self._counter)
+            self._entries.clear()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def fetch(
+        self, db: Session, model, schema: Type[BaseModel], ids: List[int], use_cache: bool = True
+    ) -> Dict[int, dict]:
+        """
+        Registros de `model` por ID: do cache, e os que faltarem do banco
+        em uma única consulta (que já recebe o escopo do tenant)
+
+        Args:
+            use_cache: False para ler tudo do banco (ex.: leitura no primário)
+
+        Returns:
+            {id: resposta serializada} dos registros encontrados e visíveis
+        """
+        table = model.__tablename__
+        use_cache = use_cache and change_bus.covers_all_workers()
+        cached = self.get_many(table, ids) if use_cache else {}
+        missing = [row_id for row_id in dict.fromkeys(ids) if row_id not in cached]
+
+        # Pessoas de outra imobiliária não são visíveis no escopo do tenant
+        tenant_id = current_tenant()
+        if tenant_id is not None and model is Person:
+            cached = {row_id: item for row_id, item in cached.items() if item["company_id"] == tenant_id}
+
+        found = cached
+        if missing:
+            version = self.version()
+            for row in db.query(model).filter(ids_match(model.id, missing)):
+                item = schema.model_validate(row).model_dump(mode="json")
+                if change_bus.covers_all_workers():
+                    self.put(table, item, version)
+                found[row.id] = item
+        return found
+
+
+identity_cache = IdentityCache(
+    settle_seconds=REPLICA_MAX_LAG_SECONDS if DATABASE_REPLICA_URLS else 0.0
+)
+
+
+@change_bus.on_commit
+@change_bus.on_remote
+def _invalidate_changed(changes: Changes):
+    for table, ids in changes.items():
+        identity_cache.invalidate(table, ids)
+
+
+@change_bus.on_resync
+def _clear_after_gap():
+    identity_cache.clear()
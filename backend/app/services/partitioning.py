@@ -0,0 +1,220 @@
+"""
+Particionamento declarativo da tabela `persons` por imobiliária (company_id)
+
+Migração online em três etapas, cada uma idempotente:
+
+1. prepare  - cria `persons_partitioned` (PARTITION BY HASH (company_id)) com
+              suas partições e os índices do modelo, e
+              instala um trigger em `persons` que espelha INSERT/UPDATE/DELETE
+              na nova tabela
+2. backfill - copia as linhas existentes em lotes por ID
+              (ON CONFLICT DO NOTHING: a cópia do trigger é sempre a mais nova).
+              As linhas do lote são lidas com FOR SHARE: um UPDATE/DELETE
+              concorrente espera o lote terminar e o trigger então substitui a
+              cópia; se ele já terminou, o lote lê a versão nova ou pula a
+              linha removida. Sem isso, uma troca de company_id viraria um ID
+              duplicado e uma remoção (ex.: arquivamento) deixaria uma linha órfã
+3. swap     - confere as tabelas (mesmos pares id/company_id, sem IDs
+              duplicados) e, em uma única transação, renomeia `persons` -> `persons_old` e
+              `persons_partitioned` -> `persons`, e remove o trigger
+
+Restrições do PostgreSQL para tabelas particionadas: índices únicos precisam
+conter a chave de partição. Por isso email/CPF/CNPJ são únicos por
+(coluna, company_id) já no modelo (migração 0007), a mesma regra das
+verificações em `routes/persons.py`. Requer PostgreSQL 15+ (NULLS NOT DISTINCT).
+
+`persons_old` é mantida para rollback e deve ser removida manualmente.
+"""
+import logging
+from typing import List
+
+from sqlalchemy import text
+from sqlalchemy.dialects import postgresql
+from sqlalchemy.engine import Engine
+
+from ..models.models import Person
+
+logger = logging.getLogger(__name__)
+
+
+class PersonPartitioning:
+    """
+    Gera e executa o DDL da migração de `persons` para tabela particionada
+    """
+    SOURCE = "persons"
+    TARGET = "persons_partitioned"
+    BACKUP = "persons_old"
+    TRIGGER = "persons_mirror_partitioned"
+
+    def __init__(self, engine: Engine, partitions: int = 16, batch_size: int = 5000):
+        self.engine = engine
+        self.partitions = partitions
+        self.batch_size = batch_size
+        self.columns: List[str] = [column.name for column in Person.__table__.columns]
+
+    # ---------- DDL ----------
+
+    def prepare_sql(self) -> List[str]:
+        cols = ", ".join(self.columns)
+        new_cols = ", ".join(f"NEW.{c}" for c in self.columns)
+        updates = ", ".join(f"{c} = EXCLUDED.{c}" for c in self.columns if c not in ("id", "company_id"))
+
+        statements = [
+            f"""
+            CREATE TABLE IF NOT EXISTS {self.TARGET}
+                (LIKE {self.SOURCE} INCLUDING DEFAULTS)
+                PARTITION BY HASH (company_id)
+            """,
+        ]
+        for remainder in range(self.partitions):
+            statements.append(f"""
+            CREATE TABLE IF NOT EXISTS {self.SOURCE}_p{remainder}
+                PARTITION OF {self.TARGET}
+                FOR VALUES WITH (MODULUS {self.partitions}, REMAINDER {remainder})
+            """)
+
+        statements += [
+            f"""
+            CREATE UNIQUE INDEX IF NOT EXISTS {self.TARGET}_id_company_key
+                ON {self.TARGET} (id, company_id) NULLS NOT DISTINCT
+            """,
+            *self.model_indexes_sql(),
+            f"""
+            DO $$ BEGIN
+                ALTER TABLE {self.TARGET}
+                    ADD CONSTRAINT {self.TARGET}_company_id_fkey
+                    FOREIGN KEY (company_id) REFERENCES companies (id);
+            EXCEPTION WHEN duplicate_object THEN NULL;
+            END $$
+            """,
+            f"""
+            CREATE OR REPLACE FUNCTION {self.TRIGGER}() RETURNS trigger AS $$
+            BEGIN
+                IF TG_OP IN ('UPDATE', 'DELETE') THEN
+                    DELETE FROM {self.TARGET} WHERE id = OLD.id;
+                END IF;
+                IF TG_OP IN ('INSERT', 'UPDATE') THEN
+                    INSERT INTO {self.TARGET} ({cols}) VALUES ({new_cols})
+                    ON CONFLICT (id, company_id) DO UPDATE SET {updates};
+                END IF;
+                RETURN NULL;
+            END
+            $$ LANGUAGE plpgsql
+            """,
+            f"DROP TRIGGER IF EXISTS {self.TRIGGER} ON {self.SOURCE}",
+            f"""
+            CREATE TRIGGER {self.TRIGGER}
+                AFTER INSERT OR UPDATE OR DELETE ON {self.SOURCE}
+                FOR EACH ROW EXECUTE FUNCTION {self.TRIGGER}()
+            """,
+        ]
+        return statements
+
+    def model_indexes_sql(self) -> List[str]:
+        """
+        Os índices de `Person` (únicos, parciais e simples), recriados na
+        tabela particionada para não se perderem no swap
+        """
+        dialect = postgresql.dialect()
+        statements = []
+        for index in sorted(Person.__table__.indexes, key=lambda index: index.name):
+            options = index.dialect_options["postgresql"]
+            name = index.name.replace(f"ix_{self.SOURCE}_", f"{self.TARGET}_", 1)
+            columns = ", ".join(column.name for column in index.columns)
+            statement = f"CREATE {'UNIQUE ' if index.unique else ''}INDEX IF NOT EXISTS {name} ON {self.TARGET} ({columns})"
+            if options["nulls_not_distinct"]:
+                statement += " NULLS NOT DISTINCT"
+            if options["where"] is not None:
+                predicate = options["where"].compile(
+                    dialect=dialect, compile_kwargs={"include_table": False, "literal_binds": True}
+                )
+                statement += f" WHERE {predicate}"
+            statements.append(statement)
+        return statements
+
+    def backfill_sql(self) -> str:
+        cols = ", ".join(self.columns)
+        return f"""
+            INSERT INTO {self.TARGET} ({cols})
+            SELECT {cols} FROM {self.SOURCE}
+            WHERE id > :last_id AND id <= :last_id + :batch_size
+            FOR SHARE
+            ON CONFLICT (id, company_id) DO NOTHING
+        """
+
+    def swap_sql(self) -> List[str]:
+        return [
+            f"LOCK TABLE {self.SOURCE} IN ACCESS EXCLUSIVE MODE",
+            f"DROP TRIGGER IF EXISTS {self.TRIGGER} ON {self.SOURCE}",
+            f"ALTER TABLE {self.SOURCE} RENAME TO {self.BACKUP}",
+            f"ALTER TABLE {self.TARGET} RENAME TO {self.SOURCE}",
+            f"ALTER SEQUENCE {self.SOURCE}_id_seq OWNED BY {self.SOURCE}.id",
+            f"DROP FUNCTION IF EXISTS {self.TRIGGER}()",
+        ]
+
+    # ---------- execução ----------
+
+    def is_partitioned(self) -> bool:
+        with self.engine.connect() as conn:
+            return bool(conn.execute(text(
+                "SELECT 1 FROM pg_partitioned_table pt "
+                "JOIN pg_class c ON c.oid = pt.partrelid WHERE c.relname = :name"
+            ), {"name": self.SOURCE}).scalar())
+
+    def prepare(self):
+        with self.engine.begin() as conn:
+            for statement in self.prepare_sql():
+                conn.execute(text(statement))
+        logger.info("%s criada com %s partições; trigger de espelhamento ativo", self.TARGET, self.partitions)
+
+    def backfill(self) -> int:
+        """Copia `persons` para a tabela particionada em lotes; retorna o total copiado"""
+        with self.engine.connect() as conn:
+            max_id = conn.execute(text(f"SELECT COALESCE(MAX(id), 0) FROM {self.SOURCE}")).scalar()
+
+        copied = 0
+        last_id = 0
+        while last_id < max_id:
+            # Uma transação curta por lote para não segurar locks
+            with self.engine.begin() as conn:
+                result = conn.execute(
+                    text(self.backfill_sql()),
+                    {"last_id": last_id, "batch_size": self.batch_size}
+                )
+                copied += result.rowcount
+            last_id += self.batch_size
+            logger.info("backfill: id <= %s (%s linhas copiadas)", last_id, copied)
+        return copied
+
+    def verify(self) -> bool:
+        """
+        Confere se a tabela particionada tem exatamente as linhas de `persons`:
+        nenhum ID duplicado, nenhum par (id, company_id) faltando ou sobrando
+        """
+        pairs = "SELECT id, company_id FROM {}"
+        checks = {
+            "duplicados": f"SELECT COUNT(*) FROM (SELECT id FROM {self.TARGET} GROUP BY id HAVING COUNT(*) > 1) d",
+            "faltando": f"SELECT COUNT(*) FROM ({pairs.format(self.SOURCE)} EXCEPT {pairs.format(self.TARGET)}) m",
+            "sobrando": f"SELECT COUNT(*) FROM ({pairs.format(self.TARGET)} EXCEPT {pairs.format(self.SOURCE)}) e",
+        }
+        # Mesmo snapshot para todas as consultas
+        with self.engine.connect().execution_options(isolation_level="REPEATABLE READ") as conn:
+            source = conn.execute(text(f"SELECT COUNT(*) FROM {self.SOURCE}")).scalar()
+            target = conn.execute(text(f"SELECT COUNT(*) FROM {self.TARGET}")).scalar()
+            problems = {name: conn.execute(text(sql)).scalar() for name, sql in checks.items()}
+        logger.info(
+            "verificação: %s=%s %s=%s %s",
+            self.SOURCE, source, self.TARGET, target,
+            " ".join(f"{name}={count}" for name, count in problems.items())
+        )
+        return source == target and not any(problems.values())
+
+    def swap(self):
+        if not self.verify():
+            raise RuntimeError(
+                f"{self.TARGET} diverge de {self.SOURCE}; corrija (ou recrie e rode o backfill) antes do swap"
+            )
+        with self.engine.begin() as conn:
+            for statement in self.swap_sql():
+                conn.execute(text(statement))
+        logger.info("%s agora é particionada; tabela anterior em %s", self.SOURCE, self.BACKUP)
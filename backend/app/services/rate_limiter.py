@@ -0,0 +1,118 @@
+"""
+Token bucket para limitação de requisições
+
+O estado dos buckets fica no Redis (um script Lua faz leitura, reposição e
+consumo atomicamente, com o relógio do próprio Redis), compartilhado por
+todos os workers. Se o Redis estiver fora, um circuit breaker desvia para
+buckets em memória, por processo, até o Redis voltar.
+"""
+import logging
+import os
+import time
+from typing import NamedTuple, Optional
+
+from .cache import TTLCache
+from .circuit_breaker import CircuitBreaker, CircuitState
+
+try:
+    from redis import asyncio as aioredis
+    from redis.exceptions import RedisError
+except ImportError:  # opcional: sem redis, apenas buckets em memória
+    aioredis = None
+    RedisError = OSError
+
+logger = logging.getLogger(__name__)
+
+REDIS_URL = os.getenv("REDIS_URL")
+RATE_LIMIT_REDIS_TIMEOUT = float(os.getenv("RATE_LIMIT_REDIS_TIMEOUT_SECONDS", "0.05"))
+
+# KEYS[1] = bucket; ARGV = capacidade, reposição (tokens/s), TTL da chave
+_TOKEN_BUCKET_LUA = """
+local capacity = tonumber(ARGV[1])
+local rate = tonumber(ARGV[2])
+local clock = redis.call('TIME')
+local now = tonumber(clock[1]) + tonumber(clock[2]) / 1000000
+local state = redis.call('HMGET', KEYS[1], 'tokens', 'ts')
+local tokens = tonumber(state[1]) or capacity
+local ts = tonumber(state[2]) or now
+tokens = math.min(capacity, tokens + math.max(0, now - ts) * rate)
+local allowed = 0
+local retry_after = 0
+if tokens >= 1 then
+    tokens = tokens - 1
+    allowed = 1
+else
+    retry_after = (1 - tokens) / rate
+end
+redis.call('HSET', KEYS[1], 'tokens', tokens, 'ts', now)
+redis.call('EXPIRE', KEYS[1], ARGV[3])
+return {allowed, tostring(tokens), tostring(retry_after)}
+"""
+
+
+class RateLimitResult(NamedTuple):
+    allowed: bool
+    remaining: int
+    retry_after: float
+
+
+class RateLimiter:
+    """
+    Token bucket: até `limit` requisições em rajada, repostas à taxa de
+    `limit / window` por segundo
+    """
+
+    def __init__(self, redis_url: Optional[str] = REDIS_URL, prefix: str = "ratelimit"):
+        self.prefix = prefix
+        self._redis = None
+        self._script = None
+        if redis_url and aioredis is not None:
+            self._redis = aioredis.from_url(
+                redis_url,
+                socket_timeout=RATE_LIMIT_REDIS_TIMEOUT,
+                socket_connect_timeout=RATE_LIMIT_REDIS_TIMEOUT
+            )
+            self._script = self._redis.register_script(_TOKEN_BUCKET_LUA)
+        self.breaker = CircuitBreaker(
+            "ratelimit-redis", min_calls=3, open_seconds=30.0,
+            half_open_timeout=max(1.0, RATE_LIMIT_REDIS_TIMEOUT * 20)
+        )
+        self._memory = TTLCache(maxsize=int(os.getenv("RATE_LIMIT_MEMORY_KEYS", "100000")), ttl=3600)
+
+    @property
+    def backend(self) -> str:
+        """Onde os buckets estão sendo mantidos agora (redis ou memory)"""
+        if self._redis is None or self.breaker.state == CircuitState.OPEN:
+            return "memory"
+        return "redis"
+
+    async def hit(self, key: str, limit: int, window: float) -> RateLimitResult:
+        """Consome um token do bucket `key`"""
+        rate = limit / window
+        if self._redis is not None and self.breaker.allow_request():
+            # None = chamada cancelada: devolve a vaga de teste do circuito
+            success = None
+            try:
+                allowed, tokens, retry_after = await self._script(
+                    keys=[f"{self.prefix}:{key}"],
+                    args=[limit, rate, int(window) + 1]
+                )
+                success = True
+            except (RedisError, OSError) as exc:
+                success = False
+                logger.warning("Redis indisponível para rate limit, usando memória: %s", exc)
+            finally:
+                self.breaker.finish(success)
+            if success:
+                return RateLimitResult(bool(int(allowed)), int(float(tokens)), float(retry_after))
+        return self._hit_memory(key, limit, rate, window)
+
+    def _hit_memory(self, key: str, limit: int, rate: float, window: float) -> RateLimitResult:
+        now = time.monotonic()
+        tokens, ts = self._memory.get(key) or (float(limit), now)
+        tokens = min(float(limit), tokens + (now - ts) * rate)
+        if tokens >= 1:
+            self._memory.set(key, (tokens - 1, now), ttl=window)
+            return RateLimitResult(True, int(tokens - 1), 0.0)
+        self._memory.set(key, (tokens, now), ttl=window)
+        return RateLimitResult(False, 0, (1 - tokens) / rate)
@@ -0,0 +1,263 @@
+"""
+Contadores de funcionários mantidos nas imobiliárias
+
+`Company` guarda o total de pessoas vinculadas (`employee_count`), o total
+de ativas (`active_employee_count`) e as ativas por papel
+(`<papel>_count`), para listar e ordenar imobiliárias por equipe sem JOIN.
+
+Os contadores são ajustados na mesma transação da escrita na pessoa:
+
+- escritas pelo ORM: evento `after_flush`, comparando company_id, role e
+  is_active antes e depois
+- operações em lote: `HistoryService.bulk_update` chama `apply_rows` com os
+  valores antigos de cada linha
+- arquivamento: `ArchivalService` desconta as pessoas movidas
+
+Cada ajuste é um `UPDATE companies SET col = col + delta`, atômico sob
+concorrência. Os valores antigos de cada pessoa vêm da linha travada
+(FOR UPDATE) na própria transação: no ORM, `before_flush` relê e trava as
+pessoas alteradas; nas operações em lote, `HistoryService.bulk_update` lê
+as linhas com FOR UPDATE. Assim duas escritas concorrentes na mesma pessoa
+não descontam o mesmo valor antigo duas vezes.
+
+`RollupService.reconcile` (scripts/reconcile_rollups.py) recalcula tudo a
+partir de `persons` e corrige eventuais divergências.
+"""
+from collections import defaultdict
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from sqlalchemy import case, event, func, inspect, select, update
+from sqlalchemy.orm import Session
+
+from ..database import ids_match
+from ..models.models import Company, Person, UserRole
+from .changes import mark_changed
+
+ROLLUP_FIELDS = ("company_id", "role", "is_active")
+
+ROLE_COLUMNS = {role.value: f"{role.value}_count" for role in UserRole}
+ROLLUP_COLUMNS = ("employee_count", "active_employee_count") + tuple(ROLE_COLUMNS.values())
+
+# Chave em session.info com os valores travados em before_flush: {id: (company_id, role, is_active)}
+_LOCKED_ROWS = "rollups_locked_rows"
+
+Deltas = Dict[int, Dict[str, int]]
+
+
+def _role_value(role) -> Optional[str]:
+    return getattr(role, "value", role)
+
+
+def contribution(company_id, role, is_active) -> Dict[str, int]:
+    """Quanto uma pessoa soma em cada contador da sua imobiliária"""
+    if company_id is None:
+        return {}
+    counts = {"employee_count": 1}
+    if is_active:
+        counts["active_employee_count"] = 1
+        column = ROLE_COLUMNS.get(_role_value(role))
+        if column:
+            counts[column] = 1
+    return counts
+
+
+def add_change(deltas: Deltas, old: Optional[tuple], new: Optional[tuple]):
+    """Acumula em `deltas` a troca de (company_id, role, is_active) `old` por `new`"""
+    if old == new:
+        return
+    if old is not None:
+        for column, count in contribution(*old).items():
+            deltas[old[0]][column] -= count
+    if new is not None:
+        for column, count in contribution(*new).items():
+            deltas[new[0]][column] += count
+
+
+def _previous(state, key: str):
+    history = state.attrs[key].history
+    if history.deleted:
+        return history.deleted[0]
+    if history.unchanged:
+        return history.unchanged[0]
+    return getattr(state.obj(), key)
+
+
+def _rollup_changed(obj) -> bool:
+    state = inspect(obj)
+    return any(state.attrs[key].history.has_changes() for key in ROLLUP_FIELDS)
+
+
+@event.listens_for(Session, "before_flush")
+def _lock_person_rows(session, flush_context, instances):
+    """
+    Trava as pessoas que vão mudar de imobiliária, papel ou status (ou ser
+    removidas) e guarda os valores atuais do banco, base dos deltas
+    """
+    ids = [obj.id for obj in session.dirty if type(obj) is Person and _rollup_changed(obj)]
+    ids += [obj.id for obj in session.deleted if type(obj) is Person]
+    if not ids:
+        return
+    rows = session.execute(
+        select(Person.id, *[getattr(Person, key) for key in ROLLUP_FIELDS])
+        .where(ids_match(Person.id, ids))
+        .order_by(Person.id)
+        .with_for_update()
+        .execution_options(skip_tenant_filter=True)
+    )
+    session.info.setdefault(_LOCKED_ROWS, {}).update(
+        {row.id: (row.company_id, row.role, row.is_active) for row in rows}
+    )
+
+
+@event.listens_for(Session, "after_flush")
+def _track_person_writes(session, flush_context):
+    locked = session.info.pop(_LOCKED_ROWS, {})
+
+    def previous(obj):
+        if obj.id in locked:
+            return locked[obj.id]
+        state = inspect(obj)
+        return tuple(_previous(state, key) for key in ROLLUP_FIELDS)
+
+    def current(obj):
+        # Sobre a linha travada, só os campos alterados neste flush: os demais
+        # valores em memória podem ter sido carregados antes de outra transação
+        state = inspect(obj)
+        return tuple(
+            getattr(obj, key) if state.attrs[key].history.has_changes() else value
+            for key, value in zip(ROLLUP_FIELDS, previous(obj))
+        )
+
+    deltas: Deltas = defaultdict(lambda: defaultdict(int))
+    for obj in session.new:
+        if type(obj) is Person:
+            add_change(deltas, None, (obj.company_id, obj.role, obj.is_active))
+    for obj in session.dirty:
+        if type(obj) is Person:
+            add_change(deltas, previous(obj), current(obj))
+    for obj in session.deleted:
+        if type(obj) is Person:
+            add_change(deltas, previous(obj), None)
+    if deltas:
+        RollupService.apply_deltas(session, deltas)
+
+
+class RollupService:
+    """
+    Ajuste e reconciliação dos contadores das imobiliárias
+    """
+
+    @staticmethod
+    def apply_deltas(db: Session, deltas: Deltas):
+        """Um UPDATE por imobiliária afetada, na transação corrente"""
+        table = Company.__table__
+        for company_id, columns in deltas.items():
+            values = {name: table.c[name] + delta for name, delta in columns.items() if delta}
+            if not values:
+                continue
+            # Não conta como alteração da imobiliária (onupdate de updated_at)
+            values["updated_at"] = table.c.updated_at
+            db.connection().execute(update(table).where(table.c.id == company_id).values(**values))
+        mark_changed(db, Company, list(deltas))
+
+    @staticmethod
+    def apply_rows(db: Session, old_rows: Iterable, values: dict):
+        """
+        Ajusta os contadores após um UPDATE em lote de pessoas
+
+        Args:
+            old_rows: Linhas com company_id, role e is_active anteriores ao UPDATE
+            values: Valores aplicados pelo UPDATE
+        """
+        if not any(field in values for field in ROLLUP_FIELDS):
+            return
+        deltas: Deltas = defaultdict(lambda: defaultdict(int))
+        for row in old_rows:
+            old = tuple(getattr(row, field) for field in ROLLUP_FIELDS)
+            new = tuple(values.get(field, current) for field, current in zip(ROLLUP_FIELDS, old))
+            add_change(deltas, (old[0], _role_value(old[1]), old[2]), (new[0], _role_value(new[1]), new[2]))
+        RollupService.apply_deltas(db, deltas)
+
+    @staticmethod
+    def apply_removed(db: Session, removed: Iterable[Tuple]):
+        """Desconta pessoas removidas da tabela (company_id, role, is_active)"""
+        deltas: Deltas = defaultdict(lambda: defaultdict(int))
+        for row in removed:
+            add_change(deltas, tuple(row), None)
+        RollupService.apply_deltas(db, deltas)
+
+    @staticmethod
+    def actual_counts_query():
+        """Contadores calculados a partir de `persons`, por imobiliária"""
+        active = Person.is_active == True
+        columns = [
+            func.count().label("employee_count"),
+            func.sum(case((active, 1), else_=0)).label("active_employee_count"),
+        ]
+        for role in UserRole:
+            columns.append(
+                func.sum(case((active & (Person.role == role), 1), else_=0)).label(ROLE_COLUMNS[role.value])
+            )
+        return (
+            select(Person.company_id, *columns)
+            .where(Person.company_id.isnot(None))
+            .group_by(Person.company_id)
+            .execution_options(skip_tenant_filter=True)
+        )
+
+    @staticmethod
+    def reconcile(db: Session, dry_run: bool = False, batch_size: int = 500) -> List[int]:
+        """
+        Recalcula os contadores e corrige as imobiliárias divergentes
+
+        Em lotes de imobiliárias por ID, cada um em uma transação: o lote
+        trava as imobiliárias (FOR UPDATE) e só então conta as pessoas. Uma
+        escrita concorrente em pessoa ajusta o contador na mesma transação,
+        então ou ela já terminou (e a contagem, um comando posterior em READ
+        COMMITTED, a enxerga) ou espera o lote terminar e soma o seu delta
+        sobre o valor corrigido. Sem a trava, o valor absoluto gravado
+        poderia apagar um delta aplicado entre a contagem e o UPDATE.
+
+        Returns:
+            IDs das imobiliárias corrigidas (ou que seriam, com dry_run)
+        """
+        table = Company.__table__
+        zero = {name: 0 for name in ROLLUP_COLUMNS}
+        drifted = []
+        last_id = 0
+        while True:
+            query = (
+                select(table.c.id, *[table.c[name] for name in ROLLUP_COLUMNS])
+                .where(table.c.id > last_id)
+                .order_by(table.c.id)
+                .limit(batch_size)
+            )
+            companies = db.execute(query if dry_run else query.with_for_update()).all()
+            if not companies:
+                break
+            last_id = companies[-1].id
+
+            counts = RollupService.actual_counts_query().where(
+                ids_match(Person.company_id, [row.id for row in companies])
+            )
+            actual = {
+                row.company_id: {name: int(getattr(row, name) or 0) for name in ROLLUP_COLUMNS}
+                for row in db.execute(counts)
+            }
+            batch = []
+            for row in companies:
+                expected = actual.get(row.id, zero)
+                if any(getattr(row, name) != expected[name] for name in ROLLUP_COLUMNS):
+                    batch.append(row.id)
+                    if not dry_run:
+                        db.execute(
+                            update(table)
+                            .where(table.c.id == row.id)
+                            .values(updated_at=table.c.updated_at, **expected)
+                        )
+            if batch and not dry_run:
+                mark_changed(db, Company, batch)
+            # Libera as travas do lote
+            db.commit()
+            drifted += batch
+        return drifted
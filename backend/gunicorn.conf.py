@@ -0,0 +1,38 @@
+"""
+Configuração do Gunicorn para produção
+
+    gunicorn app.main:app -c gunicorn.conf.py
+
+Workers Uvicorn (ASGI) com preload_app: a aplicação é importada uma vez
+no master e os workers herdam os módulos já carregados via fork, o que
+reduz o tempo de subida e a memória. O pool de conexões de cada worker
+vem de DB_CONNECTION_BUDGET / WEB_CONCURRENCY (ver app/database.py).
+"""
+import multiprocessing
+import os
+
+bind = os.getenv("BIND", "0.0.0.0:8000")
+
+# WEB_CONCURRENCY também é lido por app/database.py para dividir o orçamento de conexões
+workers = int(os.getenv("WEB_CONCURRENCY", str(min(multiprocessing.cpu_count() * 2 + 1, 8))))
+os.environ["WEB_CONCURRENCY"] = str(workers)
+
+worker_class = "uvicorn.workers.UvicornWorker"
+preload_app = True
+
+timeout = int(os.getenv("GUNICORN_TIMEOUT", "30"))
+graceful_timeout = int(os.getenv("GUNICORN_GRACEFUL_TIMEOUT", "30"))
+keepalive = int(os.getenv("GUNICORN_KEEPALIVE", "5"))
+
+# Recicla workers periodicamente (vazamentos de memória em dependências)
+max_requests = int(os.getenv("GUNICORN_MAX_REQUESTS", "10000"))
+max_requests_jitter = int(os.getenv("GUNICORN_MAX_REQUESTS_JITTER", "1000"))
+
+accesslog = "-"
+errorlog = "-"
+
+
+def post_fork(server, worker):
+    # Conexões abertas no master durante o preload não podem ser compartilhadas
+    from app.database import dispose_engines
+    dispose_engines()
@@ -0,0 +1,46 @@
+"""
+Arquivamento de pessoas e imobiliárias inativas
+
+Uso:
+    python -m scripts.archive_inactive                 # pessoas e imobiliárias
+    python -m scripts.archive_inactive --entity persons
+    python -m scripts.archive_inactive --days 365
+
+Pensado para rodar periodicamente (cron / scheduler do orquestrador).
+Pessoas são arquivadas antes das imobiliárias, liberando as que ficaram
+sem vínculos.
+"""
+import argparse
+import logging
+
+from app.database import SessionLocal
+from app.services.archival import ArchivalService
+from app.services.changes import change_bus
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Move registros inativos para as tabelas de arquivo")
+    parser.add_argument("--entity", choices=list(ArchivalService.TARGETS), help="apenas uma tabela")
+    parser.add_argument("--days", type=int, help="dias de inatividade (padrão: ARCHIVE_INACTIVE_DAYS)")
+    parser.add_argument("--batch-size", type=int, help="registros por lote (padrão: ARCHIVE_BATCH_SIZE)")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(message)s")
+    if args.days is not None:
+        ArchivalService.INACTIVE_DAYS = args.days
+    if args.batch_size is not None:
+        ArchivalService.BATCH_SIZE = args.batch_size
+
+    change_bus.warn_if_disabled()
+    entities = [args.entity] if args.entity else list(ArchivalService.TARGETS)
+    db = SessionLocal()
+    try:
+        for entity in entities:
+            total = ArchivalService.archive_all(db, entity)
+            print(f"{entity}: {total} registros arquivados")
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
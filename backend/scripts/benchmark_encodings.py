@@ -0,0 +1,116 @@
+"""
+Tamanho e custo de CPU das codificações de resposta
+
+Uso:
+    python -m scripts.benchmark_encodings               # 1000 pessoas sintéticas
+    python -m scripts.benchmark_encodings --items 100 --repeat 50
+    python -m scripts.benchmark_encodings --from-db     # primeiras pessoas do banco
+
+Para cada combinação (JSON/MessagePack x identity/gzip/brotli) mostra os
+bytes transmitidos e o tempo de CPU por resposta (serialização + compressão),
+com os mesmos níveis usados pelo CompressionMiddleware.
+"""
+import argparse
+import json
+import time
+import zlib
+from datetime import datetime, timezone
+
+from fastapi.encoders import jsonable_encoder
+
+from app.middleware.compression import BROTLI_QUALITY, GZIP_LEVEL, brotli
+from app.middleware.encoding import msgpack
+
+
+def synthetic_persons(count: int):
+    now = datetime.now(timezone.utc).isoformat()
+    return [
+        {
+            "id": i,
+            "person_type": "PF",
+            "name": f"Pessoa de Teste {i}",
+            "email": f"pessoa{i}@exemplo.com.br",
+            "phone": "(11) 3333-4444",
+            "mobile": "(11) 98888-7777",
+            "cpf": f"{i:011d}",
+            "cnpj": None,
+            "rg": "12.345.678-9",
+            "address_street": "Avenida Paulista",
+            "address_number": str(1000 + i % 900),
+            "address_complement": "Conjunto 101",
+            "address_neighborhood": "Bela Vista",
+            "address_city": "São Paulo",
+            "address_state": "SP",
+            "address_zipcode": "01310-100",
+            "role": ["cliente", "corretor", "vendedor"][i % 3],
+            "company_id": i % 20 + 1,
+            "notes": "Cliente interessado em apartamentos de 2 dormitórios na zona sul.",
+            "is_active": True,
+            "created_at": now,
+            "updated_at": None,
+            "situacao_cadastral": None,
+            "situacao_changed_at": None,
+        }
+        for i in range(1, count + 1)
+    ]
+
+
+def persons_from_db(count: int):
+    from app.database import SessionLocal
+    from app.models.models import Person
+    from app.schemas.schemas import PersonResponse
+
+    with SessionLocal() as db:
+        rows = db.query(Person).order_by(Person.id).limit(count).all()
+        return jsonable_encoder([PersonResponse.model_validate(row) for row in rows])
+
+
+def serializers():
+    yield "json", lambda content: json.dumps(
+        content, ensure_ascii=False, allow_nan=False, separators=(",", ":")
+    ).encode("utf-8")
+    if msgpack is not None:
+        yield "msgpack", lambda content: msgpack.packb(content, use_bin_type=True)
+
+
+def compressors():
+    yield "identity", lambda data: data
+    yield f"gzip-{GZIP_LEVEL}", lambda data: zlib.compress(data, GZIP_LEVEL)
+    if brotli is not None:
+        yield f"br-{BROTLI_QUALITY}", lambda data: brotli.compress(data, quality=BROTLI_QUALITY)
+
+
+def measure(content, serialize, compress, repeat: int):
+    started = time.process_time()
+    for _ in range(repeat):
+        payload = compress(serialize(content))
+    return len(payload), (time.process_time() - started) / repeat
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compara codificações de resposta")
+    parser.add_argument("--items", type=int, default=1000, help="pessoas por resposta")
+    parser.add_argument("--repeat", type=int, default=20, help="repetições por medição")
+    parser.add_argument("--from-db", action="store_true", help="usa pessoas do banco em vez de dados sintéticos")
+    args = parser.parse_args()
+
+    content = persons_from_db(args.items) if args.from_db else synthetic_persons(args.items)
+    print(f"{len(content)} pessoas por resposta, média de {args.repeat} repetições\n")
+    print(f"  {'codificação':<22} {'bytes':>10} {'vs json':>8} {'CPU (ms)':>10}")
+
+    baseline = None
+    for format_name, serialize in serializers():
+        for encoding_name, compress in compressors():
+            size, cpu = measure(content, serialize, compress, args.repeat)
+            baseline = baseline or size
+            label = f"{format_name}+{encoding_name}"
+            print(f"  {label:<22} {size:>10,} {size / baseline:>7.0%} {cpu * 1000:>10.2f}")
+
+    if msgpack is None:
+        print("\n(msgpack não instalado)")
+    if brotli is None:
+        print("\n(brotli não instalado)")
+
+
+if __name__ == "__main__":
+    main()
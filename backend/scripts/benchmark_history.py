@@ -0,0 +1,84 @@
+"""
+Custo do histórico de alterações no caminho de escrita
+
+Uso:
+    python -m scripts.benchmark_history                 # 200 updates
+    python -m scripts.benchmark_history --updates 1000
+
+Cria uma pessoa temporária e mede o tempo médio de um update + commit com
+e sem a gravação do histórico (mesmo banco de DATABASE_URL). A pessoa e
+o histórico gerado são removidos ao final.
+"""
+import argparse
+import statistics
+import time
+import uuid
+
+from sqlalchemy import delete
+
+from app.database import SessionLocal
+from app.models.models import ChangeHistory, Person, PersonType
+from app.services.history import TRACKED
+
+
+def run(person_id: int, updates: int, with_history: bool):
+    timings = []
+    db = SessionLocal()
+    db.info["skip_history"] = not with_history
+    try:
+        for i in range(updates):
+            started = time.perf_counter()
+            person = db.get(Person, person_id)
+            person.notes = f"benchmark {with_history} {i}"
+            person.phone = f"(11) {i:04d}-0000"
+            db.commit()
+            timings.append(time.perf_counter() - started)
+    finally:
+        db.close()
+    return timings
+
+
+def summary(timings):
+    timings = sorted(timings)
+    return statistics.mean(timings), timings[int(len(timings) * 0.95) - 1]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Mede o custo do histórico em updates")
+    parser.add_argument("--updates", type=int, default=200, help="updates por cenário")
+    args = parser.parse_args()
+
+    with SessionLocal() as db:
+        person = Person(
+            person_type=PersonType.PF,
+            name="Benchmark Histórico",
+            email=f"benchmark-{uuid.uuid4().hex}@exemplo.com.br"
+        )
+        db.add(person)
+        db.commit()
+        person_id = person.id
+
+    try:
+        # Aquecimento (pool, caches do banco)
+        run(person_id, min(20, args.updates), with_history=False)
+        without = summary(run(person_id, args.updates, with_history=False))
+        with_history = summary(run(person_id, args.updates, with_history=True))
+    finally:
+        with SessionLocal() as db:
+            db.execute(delete(ChangeHistory).where(
+                ChangeHistory.entity_type == TRACKED[Person],
+                ChangeHistory.entity_id == person_id
+            ))
+            db.execute(delete(Person).where(Person.id == person_id))
+            db.commit()
+
+    print(f"{args.updates} updates por cenário\n")
+    print(f"  {'cenário':<16} {'média (ms)':>11} {'p95 (ms)':>10}")
+    for label, (mean, p95) in (("sem histórico", without), ("com histórico", with_history)):
+        print(f"  {label:<16} {mean * 1000:>11.2f} {p95 * 1000:>10.2f}")
+    print(f"\n  overhead médio: {(with_history[0] - without[0]) * 1000:.2f} ms "
+          f"({with_history[0] / without[0] - 1:+.0%})")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,38 @@
+"""
+Agendador da revalidação periódica de CNPJs
+
+Uso:
+    python -m scripts.cnpj_sweep          # roda continuamente
+    python -m scripts.cnpj_sweep --once   # processa um lote de cada tabela e sai
+"""
+import argparse
+import asyncio
+import logging
+
+from app.services.changes import change_bus
+from app.services.cnpj_sweep import CNPJSweepService
+
+
+async def run_once(service: CNPJSweepService):
+    for entity in service.ENTITIES:
+        checked = await service.run_batch(entity)
+        print(f"{entity}: {checked if checked is not None else 'varredura em dia'}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Revalidação periódica de CNPJs na BrasilAPI")
+    parser.add_argument("--once", action="store_true", help="processa um lote de cada tabela e sai")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(name)s: %(message)s")
+    change_bus.warn_if_disabled()
+    service = CNPJSweepService()
+
+    if args.once:
+        asyncio.run(run_once(service))
+    else:
+        asyncio.run(service.run_forever())
+
+
+if __name__ == "__main__":
+    main()
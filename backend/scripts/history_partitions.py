@@ -0,0 +1,34 @@
+"""
+Criação antecipada das partições mensais de change_history (PostgreSQL)
+
+Uso:
+    python -m scripts.history_partitions              # mês corrente + 3 meses
+    python -m scripts.history_partitions --months 6
+
+Pensado para rodar periodicamente (cron / scheduler do orquestrador),
+sempre antes da virada do mês. Sem efeito em bancos não particionados.
+"""
+import argparse
+import logging
+
+from app.database import engine
+from app.services.history import HistoryPartitions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Cria as partições mensais do histórico de alterações")
+    parser.add_argument("--months", type=int, default=3, help="meses à frente do corrente")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(message)s")
+    partitions = HistoryPartitions(engine)
+    if not partitions.is_partitioned():
+        print("change_history não é particionada (rode `alembic upgrade head` no PostgreSQL)")
+        return
+
+    created = partitions.ensure(months_ahead=args.months)
+    print(f"{len(created)} partições criadas: {', '.join(created) or '-'}")
+
+
+if __name__ == "__main__":
+    main()
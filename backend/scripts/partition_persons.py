@@ -0,0 +1,54 @@
+"""
+Migração online de `persons` para tabela particionada por company_id
+
+Uso:
+    python -m scripts.partition_persons prepare --partitions 16
+    python -m scripts.partition_persons backfill --batch-size 5000
+    python -m scripts.partition_persons swap
+    python -m scripts.partition_persons all        # as três etapas em sequência
+    python -m scripts.partition_persons prepare --dry-run   # apenas imprime o SQL
+"""
+import argparse
+import logging
+
+from app.database import engine
+from app.services.partitioning import PersonPartitioning
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Particiona a tabela persons por company_id")
+    parser.add_argument("step", choices=["prepare", "backfill", "swap", "all"])
+    parser.add_argument("--partitions", type=int, default=16, help="número de partições hash")
+    parser.add_argument("--batch-size", type=int, default=5000, help="linhas por lote no backfill")
+    parser.add_argument("--dry-run", action="store_true", help="imprime o SQL sem executar")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(message)s")
+    tool = PersonPartitioning(engine, partitions=args.partitions, batch_size=args.batch_size)
+
+    if args.dry_run:
+        statements = []
+        if args.step in ("prepare", "all"):
+            statements += tool.prepare_sql()
+        if args.step in ("backfill", "all"):
+            statements.append(tool.backfill_sql())
+        if args.step in ("swap", "all"):
+            statements += tool.swap_sql()
+        for statement in statements:
+            print(statement.strip() + ";\n")
+        return
+
+    if tool.is_partitioned():
+        print("persons já é particionada")
+        return
+
+    if args.step in ("prepare", "all"):
+        tool.prepare()
+    if args.step in ("backfill", "all"):
+        tool.backfill()
+    if args.step in ("swap", "all"):
+        tool.swap()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,83 @@
+"""
+Perfil da inicialização da API
+
+Uso:
+    python -m scripts.profile_boot                # imports + lifespan (requer banco)
+    python -m scripts.profile_boot --imports-only
+    python -m scripts.profile_boot --top 30
+
+Mostra os módulos mais caros de importar (via `python -X importtime`,
+em um processo separado para não herdar módulos já carregados) e a
+duração de cada etapa do lifespan. Sai com código 1 quando o total
+passa de STARTUP_BUDGET_SECONDS, para uso em CI.
+"""
+import argparse
+import asyncio
+import subprocess
+import sys
+from collections import defaultdict
+
+
+def import_times():
+    """Linhas (módulo, self µs, cumulativo µs) do `-X importtime` de app.main"""
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", "import app.main"],
+        capture_output=True,
+        text=True
+    )
+    if result.returncode != 0:
+        sys.exit(result.stderr)
+
+    rows = []
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|")
+        rows.append((name.strip(), int(self_us), int(cumulative_us)))
+    return rows
+
+
+def print_imports(top: int):
+    rows = import_times()
+    by_package = defaultdict(int)
+    for name, self_us, _ in rows:
+        by_package[name.split(".")[0]] += self_us
+    total_us = sum(by_package.values())
+
+    print(f"Imports: {total_us / 1000:.1f} ms em {len(rows)} módulos\n")
+    print("Por pacote (tempo próprio):")
+    for package, self_us in sorted(by_package.items(), key=lambda item: -item[1])[:top]:
+        print(f"  {package:<40} {self_us / 1000:9.1f} ms")
+
+    print("\nMódulos mais caros (tempo próprio):")
+    for name, self_us, cumulative_us in sorted(rows, key=lambda row: -row[1])[:top]:
+        print(f"  {name:<40} {self_us / 1000:9.1f} ms  (cumulativo {cumulative_us / 1000:.1f} ms)")
+    print()
+
+
+async def run_lifespan(app):
+    async with app.router.lifespan_context(app):
+        pass
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Tempo de import e de inicialização da API")
+    parser.add_argument("--imports-only", action="store_true", help="não executa o lifespan (sem banco)")
+    parser.add_argument("--top", type=int, default=15, help="quantidade de linhas por tabela")
+    args = parser.parse_args()
+
+    print_imports(args.top)
+
+    from app.boot import boot_profiler
+    from app.main import app
+
+    if not args.imports_only:
+        asyncio.run(run_lifespan(app))
+
+    print("\nEtapas da inicialização:")
+    print(boot_profiler.report())
+    sys.exit(0 if boot_profiler.within_budget() else 1)
+
+
+if __name__ == "__main__":
+    main()
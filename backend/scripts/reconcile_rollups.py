@@ -0,0 +1,41 @@
+"""
+Reconciliação dos contadores de funcionários das imobiliárias
+
+Uso:
+    python -m scripts.reconcile_rollups            # corrige divergências
+    python -m scripts.reconcile_rollups --dry-run  # apenas lista
+
+Recalcula employee_count, active_employee_count e os contadores por papel
+a partir de `persons`, em lotes de imobiliárias travadas durante a contagem
+(pode rodar com a aplicação no ar). As escritas da aplicação, inclusive as
+operações em lote e o arquivamento, ajustam os contadores na própria
+transação; divergências só aparecem com escritas em `persons` que não passam
+por ela (SQL manual, restauração de backup, outros sistemas). Pensado para
+rodar periodicamente (cron / scheduler do orquestrador).
+"""
+import argparse
+
+from app.database import SessionLocal
+from app.services.changes import change_bus
+from app.services.rollups import RollupService
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Corrige os contadores de funcionários das imobiliárias")
+    parser.add_argument("--dry-run", action="store_true", help="apenas lista as imobiliárias divergentes")
+    parser.add_argument("--batch-size", type=int, default=500, help="imobiliárias travadas por transação")
+    args = parser.parse_args()
+
+    change_bus.warn_if_disabled()
+    db = SessionLocal()
+    try:
+        drifted = RollupService.reconcile(db, dry_run=args.dry_run, batch_size=args.batch_size)
+    finally:
+        db.close()
+
+    action = "divergentes" if args.dry_run else "corrigidas"
+    print(f"{len(drifted)} imobiliárias {action}" + (f": {drifted}" if drifted else ""))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,10 @@
+#!/bin/sh
+# Entrada de produção: aplica as migrações pendentes e sobe o Gunicorn.
+# RUN_MIGRATIONS=false quando as migrações rodam em um job separado.
+set -e
+
+if [ "${RUN_MIGRATIONS:-true}" = "true" ]; then
+    alembic upgrade head
+fi
+
+exec gunicorn app.main:app -c gunicorn.conf.py
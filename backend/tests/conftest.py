@@ -0,0 +1,61 @@
+"""
+Fixtures compartilhadas: a API sobre um banco SQLite descartável
+"""
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from app.database import Base, get_db, get_read_db
+from app.main import app
+from app.middleware import rate_limit
+from app.models.models import Company
+from app.services.autocomplete import autocomplete_index
+from app.services.facets import facet_cache
+from app.services.identity_cache import identity_cache
+
+
+@pytest.fixture
+def session_factory(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'api.db'}")
+    Base.metadata.create_all(engine)
+    yield sessionmaker(autocommit=False, autoflush=False, bind=engine)
+    engine.dispose()
+
+
+@pytest.fixture
+def client(session_factory, monkeypatch):
+    """
+    Cliente da API sem o lifespan (sem barramento de alterações nem
+    reconstrução periódica), com as duas dependências de sessão no SQLite
+    """
+    def override():
+        with session_factory() as db:
+            yield db
+
+    monkeypatch.setattr(rate_limit, "RATE_LIMIT_ENABLED", False)
+    app.dependency_overrides[get_db] = override
+    app.dependency_overrides[get_read_db] = override
+    # Caches por processo: os IDs se repetem entre bancos de testes diferentes
+    identity_cache.clear()
+    facet_cache.clear()
+    with session_factory() as db:
+        autocomplete_index.build(db)
+    yield TestClient(app)
+    app.dependency_overrides.clear()
+    identity_cache.clear()
+    facet_cache.clear()
+
+
+@pytest.fixture
+def companies(session_factory):
+    """Duas imobiliárias (IDs 1 e 2)"""
+    with session_factory() as db:
+        for i in (1, 2):
+            db.add(Company(
+                id=i, company_name=f"Imobiliária {i}", trade_name=f"Imob {i}",
+                cnpj=f"1122233300018{i}", email=f"imob{i}@teste.com"
+            ))
+        db.commit()
+    return [1, 2]
+
@@ -0,0 +1,73 @@
+"""
+Índice de autocomplete em memória (services/autocomplete.py)
+"""
+from types import SimpleNamespace
+
+import pytest
+
+from app.services import autocomplete
+from app.services.autocomplete import AutocompleteIndex
+
+
+def person(id, name, company_id=1, cpf=None, is_active=True):
+    return SimpleNamespace(id=id, name=name, cpf=cpf, cnpj=None, company_id=company_id, is_active=is_active)
+
+
+def company(id, trade_name, cnpj="11.222.333/0001-81", is_active=True):
+    return SimpleNamespace(id=id, trade_name=trade_name, cnpj=cnpj, is_active=is_active)
+
+
+@pytest.fixture
+def index():
+    index = AutocompleteIndex()
+    index.sync_person(person(1, "José da Silva", cpf="529.982.247-25"))
+    index.sync_person(person(2, "Maria Silveira"))
+    index.sync_person(person(3, "Silvio Santos", company_id=2))
+    index.sync_company(company(1, "Silva Imóveis"))
+    return index
+
+
+def ids(entries):
+    return [(entry.kind, entry.id) for entry in entries]
+
+
+def test_prefix_terms_and_documents(index):
+    assert ids(index.search("jose sil")) == [("person", 1)]
+    assert ids(index.search("SÍLV", kind="person")) == [("person", 1), ("person", 2), ("person", 3)]
+    assert ids(index.search("529.982")) == [("person", 1)]
+    assert ids(index.search("11222333")) == [("company", 1)]
+
+
+def test_company_scope_only_filters_persons(index):
+    assert ids(index.search("silv", company_id=2)) == [("company", 1), ("person", 3)]
+
+
+def test_entry_matching_several_keys_appears_once(index):
+    index.sync_person(person(4, "Silva Silvano"))
+    assert ids(index.search("silva", kind="person")) == [("person", 1), ("person", 4)]
+
+
+def test_updates_move_and_remove_entries(index):
+    index.sync_person(person(3, "Silvio Santos", company_id=1))
+    assert ids(index.search("silvio", company_id=2)) == []
+    assert ids(index.search("silvio", company_id=1)) == [("person", 3)]
+
+    index.sync_person(person(3, "Silvio Santos", is_active=False))
+    index.remove("person", [2])
+    assert ids(index.search("silv", kind="person")) == [("person", 1)]
+    assert len(index) == 2
+
+
+def test_limit_and_scan_cap(index, monkeypatch):
+    assert len(index.search("silv", limit=2)) == 2
+
+    monkeypatch.setattr(autocomplete, "AUTOCOMPLETE_MAX_SCAN", 1)
+    assert ids(index.search("silv", kind="person", company_id=1)) == [("person", 1)]
+
+
+def test_search_keeps_snapshot_during_writes(index):
+    shards = index._shards
+    index.sync_person(person(5, "Silas Souza"))
+    # Os arrays publicados antes da escrita não mudam
+    assert index._shards is not shards
+    assert all("silas" not in shard.keys for shard in shards.values())
@@ -0,0 +1,92 @@
+"""
+Operações em lote: PATCH /api/persons/bulk e POST /api/persons/bulk/deactivate
+"""
+import pytest
+
+
+def person(name: str, **fields) -> dict:
+    email = name.lower().replace(" ", ".") + "@teste.com"
+    return {"person_type": "PF", "name": name, "email": email, **fields}
+
+
+@pytest.fixture
+def people(client, companies):
+    """Três corretores na imobiliária 1 e um cliente sem imobiliária"""
+    created = [
+        client.post("/api/persons/", json=person(name, role="corretor", company_id=1)).json()
+        for name in ("Ana Lima", "Bruno Reis", "Carla Dias")
+    ]
+    created.append(client.post("/api/persons/", json=person("Davi Melo")).json())
+    return [item["id"] for item in created]
+
+
+def company(client, company_id: int) -> dict:
+    return client.get(f"/api/companies/{company_id}").json()
+
+
+def test_bulk_update_by_ids(client, people):
+    ana, bruno, _, _ = people
+
+    response = client.patch("/api/persons/bulk", json={"ids": [ana, bruno], "changes": {"company_id": 2}})
+
+    assert response.status_code == 200
+    assert response.json() == {"updated": 2, "ids": [ana, bruno]}
+    assert client.get(f"/api/persons/{ana}").json()["company_id"] == 2
+    # Contadores ajustados na mesma transação
+    assert (company(client, 1)["employee_count"], company(client, 2)["employee_count"]) == (1, 2)
+
+    history = client.get(f"/api/persons/{ana}/history").json()
+    assert history[0]["operation"] == "update"
+    assert history[0]["changes"] == {"company_id": [1, 2]}
+
+
+def test_bulk_update_by_filter(client, people):
+    response = client.patch(
+        "/api/persons/bulk",
+        json={"filter": {"role": "corretor", "company_id": 1}, "changes": {"role": "gestor"}}
+    )
+
+    assert response.json()["updated"] == 3
+    roles = {item["role"] for item in client.get("/api/persons/", params={"role": "gestor"}).json()}
+    assert roles == {"gestor"}
+    assert company(client, 1)["active_employee_count"] == 3
+
+
+def test_unchanged_rows_get_no_history(client, people):
+    ana = people[0]
+
+    client.patch("/api/persons/bulk", json={"ids": [ana], "changes": {"role": "corretor"}})
+
+    assert [item["operation"] for item in client.get(f"/api/persons/{ana}/history").json()] == ["create"]
+
+
+@pytest.mark.parametrize("body, status", [
+    ({"changes": {"role": "gestor"}}, 400),
+    ({"ids": [1], "filter": {"role": "corretor"}, "changes": {"role": "gestor"}}, 400),
+    ({"filter": {}, "changes": {"role": "gestor"}}, 400),
+    ({"ids": [1], "changes": {}}, 400),
+    ({"ids": [1], "changes": {"company_id": 99}}, 404),
+    ({"ids": [], "changes": {"role": "gestor"}}, 422),
+])
+def test_invalid_bulk_update(client, people, body, status):
+    assert client.patch("/api/persons/bulk", json=body).status_code == status
+
+
+def test_tenant_cannot_move_persons_to_other_company(client, people):
+    response = client.patch(
+        "/api/persons/bulk", json={"ids": [people[0]], "changes": {"company_id": 2}},
+        headers={"X-Company-Id": "1"}
+    )
+
+    assert response.status_code == 403
+
+
+def test_bulk_deactivate_skips_inactive(client, people):
+    ana, bruno, _, _ = people
+    client.delete(f"/api/persons/{ana}")
+
+    response = client.post("/api/persons/bulk/deactivate", json={"ids": [ana, bruno]})
+
+    assert response.json() == {"updated": 1, "ids": [bruno]}
+    assert client.get(f"/api/persons/{bruno}").json()["is_active"] is False
+    assert company(client, 1)["active_employee_count"] == 1
@@ -0,0 +1,62 @@
+"""
+Canal de alterações e os caches por processo que dependem dele
+"""
+import pytest
+
+from app.models.models import Person
+from app.schemas.schemas import PersonResponse
+from app.services import facets, identity_cache as identity_cache_module
+from app.services.changes import ChangeBus, change_bus
+from app.services.facets import facet_cache
+from app.services.identity_cache import IdentityCache
+
+
+@pytest.mark.parametrize("redis_url, state", [
+    (None, "disabled"),
+    ("redis://localhost:6379", "disconnected"),
+])
+def test_unsubscribed_bus_never_covers_all_workers(redis_url, state, monkeypatch):
+    # Mesmo com um único worker: a varredura de CNPJs e os scripts também escrevem
+    monkeypatch.setenv("WEB_CONCURRENCY", "1")
+    bus = ChangeBus(redis_url=redis_url)
+
+    assert bus.state == state
+    assert not bus.covers_all_workers()
+
+
+def test_subscribed_bus_covers_all_workers():
+    bus = ChangeBus(redis_url="redis://localhost:6379")
+    bus._subscribed = True
+
+    assert bus.covers_all_workers()
+
+
+def test_identity_cache_reads_database_without_subscription(session_factory, monkeypatch):
+    with session_factory() as db:
+        db.add(Person(name="Ana", email="ana@teste.com"))
+        db.commit()
+
+    bus = ChangeBus(redis_url=None)
+    monkeypatch.setattr(identity_cache_module, "change_bus", bus)
+    cache = IdentityCache()
+    with session_factory() as db:
+        assert cache.fetch(db, Person, PersonResponse, [1])[1]["name"] == "Ana"
+    assert len(cache) == 0
+
+    bus._subscribed = True
+    with session_factory() as db:
+        cache.fetch(db, Person, PersonResponse, [1])
+    assert len(cache) == 1
+
+
+def test_remote_change_and_resync_clear_facet_cache():
+    assert facets._clear_on_remote_change in change_bus._remote
+    assert facets._clear_after_gap in change_bus._resync
+
+    facet_cache.set(("persons", None, ()), {"role": {}})
+    facets._clear_on_remote_change({"persons": [1]})
+    assert facet_cache.get(("persons", None, ())) is None
+
+    facet_cache.set(("persons", None, ()), {"role": {}})
+    facets._clear_after_gap()
+    assert facet_cache.get(("persons", None, ())) is None
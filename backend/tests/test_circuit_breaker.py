@@ -0,0 +1,177 @@
+"""
+Circuit breaker, cache de fallback e chamadas à BrasilAPI
+"""
+import asyncio
+
+import httpx
+import pytest
+from fastapi import HTTPException
+
+from app.services import cache, circuit_breaker
+from app.services.brasilapi import BrasilAPIService
+from app.services.cache import TTLCache
+from app.services.circuit_breaker import CircuitBreaker, CircuitState
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+    def advance(self, seconds: float):
+        self.now += seconds
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    fake = FakeClock()
+    monkeypatch.setattr(circuit_breaker.time, "monotonic", fake)
+    monkeypatch.setattr(cache.time, "monotonic", fake)
+    return fake
+
+
+def open_breaker(**kwargs) -> CircuitBreaker:
+    breaker = CircuitBreaker("teste", min_calls=2, open_seconds=30, **kwargs)
+    for _ in range(2):
+        assert breaker.allow_request()
+        breaker.finish(False)
+    return breaker
+
+
+def test_failures_open_then_half_open_after_open_seconds(clock):
+    breaker = open_breaker()
+    assert breaker.state == CircuitState.OPEN
+    assert not breaker.allow_request()
+    assert breaker.retry_after() == 30
+
+    clock.advance(30)
+    assert breaker.state == CircuitState.HALF_OPEN
+    # Uma única chamada de teste por vez
+    assert breaker.allow_request()
+    assert not breaker.allow_request()
+
+
+def test_probe_success_closes_and_failure_reopens(clock):
+    breaker = open_breaker()
+    clock.advance(30)
+    assert breaker.allow_request()
+    breaker.finish(True)
+    assert breaker.state == CircuitState.CLOSED
+
+    breaker = open_breaker()
+    clock.advance(30)
+    assert breaker.allow_request()
+    breaker.finish(False)
+    assert breaker.state == CircuitState.OPEN
+
+
+def test_finish_none_releases_probe_slot(clock):
+    breaker = open_breaker()
+    clock.advance(30)
+    assert breaker.allow_request()
+
+    breaker.finish(None)
+
+    assert breaker.state == CircuitState.HALF_OPEN
+    assert breaker.allow_request()
+
+
+def test_lost_probe_reopens_after_timeout(clock):
+    breaker = open_breaker(half_open_timeout=10)
+    clock.advance(30)
+    assert breaker.allow_request()
+
+    clock.advance(10)
+
+    assert breaker.state == CircuitState.OPEN
+    clock.advance(30)
+    assert breaker.allow_request()
+
+
+def test_failure_rate_below_threshold_keeps_closed(clock):
+    breaker = CircuitBreaker("teste", min_calls=4, failure_rate_threshold=0.5)
+    for success in (True, True, True, False):
+        assert breaker.allow_request()
+        breaker.finish(success)
+    assert breaker.state == CircuitState.CLOSED
+
+
+def test_ttl_cache_expiry_and_stale_read(clock):
+    entries = TTLCache(maxsize=2, ttl=10)
+    entries.set("a", 1)
+    clock.advance(11)
+
+    assert entries.get("a") is None
+    assert entries.get("a", allow_stale=True) == 1
+
+    entries.set("b", 2)
+    entries.set("c", 3)
+    assert entries.get("a", allow_stale=True) is None  # despejada pelo limite
+
+
+# ---------- BrasilAPIService ----------
+
+CNPJ = "11222333000181"
+
+
+@pytest.fixture
+def brasilapi(monkeypatch, clock):
+    monkeypatch.setattr(BrasilAPIService, "breaker", CircuitBreaker("brasilapi", min_calls=2, open_seconds=30))
+    monkeypatch.setattr(BrasilAPIService, "stale_cache", TTLCache(ttl=60))
+    calls = []
+
+    def respond(*responses):
+        pending = list(responses)
+
+        async def get(self, url, **kwargs):
+            calls.append(url)
+            response = pending.pop(0)
+            if isinstance(response, BaseException):
+                raise response
+            return httpx.Response(response, json={"cnpj": CNPJ})
+
+        monkeypatch.setattr(httpx.AsyncClient, "get", get)
+
+    return respond, calls
+
+
+def test_upstream_failure_serves_last_known_response(brasilapi):
+    respond, calls = brasilapi
+    respond(200, httpx.ReadTimeout("lento"))
+
+    assert asyncio.run(BrasilAPIService.buscar_cnpj(CNPJ)) == {"cnpj": CNPJ}
+    assert asyncio.run(BrasilAPIService.buscar_cnpj(CNPJ)) == {"cnpj": CNPJ}
+    assert len(calls) == 2
+
+
+def test_open_circuit_fails_fast_without_cache(brasilapi):
+    respond, calls = brasilapi
+    respond(503, 503)
+    for _ in range(2):
+        with pytest.raises(HTTPException):
+            asyncio.run(BrasilAPIService.buscar_cnpj(CNPJ))
+
+    with pytest.raises(HTTPException) as error:
+        asyncio.run(BrasilAPIService.buscar_cnpj(CNPJ))
+
+    assert error.value.status_code == 503
+    assert error.value.headers["Retry-After"] == "30"
+    assert len(calls) == 2
+
+
+def test_cancelled_probe_is_released(brasilapi, clock):
+    respond, _ = brasilapi
+    respond(503, 503, asyncio.CancelledError(), 200)
+    for _ in range(2):
+        with pytest.raises(HTTPException):
+            asyncio.run(BrasilAPIService.buscar_cnpj(CNPJ))
+    clock.advance(30)
+
+    with pytest.raises(asyncio.CancelledError):
+        asyncio.run(BrasilAPIService.buscar_cnpj(CNPJ))
+
+    # A vaga de teste voltou: a próxima chamada testa e fecha o circuito
+    assert asyncio.run(BrasilAPIService.buscar_cnpj(CNPJ)) == {"cnpj": CNPJ}
+    assert BrasilAPIService.breaker.state == CircuitState.CLOSED
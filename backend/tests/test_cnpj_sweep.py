@@ -0,0 +1,91 @@
+"""
+Varredura de CNPJs (services/cnpj_sweep.py) com a BrasilAPI simulada
+"""
+import asyncio
+
+import httpx
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from app.database import Base
+from app.models.models import CNPJSweepState, Company
+from app.services.brasilapi import BrasilAPIService
+from app.services.cache import TTLCache
+from app.services.circuit_breaker import CircuitBreaker, CircuitState
+from app.services.cnpj_sweep import CNPJSweepService, UpstreamUnavailable
+
+CNPJ = "11222333000181"
+
+
+@pytest.fixture(autouse=True)
+def isolated_service(monkeypatch):
+    monkeypatch.setattr(BrasilAPIService, "breaker", CircuitBreaker("brasilapi", min_calls=2))
+    monkeypatch.setattr(BrasilAPIService, "stale_cache", TTLCache())
+    monkeypatch.setattr(CNPJSweepService, "breaker", CircuitBreaker("brasilapi_sweep", min_calls=2))
+    monkeypatch.setattr(CNPJSweepService, "RATE_PER_MINUTE", 60_000)
+
+
+def upstream(monkeypatch, *responses):
+    """Respostas da BrasilAPI, em ordem: status HTTP ou exceção do httpx"""
+    pending = list(responses)
+
+    async def get(self, url, **kwargs):
+        response = pending.pop(0)
+        if isinstance(response, Exception):
+            raise response
+        situacao = {"descricao_situacao_cadastral": "ATIVA"} if response == 200 else {}
+        return httpx.Response(response, json=situacao)
+
+    monkeypatch.setattr(httpx.AsyncClient, "get", get)
+
+
+def test_sweep_never_uses_stale_cache(monkeypatch):
+    BrasilAPIService.stale_cache.set(f"cnpj:{CNPJ}", {"descricao_situacao_cadastral": "ATIVA"})
+    upstream(monkeypatch, httpx.ConnectError("fora"), httpx.ConnectError("fora"))
+
+    # A consulta interativa recebe a última resposta conhecida...
+    dados = asyncio.run(BrasilAPIService.buscar_cnpj(CNPJ))
+    assert dados["descricao_situacao_cadastral"] == "ATIVA"
+
+    # ...a varredura não
+    with pytest.raises(UpstreamUnavailable):
+        asyncio.run(CNPJSweepService().consultar_situacao(CNPJ))
+
+
+def test_sweep_failures_do_not_open_interactive_breaker(monkeypatch):
+    upstream(monkeypatch, 503, 503)
+    service = CNPJSweepService()
+
+    for _ in range(2):
+        with pytest.raises(UpstreamUnavailable):
+            asyncio.run(service.consultar_situacao(CNPJ))
+
+    assert CNPJSweepService.breaker.state == CircuitState.OPEN
+    assert BrasilAPIService.breaker.state == CircuitState.CLOSED
+    # Circuito da varredura aberto: falha sem consultar a BrasilAPI
+    with pytest.raises(UpstreamUnavailable):
+        asyncio.run(service.consultar_situacao(CNPJ))
+
+
+def test_batch_keeps_progress_at_last_real_check(monkeypatch, tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'sweep.db'}")
+    Base.metadata.create_all(engine)
+    factory = sessionmaker(bind=engine)
+    with factory() as db:
+        for i, cnpj in enumerate(["11222333000181", "11444777000161"], start=1):
+            db.add(Company(
+                id=i, company_name=f"Imobiliária {i}", trade_name=f"Imob {i}",
+                cnpj=cnpj, email=f"imob{i}@teste.com"
+            ))
+        db.commit()
+    upstream(monkeypatch, 200, httpx.ConnectError("fora"))
+
+    with pytest.raises(UpstreamUnavailable):
+        asyncio.run(CNPJSweepService(session_factory=factory).run_batch("companies"))
+
+    with factory() as db:
+        state = db.get(CNPJSweepState, "companies")
+        assert (state.last_id, state.rows_checked, state.rows_changed) == (1, 1, 1)
+        assert [c.situacao_cadastral for c in db.query(Company).order_by(Company.id)] == ["ATIVA", None]
+    engine.dispose()
@@ -0,0 +1,44 @@
+"""
+Leitura das próprias escritas: validação do X-Last-Write
+"""
+import importlib
+import time
+
+import pytest
+from starlette.requests import Request
+
+from app.middleware import consistency
+from app.middleware.consistency import requires_primary
+
+
+def request(**headers) -> Request:
+    raw = [(name.replace("_", "-").encode(), value.encode()) for name, value in headers.items()]
+    return Request({"type": "http", "method": "GET", "path": "/", "headers": raw})
+
+
+def test_recent_write_reads_from_primary():
+    assert requires_primary(request(x_last_write=f"{time.time() - 1:.3f}"))
+    assert requires_primary(request(cookie=f"crm_last_write={time.time() - 1:.3f}"))
+    assert not requires_primary(request(x_last_write=f"{time.time() - 6:.3f}"))
+    assert requires_primary(request(x_read_consistency="strong"))
+
+
+@pytest.mark.parametrize("value", ["inf", "nan", "-inf", "1e308", "abc", ""])
+def test_forged_values_are_ignored(value):
+    assert not requires_primary(request(x_last_write=value))
+
+
+def test_future_write_is_ignored():
+    assert not requires_primary(request(x_last_write=f"{time.time() + 60:.3f}"))
+
+
+def test_window_is_bounded_by_replica_lag(monkeypatch):
+    monkeypatch.setenv("READ_YOUR_WRITES_SECONDS", "60")
+    monkeypatch.setenv("REPLICA_MAX_LAG_SECONDS", "2")
+    try:
+        importlib.reload(consistency)
+        assert consistency.READ_YOUR_WRITES_WINDOW == 3.0
+        assert not consistency.requires_primary(request(x_last_write=f"{time.time() - 4:.3f}"))
+    finally:
+        monkeypatch.undo()
+        importlib.reload(consistency)
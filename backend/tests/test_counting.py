@@ -0,0 +1,61 @@
+"""
+Totais estimados (services/counting.py) no PostgreSQL
+
+Requer um banco descartável: TEST_DATABASE_URL=postgresql://... python -m pytest tests
+"""
+import os
+
+import pytest
+from sqlalchemy import create_engine, insert, text
+from sqlalchemy.orm import Session
+
+from app.database import Base
+from app.models.models import Person, UserRole
+from app.services import counting
+from app.services.counting import CountService
+
+TEST_DATABASE_URL = os.getenv("TEST_DATABASE_URL")
+
+pytestmark = pytest.mark.skipif(
+    not (TEST_DATABASE_URL or "").startswith("postgresql"),
+    reason="TEST_DATABASE_URL (PostgreSQL) não definido"
+)
+
+
+@pytest.fixture
+def db():
+    engine = create_engine(TEST_DATABASE_URL)
+    Base.metadata.drop_all(engine)
+    Base.metadata.create_all(engine)
+    with engine.begin() as conn:
+        conn.execute(insert(Person.__table__), [
+            {
+                "person_type": "PF",
+                "name": f"Pessoa {i}",
+                "email": f"pessoa{i}@teste.com",
+                "role": UserRole.CORRETOR if i % 2 else UserRole.CLIENTE,
+                "is_active": True
+            }
+            for i in range(200)
+        ])
+        conn.execute(text("ANALYZE persons"))
+    with Session(engine) as session:
+        yield session
+    Base.metadata.drop_all(engine)
+    engine.dispose()
+
+
+def test_filtered_count_uses_planner_estimate(db, monkeypatch):
+    monkeypatch.setattr(counting, "COUNT_EXACT_THRESHOLD", 10)
+
+    # O filtro por enum chega como texto da query string ("corretor")
+    total, strategy = CountService.count(db, Person, [Person.role == "corretor"])
+
+    assert strategy == counting.PLANNER_ESTIMATE
+    assert total >= 11
+
+
+def test_filtered_count_exact_below_threshold(db):
+    total, strategy = CountService.count(db, Person, [Person.role == "corretor"])
+
+    assert (total, strategy) == (100, counting.EXACT)
@@ -0,0 +1,90 @@
+"""
+Compressão (gzip/brotli) e respostas em MessagePack
+"""
+import gzip
+
+import msgpack
+import pytest
+
+from app.middleware import compression
+from app.middleware.compression import negotiate
+from app.middleware.encoding import _accepts_msgpack
+from app.models.models import Person
+
+
+@pytest.mark.parametrize("accept_encoding, expected", [
+    ("", None),
+    ("gzip", "gzip"),
+    ("gzip, br", "br"),
+    ("br;q=0.5, gzip", "gzip"),
+    ("br;q=0, gzip;q=0", None),
+    ("*", "br"),
+    ("identity", None),
+    ("gzip;q=abc", None),
+])
+def test_negotiate(accept_encoding, expected):
+    assert negotiate(accept_encoding) == expected
+
+
+def test_negotiate_without_brotli(monkeypatch):
+    monkeypatch.setattr(compression, "brotli", None)
+
+    assert negotiate("br, gzip") == "gzip"
+    assert negotiate("br") is None
+
+
+@pytest.mark.parametrize("accept, expected", [
+    ("application/msgpack", True),
+    ("application/json, application/x-msgpack", True),
+    ("application/msgpack;q=0", False),
+    ("application/json", False),
+    ("", False),
+])
+def test_accepts_msgpack(accept, expected):
+    assert _accepts_msgpack(accept) is expected
+
+
+@pytest.fixture
+def persons(session_factory):
+    with session_factory() as db:
+        for i in range(30):
+            db.add(Person(name=f"Pessoa {i}", email=f"pessoa{i}@teste.com"))
+        db.commit()
+
+
+def test_large_json_response_is_compressed(client, persons):
+    response = client.get("/api/persons/", headers={"Accept-Encoding": "gzip"})
+
+    assert response.headers["content-encoding"] == "gzip"
+    assert "Accept-Encoding" in response.headers["vary"]
+    # O httpx descomprime o corpo
+    assert len(response.json()) == 30
+
+    raw = client.get("/api/persons/", headers={"Accept-Encoding": "identity"})
+    assert "content-encoding" not in raw.headers
+    assert raw.json() == response.json()
+
+
+def test_small_response_is_not_compressed(client):
+    response = client.get("/api/persons/", headers={"Accept-Encoding": "gzip"})
+
+    assert response.json() == []
+    assert "content-encoding" not in response.headers
+
+
+def test_msgpack_response_matches_json(client, persons):
+    as_json = client.get("/api/persons/1").json()
+
+    response = client.get("/api/persons/1", headers={"Accept": "application/msgpack"})
+
+    assert response.headers["content-type"] == "application/msgpack"
+    assert "Accept" in response.headers["vary"]
+    assert msgpack.unpackb(response.content) == as_json
+
+
+def test_gzip_encoder_streams_decodable_chunks():
+    encoder = compression._Encoder("gzip", gzip_level=6, brotli_quality=4)
+
+    body = encoder.chunk(b"a" * 100) + encoder.chunk(b"b" * 100) + encoder.finish()
+
+    assert gzip.decompress(body) == b"a" * 100 + b"b" * 100
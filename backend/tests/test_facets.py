@@ -0,0 +1,90 @@
+"""
+Contagens por faceta e a chave do cache de facetas
+"""
+import os
+
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from app.database import Base
+from app.models.models import Person, PersonType, UserRole
+from app.services.facets import FacetService, cache_key
+
+TEST_DATABASE_URL = os.getenv("TEST_DATABASE_URL")
+
+
+def test_cache_key_normalizes_filters():
+    key = cache_key("persons", {"search": "  Ana ", "role": UserRole.CORRETOR, "is_active": True})
+
+    assert key == cache_key("persons", {"is_active": True, "role": "corretor", "search": "ana"})
+    assert key == ("persons", None, (("is_active", "true"), ("role", "corretor"), ("search", "ana")))
+
+
+def test_cache_key_ignores_empty_filters():
+    assert cache_key("persons", {"role": None, "search": ""}) == cache_key("persons", {})
+
+
+def test_cache_key_separates_entities_and_tenants():
+    filters = {"is_active": True}
+
+    assert cache_key("persons", filters) != cache_key("companies", filters)
+    assert cache_key("persons", filters, tenant_id=1) != cache_key("persons", filters, tenant_id=2)
+    assert cache_key("persons", filters, tenant_id=1) != cache_key("persons", filters)
+
+
+def add_persons(session_factory):
+    with session_factory() as db:
+        db.add_all([
+            Person(name="Ana", email="ana@teste.com", role=UserRole.CORRETOR, address_state="SP"),
+            Person(name="Bia", email="bia@teste.com", role=UserRole.CORRETOR, address_state="RJ"),
+            Person(name="Caio", email="caio@teste.com", role=UserRole.CLIENTE, address_state="SP"),
+            Person(
+                name="Duda", email="duda@teste.com", person_type=PersonType.PJ,
+                role=UserRole.CLIENTE, is_active=False
+            ),
+        ])
+        db.commit()
+
+
+@pytest.fixture(params=["sqlite", "postgresql"])
+def facet_session_factory(request, session_factory):
+    """O GROUP BY por faceta (SQLite) e os GROUPING SETS (PostgreSQL)"""
+    if request.param == "sqlite":
+        yield session_factory
+        return
+    if not (TEST_DATABASE_URL or "").startswith("postgresql"):
+        pytest.skip("TEST_DATABASE_URL (PostgreSQL) não definido")
+    engine = create_engine(TEST_DATABASE_URL)
+    Base.metadata.drop_all(engine)
+    Base.metadata.create_all(engine)
+    yield sessionmaker(bind=engine)
+    Base.metadata.drop_all(engine)
+    engine.dispose()
+
+
+def test_compute_counts_each_field(facet_session_factory):
+    add_persons(facet_session_factory)
+
+    with facet_session_factory() as db:
+        facets = FacetService.compute(
+            db, Person, [Person.is_active == True], ("role", "address_state", "person_type")
+        )
+
+    assert facets == {
+        "role": {"corretor": 2, "cliente": 1},
+        "address_state": {"SP": 2, "RJ": 1},
+        "person_type": {"PF": 3},
+    }
+
+
+def test_list_returns_facets_for_current_filters(client, session_factory):
+    add_persons(session_factory)
+
+    response = client.get("/api/persons/", params={"facets": "true", "role": "corretor"})
+
+    body = response.json()
+    assert response.status_code == 200
+    assert body["total"] == 2
+    assert body["facets"]["address_state"] == {"SP": 1, "RJ": 1}
+    assert body["facets"]["is_active"] == {"true": 2}
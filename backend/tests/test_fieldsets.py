@@ -0,0 +1,73 @@
+"""
+Sparse fieldsets (`fields=`) nas rotas de leitura
+"""
+import pytest
+from fastapi import HTTPException
+
+from app.models.models import Person, UserRole
+from app.schemas.schemas import PersonResponse
+from app.services import fieldsets
+
+
+@pytest.mark.parametrize("fields", [None, ""])
+def test_parse_fields_without_selection(fields):
+    assert fieldsets.parse_fields(fields, PersonResponse) is None
+
+
+def test_parse_fields_puts_id_first_and_drops_duplicates():
+    selected = fieldsets.parse_fields(" name, email ,name,id,", PersonResponse)
+
+    assert selected == ("id", "name", "email")
+
+
+def test_parse_fields_rejects_unknown_names():
+    with pytest.raises(HTTPException) as error:
+        fieldsets.parse_fields("name,password,zzz", PersonResponse)
+
+    assert error.value.status_code == 400
+    assert error.value.detail == "Campos inválidos: password, zzz"
+
+
+def test_pick():
+    item = {"id": 1, "name": "Ana", "email": "ana@teste.com"}
+
+    assert fieldsets.pick(item, ("id", "email")) == {"id": 1, "email": "ana@teste.com"}
+
+
+@pytest.fixture
+def persons(session_factory):
+    with session_factory() as db:
+        db.add_all([
+            Person(name="Ana", email="ana@teste.com", role=UserRole.CORRETOR),
+            Person(name="Bia", email="bia@teste.com"),
+        ])
+        db.commit()
+
+
+def test_list_returns_only_selected_fields(client, persons):
+    response = client.get("/api/persons/", params={"fields": "name,role"})
+
+    assert response.status_code == 200
+    assert sorted(response.json(), key=lambda item: item["id"]) == [
+        {"id": 1, "name": "Ana", "role": "corretor"},
+        {"id": 2, "name": "Bia", "role": "cliente"},
+    ]
+
+
+def test_paginated_list_selects_fields_in_items(client, persons):
+    body = client.get("/api/persons/", params={"fields": "email", "paginated": "true"}).json()
+
+    assert body["total"] == 2
+    assert all(set(item) == {"id", "email"} for item in body["items"])
+
+
+def test_get_returns_only_selected_fields(client, persons):
+    response = client.get("/api/persons/1", params={"fields": "email"})
+
+    assert response.json() == {"id": 1, "email": "ana@teste.com"}
+
+
+def test_unknown_field_is_rejected(client, persons):
+    response = client.get("/api/persons/", params={"fields": "senha"})
+
+    assert response.status_code == 400
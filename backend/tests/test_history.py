@@ -0,0 +1,78 @@
+"""
+Histórico de alterações: linha do tempo e estado em um instante
+"""
+from datetime import datetime
+
+import pytest
+from sqlalchemy import update
+
+from app.models.models import ChangeHistory
+
+
+@pytest.fixture
+def ana(client, companies, session_factory):
+    """Ana criada em janeiro e alterada em fevereiro e março"""
+    ana = client.post(
+        "/api/persons/", json={"person_type": "PF", "name": "Ana Lima", "email": "ana@teste.com"}
+    ).json()
+    client.put(f"/api/persons/{ana['id']}", json={"phone": "1111", "notes": "primeiro contato"})
+    client.put(f"/api/persons/{ana['id']}", json={"phone": "2222"})
+
+    # Datas fixas: o CURRENT_TIMESTAMP do SQLite tem resolução de segundos
+    with session_factory() as db:
+        rows = db.query(ChangeHistory.id).filter(ChangeHistory.entity_type == "person").order_by(ChangeHistory.id)
+        for (row_id,), month in zip(rows.all(), (1, 2, 3)):
+            db.execute(
+                update(ChangeHistory).where(ChangeHistory.id == row_id).values(changed_at=datetime(2026, month, 1))
+            )
+        db.commit()
+    return ana["id"]
+
+
+def test_timeline_newest_first(client, ana):
+    history = client.get(f"/api/persons/{ana}/history").json()
+
+    assert [item["operation"] for item in history] == ["update", "update", "create"]
+    assert history[0]["changes"] == {"phone": ["1111", "2222"]}
+    assert history[1]["changes"] == {"phone": [None, "1111"], "notes": [None, "primeiro contato"]}
+    assert history[2]["changes"]["name"] == [None, "Ana Lima"]
+
+
+def test_timeline_pagination(client, ana):
+    history = client.get(f"/api/persons/{ana}/history", params={"skip": 1, "limit": 1}).json()
+
+    assert len(history) == 1
+    assert history[0]["changes"] == {"phone": [None, "1111"], "notes": [None, "primeiro contato"]}
+
+
+@pytest.mark.parametrize("ts, phone, notes", [
+    ("2026-01-15T00:00:00", None, None),
+    ("2026-02-15T00:00:00", "1111", "primeiro contato"),
+    ("2026-04-01T00:00:00", "2222", "primeiro contato"),
+])
+def test_state_at_instant(client, ana, ts, phone, notes):
+    response = client.get(f"/api/persons/{ana}/history/at", params={"ts": ts})
+
+    assert response.status_code == 200
+    assert (response.json()["phone"], response.json()["notes"]) == (phone, notes)
+
+
+def test_state_before_creation_is_not_found(client, ana):
+    response = client.get(f"/api/persons/{ana}/history/at", params={"ts": "2025-12-01T00:00:00"})
+
+    assert response.status_code == 404
+
+
+def test_history_of_other_tenant_is_not_visible(client, ana):
+    # Ana não pertence a nenhuma imobiliária
+    assert client.get(f"/api/persons/{ana}/history", headers={"X-Company-Id": "2"}).status_code == 404
+    assert client.get("/api/persons/999/history").status_code == 404
+
+
+def test_company_history(client, companies):
+    client.put("/api/companies/1", json={"phone": "3333"})
+
+    history = client.get("/api/companies/1/history").json()
+
+    assert [item["operation"] for item in history] == ["update", "create"]
+    assert history[0]["changes"] == {"phone": [None, "3333"]}
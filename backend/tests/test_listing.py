@@ -0,0 +1,35 @@
+"""
+Listagem padrão (só ativos), desativados e arquivo
+"""
+from datetime import datetime
+
+from sqlalchemy import update
+
+from app.models.models import Person
+from app.services.archival import ArchivalService
+
+
+def names(response) -> list:
+    assert response.status_code == 200
+    return sorted(item["name"] for item in response.json())
+
+
+def test_default_listing_hides_inactive_and_archived(client, session_factory):
+    ids = {}
+    for name in ("Ana Lima", "Bruno Reis", "Carla Dias"):
+        email = name.lower().replace(" ", ".") + "@teste.com"
+        ids[name] = client.post("/api/persons/", json={"person_type": "PF", "name": name, "email": email}).json()["id"]
+    client.delete(f"/api/persons/{ids['Bruno Reis']}")
+    client.delete(f"/api/persons/{ids['Carla Dias']}")
+    with session_factory() as db:
+        # Só Carla está desativada há mais que o prazo do arquivamento
+        db.execute(update(Person).where(Person.id == ids["Carla Dias"]).values(updated_at=datetime(2000, 1, 1)))
+        db.commit()
+        archived = ArchivalService.archive_batch(db, "persons")
+    assert archived == 1
+
+    assert names(client.get("/api/persons/")) == ["Ana Lima"]
+    assert names(client.get("/api/persons/", params={"is_active": False})) == ["Bruno Reis"]
+    assert names(client.get("/api/persons/", params={"include_archived": True})) == [
+        "Ana Lima", "Bruno Reis", "Carla Dias"
+    ]
@@ -0,0 +1,70 @@
+"""
+Descarte de carga pela fila do pool de conexões (database.py)
+"""
+import threading
+import time
+
+import pytest
+from fastapi import HTTPException
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from app import database
+from app.database import WaitTrackingQueuePool, _session
+
+
+@pytest.fixture
+def engine(tmp_path):
+    # Uma única conexão: a segunda chamada a connect() fica na fila
+    engine = create_engine(
+        f"sqlite:///{tmp_path / 'pool.db'}", poolclass=WaitTrackingQueuePool, pool_size=1, max_overflow=0
+    )
+    yield engine
+    engine.dispose()
+
+
+def wait_for(condition, timeout=2.0):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline
+        time.sleep(0.01)
+
+
+def test_queue_counts_only_waiting_callers(engine):
+    with engine.connect():
+        assert engine.pool.queue() == (0, 0.0)
+
+        waiter = threading.Thread(target=lambda: engine.connect().close())
+        waiter.start()
+        wait_for(lambda: engine.pool.queue()[0] == 1)
+        time.sleep(0.05)
+        waiting, longest_wait = engine.pool.queue()
+        assert waiting == 1 and longest_wait >= 0.05
+
+    waiter.join()
+    assert engine.pool.queue() == (0, 0.0)
+
+
+def test_session_is_shed_while_the_pool_queue_is_long(engine, monkeypatch):
+    monkeypatch.setattr(database, "LOAD_SHED_MAX_WAIT_SECONDS", 0.05)
+    factory = sessionmaker(bind=engine)
+
+    with engine.connect():
+        waiter = threading.Thread(target=lambda: engine.connect().close())
+        waiter.start()
+        wait_for(lambda: engine.pool.queue()[1] >= 0.05)
+
+        with pytest.raises(HTTPException) as error:
+            next(_session(factory))
+        assert error.value.status_code == 503
+        assert error.value.headers["Retry-After"] == str(database.LOAD_SHED_RETRY_AFTER)
+
+    waiter.join()
+    # Fila vazia: a sessão volta a ser entregue
+    next(_session(factory)).close()
+
+
+def test_dispose_keeps_wait_tracking(engine):
+    engine.dispose()
+    assert isinstance(engine.pool, WaitTrackingQueuePool)
+    assert engine.pool.queue() == (0, 0.0)
@@ -0,0 +1,39 @@
+"""
+Divisão do orçamento de conexões entre os workers (database.pool_limits)
+"""
+import pytest
+
+from app.database import pool_limits
+
+
+@pytest.fixture(autouse=True)
+def no_overrides(monkeypatch):
+    monkeypatch.delenv("DB_POOL_SIZE", raising=False)
+    monkeypatch.delenv("DB_MAX_OVERFLOW", raising=False)
+
+
+@pytest.mark.parametrize("budget, workers, expected", [
+    (60, 1, (20, 40)),
+    (60, 4, (5, 10)),
+    (60, 9, (2, 4)),
+    (10, 8, (1, 0)),
+    # Orçamento menor que o número de workers: ao menos uma conexão cada
+    (4, 8, (1, 0)),
+])
+def test_budget_split_per_worker(budget, workers, expected):
+    assert pool_limits(budget, workers) == expected
+
+
+@pytest.mark.parametrize("workers", range(1, 17))
+def test_workers_never_exceed_budget(workers):
+    pool_size, max_overflow = pool_limits(60, workers)
+
+    assert pool_size >= 1
+    assert (pool_size + max_overflow) * workers <= 60
+
+
+def test_env_overrides_calculation(monkeypatch):
+    monkeypatch.setenv("DB_POOL_SIZE", "7")
+    monkeypatch.setenv("DB_MAX_OVERFLOW", "3")
+
+    assert pool_limits(60, 4) == (7, 3)
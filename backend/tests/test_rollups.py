@@ -0,0 +1,100 @@
+"""
+Contadores de funcionários das imobiliárias (services/rollups.py)
+"""
+from collections import defaultdict
+
+import pytest
+from sqlalchemy import update
+
+from app.models.models import Company, Person, UserRole
+from app.services.rollups import ROLLUP_COLUMNS, RollupService, add_change
+
+
+def nonzero(deltas) -> dict:
+    result = {}
+    for company_id, columns in deltas.items():
+        changed = {column: delta for column, delta in columns.items() if delta}
+        if changed:
+            result[company_id] = changed
+    return result
+
+
+def test_add_change():
+    deltas = defaultdict(lambda: defaultdict(int))
+    add_change(deltas, None, (1, "corretor", True))
+    add_change(deltas, (1, "corretor", True), (2, "corretor", True))   # transferência
+    add_change(deltas, (2, "cliente", True), (2, "cliente", False))    # desativação
+    add_change(deltas, (None, "cliente", True), (None, "admin", True))  # sem imobiliária
+    add_change(deltas, (3, "gestor", True), (3, "gestor", True))       # sem mudança
+
+    assert nonzero(deltas) == {2: {"employee_count": 1, "corretor_count": 1, "cliente_count": -1}}
+
+
+@pytest.fixture
+def db(session_factory, companies):
+    with session_factory() as session:
+        yield session
+
+
+def counters(db, company_id: int) -> dict:
+    db.expire_all()
+    company = db.get(Company, company_id)
+    return {name: getattr(company, name) for name in ROLLUP_COLUMNS if getattr(company, name)}
+
+
+def add_person(db, name: str, company_id: int, role=UserRole.CORRETOR) -> Person:
+    person = Person(person_type="PF", name=name, email=f"{name}@teste.com", role=role, company_id=company_id)
+    db.add(person)
+    db.commit()
+    return person
+
+
+def test_orm_writes_adjust_counters(db):
+    ana = add_person(db, "ana", 1)
+    add_person(db, "bruno", 1, role=UserRole.CLIENTE)
+    assert counters(db, 1) == {
+        "employee_count": 2, "active_employee_count": 2, "corretor_count": 1, "cliente_count": 1
+    }
+
+    ana.company_id = 2
+    db.commit()
+    ana.is_active = False
+    db.commit()
+
+    assert counters(db, 1) == {"employee_count": 1, "active_employee_count": 1, "cliente_count": 1}
+    assert counters(db, 2) == {"employee_count": 1}
+    assert RollupService.reconcile(db, dry_run=True) == []
+
+
+def test_deltas_start_from_current_row(db, session_factory):
+    """Um objeto carregado antes de outra transação mover a pessoa não desconta a imobiliária errada"""
+    ana = add_person(db, "ana", 1)
+
+    with session_factory() as other:
+        other.get(Person, ana.id).company_id = 2
+        other.commit()
+
+    # `ana` ainda tem company_id=1 carregado nesta sessão
+    ana.role = UserRole.ADMIN
+    db.commit()
+
+    assert counters(db, 1) == {}
+    assert counters(db, 2) == {"employee_count": 1, "active_employee_count": 1, "admin_count": 1}
+    assert RollupService.reconcile(db, dry_run=True) == []
+
+
+def test_reconcile_fixes_drift_in_batches(db):
+    add_person(db, "ana", 1)
+    add_person(db, "bruno", 2)
+    # Escrita fora da aplicação: os contadores não acompanham
+    db.execute(update(Person).where(Person.email == "bruno@teste.com").values(company_id=1))
+    db.execute(update(Company).where(Company.id == 2).values(gestor_count=7))
+    db.commit()
+
+    assert RollupService.reconcile(db, dry_run=True) == [1, 2]
+    assert counters(db, 2)["gestor_count"] == 7
+
+    assert RollupService.reconcile(db, batch_size=1) == [1, 2]
+    assert counters(db, 1) == {"employee_count": 2, "active_employee_count": 2, "corretor_count": 2}
+    assert counters(db, 2) == {}
+    assert RollupService.reconcile(db) == []
@@ -0,0 +1,84 @@
+"""
+Escopo por imobiliária (X-Company-Id) e unicidade por imobiliária na API
+"""
+import pytest
+
+
+def person(name: str, **fields) -> dict:
+    email = name.lower().replace(" ", ".") + "@teste.com"
+    return {"person_type": "PF", "name": name, "email": email, **fields}
+
+
+def tenant(company_id: int) -> dict:
+    return {"X-Company-Id": str(company_id)}
+
+
+@pytest.fixture
+def people(client, companies):
+    """Ana na imobiliária 1 e Bruno na 2"""
+    ana = client.post("/api/persons/", json=person("Ana Lima"), headers=tenant(1))
+    bruno = client.post("/api/persons/", json=person("Bruno Reis"), headers=tenant(2))
+    assert ana.status_code == bruno.status_code == 201
+    return ana.json(), bruno.json()
+
+
+def test_created_person_belongs_to_tenant(people):
+    ana, bruno = people
+    assert (ana["company_id"], bruno["company_id"]) == (1, 2)
+
+
+def test_tenant_only_sees_own_persons(client, people):
+    ana, bruno = people
+
+    names = [p["name"] for p in client.get("/api/persons/", headers=tenant(1)).json()]
+    assert names == ["Ana Lima"]
+    assert client.get(f"/api/persons/{bruno['id']}", headers=tenant(1)).status_code == 404
+    assert client.put(f"/api/persons/{bruno['id']}", json={"notes": "x"}, headers=tenant(1)).status_code == 404
+
+    # Sem o header não há escopo (ver o limite de confiança em middleware/tenant.py)
+    assert len(client.get("/api/persons/").json()) == 2
+
+
+def test_tenant_cannot_write_into_another_company(client, people):
+    ana, _ = people
+
+    response = client.post("/api/persons/", json=person("Carla Dias", company_id=2), headers=tenant(1))
+    assert response.status_code == 403
+    response = client.put(f"/api/persons/{ana['id']}", json={"company_id": 2}, headers=tenant(1))
+    assert response.status_code == 403
+
+
+def test_invalid_tenant_header(client):
+    assert client.get("/api/persons/", headers={"X-Company-Id": "abc"}).status_code == 400
+
+
+def test_uniqueness_is_per_company(client, people):
+    ana, bruno = people
+
+    # O mesmo email em outra imobiliária é permitido; na mesma, não
+    response = client.post("/api/persons/", json=person("Ana Lima", cpf="529.982.247-25"), headers=tenant(2))
+    assert response.status_code == 201
+    ana_2 = response.json()
+    response = client.post("/api/persons/", json=person("Ana Lima"), headers=tenant(1))
+    assert (response.status_code, response.json()["detail"]) == (400, "Email já cadastrado")
+
+    # O CPF também, inclusive ao alterar uma pessoa existente
+    cpf = {"cpf": "52998224725"}
+    assert client.put(f"/api/persons/{ana['id']}", json=cpf, headers=tenant(1)).status_code == 200
+    response = client.put(f"/api/persons/{bruno['id']}", json=cpf, headers=tenant(2))
+    assert (response.status_code, response.json()["detail"]) == (400, "CPF já cadastrado")
+    # A própria pessoa não conflita consigo mesma
+    assert client.put(f"/api/persons/{ana_2['id']}", json=cpf, headers=tenant(2)).status_code == 200
+
+
+def test_moving_person_checks_destination_company(client, people):
+    ana, _ = people
+    client.post("/api/persons/", json=person("Ana Lima"), headers=tenant(2))
+
+    response = client.put(f"/api/persons/{ana['id']}", json={"company_id": 2})
+    assert (response.status_code, response.json()["detail"]) == (400, "Email já cadastrado")
+
+    # Em lote, o índice único barra a transferência
+    response = client.patch("/api/persons/bulk", json={"ids": [ana["id"]], "changes": {"company_id": 2}})
+    assert response.status_code == 409
+    assert client.get(f"/api/persons/{ana['id']}").json()["company_id"] == 1
@@ -1,6 +1,7 @@
 import 'dart:convert';
 import 'package:http/http.dart' as http;
 import '../models/company.dart';
+import 'read_your_writes.dart';
 
 class CompanyService {
   // URL base da API - ajustar conforme ambiente
@@ -9,11 +10,11 @@ class CompanyService {
   // Criar nova imobiliária
   Future<Company> createCompany(Company company) async {
     try {
-      final response = await http.post(
+      final response = ReadYourWrites.track(await http.post(
         Uri.parse(baseUrl),
-        headers: {'Content-Type': 'application/json'},
+        headers: ReadYourWrites.headers({'Content-Type': 'application/json'}),
         body: jsonEncode(company.toJson()),
-      );
+      ));
 
       if (response.statusCode == 201) {
         return Company.fromJson(jsonDecode(response.body));
@@ -45,7 +46,7 @@ class CompanyService {
       if (search != null && search.isNotEmpty) queryParams['search'] = search;
 
       final uri = Uri.parse(baseUrl).replace(queryParameters: queryParams);
-      final response = await http.get(uri);
+      final response = await http.get(uri, headers: ReadYourWrites.headers());
 
       if (response.statusCode == 200) {
         final List<dynamic> data = jsonDecode(response.body);
@@ -61,7 +62,7 @@ class CompanyService {
   // Buscar imobiliária por ID
   Future<Company> getCompany(int id) async {
     try {
-      final response = await http.get(Uri.parse('$baseUrl/$id'));
+      final response = await http.get(Uri.parse('$baseUrl/$id'), headers: ReadYourWrites.headers());
 
       if (response.statusCode == 200) {
         return Company.fromJson(jsonDecode(response.body));
@@ -78,11 +79,11 @@ class CompanyService {
   // Atualizar imobiliária
   Future<Company> updateCompany(int id, Map<String, dynamic> updates) async {
     try {
-      final response = await http.put(
+      final response = ReadYourWrites.track(await http.put(
         Uri.parse('$baseUrl/$id'),
-        headers: {'Content-Type': 'application/json'},
+        headers: ReadYourWrites.headers({'Content-Type': 'application/json'}),
         body: jsonEncode(updates),
-      );
+      ));
 
       if (response.statusCode == 200) {
         return Company.fromJson(jsonDecode(response.body));
@@ -98,7 +99,9 @@ class CompanyService {
   // Deletar imobiliária (soft delete)
   Future<void> deleteCompany(int id) async {
     try {
-      final response = await http.delete(Uri.parse('$baseUrl/$id'));
+      final response = ReadYourWrites.track(
+        await http.delete(Uri.parse('$baseUrl/$id'), headers: ReadYourWrites.headers()),
+      );
 
       if (response.statusCode != 200) {
         final error = jsonDecode(response.body);
@@ -112,7 +115,7 @@ class CompanyService {
   // Listar funcionários de uma imobiliária
   Future<Map<String, dynamic>> getEmployees(int companyId) async {
     try {
-      final response = await http.get(Uri.parse('$baseUrl/$companyId/employees'));
+      final response = await http.get(Uri.parse('$baseUrl/$companyId/employees'), headers: ReadYourWrites.headers());
 
       if (response.statusCode == 200) {
         return jsonDecode(response.body);
@@ -127,7 +130,7 @@ class CompanyService {
   // Estatísticas
   Future<Map<String, dynamic>> getStats() async {
     try {
-      final response = await http.get(Uri.parse('$baseUrl/stats/summary'));
+      final response = await http.get(Uri.parse('$baseUrl/stats/summary'), headers: ReadYourWrites.headers());
 
       if (response.statusCode == 200) {
         return jsonDecode(response.body);
@@ -1,6 +1,7 @@
 import 'dart:convert';
 import 'package:http/http.dart' as http;
 import '../models/person.dart';
+import 'read_your_writes.dart';
 
 class PersonService {
   // URL base da API - ajustar conforme ambiente
@@ -9,11 +10,11 @@ class PersonService {
   // Criar nova pessoa
   Future<Person> createPerson(Person person) async {
     try {
-      final response = await http.post(
+      final response = ReadYourWrites.track(await http.post(
         Uri.parse(baseUrl),
-        headers: {'Content-Type': 'application/json'},
+        headers: ReadYourWrites.headers({'Content-Type': 'application/json'}),
         body: jsonEncode(person.toJson()),
-      );
+      ));
 
       if (response.statusCode == 201) {
         return Person.fromJson(jsonDecode(response.body));
@@ -47,7 +48,7 @@ class PersonService {
       if (search != null && search.isNotEmpty) queryParams['search'] = search;
 
       final uri = Uri.parse(baseUrl).replace(queryParameters: queryParams);
-      final response = await http.get(uri);
+      final response = await http.get(uri, headers: ReadYourWrites.headers());
 
       if (response.statusCode == 200) {
         final List<dynamic> data = jsonDecode(response.body);
@@ -63,7 +64,7 @@ class PersonService {
   // Buscar pessoa por ID
   Future<Person> getPerson(int id) async {
     try {
-      final response = await http.get(Uri.parse('$baseUrl/$id'));
+      final response = await http.get(Uri.parse('$baseUrl/$id'), headers: ReadYourWrites.headers());
 
       if (response.statusCode == 200) {
         return Person.fromJson(jsonDecode(response.body));
@@ -80,11 +81,11 @@ class PersonService {
   // Atualizar pessoa
   Future<Person> updatePerson(int id, Map<String, dynamic> updates) async {
     try {
-      final response = await http.put(
+      final response = ReadYourWrites.track(await http.put(
         Uri.parse('$baseUrl/$id'),
-        headers: {'Content-Type': 'application/json'},
+        headers: ReadYourWrites.headers({'Content-Type': 'application/json'}),
         body: jsonEncode(updates),
-      );
+      ));
 
       if (response.statusCode == 200) {
         return Person.fromJson(jsonDecode(response.body));
@@ -100,7 +101,9 @@ class PersonService {
   // Deletar pessoa (soft delete)
   Future<void> deletePerson(int id) async {
     try {
-      final response = await http.delete(Uri.parse('$baseUrl/$id'));
+      final response = ReadYourWrites.track(
+        await http.delete(Uri.parse('$baseUrl/$id'), headers: ReadYourWrites.headers()),
+      );
 
       if (response.statusCode != 200) {
         final error = jsonDecode(response.body);
@@ -114,7 +117,7 @@ class PersonService {
   // Estatísticas
   Future<Map<String, dynamic>> getStats() async {
     try {
-      final response = await http.get(Uri.parse('$baseUrl/stats/summary'));
+      final response = await http.get(Uri.parse('$baseUrl/stats/summary'), headers: ReadYourWrites.headers());
 
       if (response.statusCode == 200) {
         return jsonDecode(response.body);
@@ -0,0 +1,26 @@
+import 'package:http/http.dart' as http;
+
+// Leitura das próprias escritas: após cada escrita a API devolve o header
+// X-Last-Write; reenviá-lo nas requisições seguintes faz as leituras irem ao
+// banco primário, e não a uma réplica que ainda não recebeu a escrita.
+// O app não guarda cookies, por isso o token é mantido aqui.
+class ReadYourWrites {
+  static const String header = 'X-Last-Write';
+
+  static String? _lastWrite;
+
+  // Headers da requisição, com o token da última escrita (se houver)
+  static Map<String, String> headers([Map<String, String> extra = const {}]) {
+    return {
+      ...extra,
+      if (_lastWrite != null) header: _lastWrite!,
+    };
+  }
+
+  // Guarda o token devolvido pela API; retorna a própria resposta
+  static http.Response track(http.Response response) {
+    final lastWrite = response.headers[header.toLowerCase()];
+    if (lastWrite != null) _lastWrite = lastWrite;
+    return response;
+  }
+}